@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos agrupamentos de /reports/donations (resumo, por mês e por tipo)
+
+Gera N doações e calcula os mesmos agrupamentos de três formas:
+    loop:     objetos Donation do ORM e dois laços em Python (como antes)
+    colunas:  mês, tipo e valor em arrays, agrupados por group_totals
+              (numpy.bincount quando instalado, módulo array sem ele)
+    totais:   soma das linhas de donation_daily_totals
+
+Mede o tempo (mediana das repetições) e, em uma execução separada, o pico
+de memória alocada (tracemalloc) de cada forma.
+
+Uso: python benchmarks/bench_donation_analytics.py [doações...] [--repeat N]
+     (padrão: 100000 1000000)
+"""
+
+import argparse
+import gc
+import random
+import statistics
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from common import create_bench_app
+from src.models.user import db
+from src.models.donation import Donation, DonationDailyTotal
+from src.routes.reports import rollup_breakdowns
+from src.services import donation_analytics
+from src.services.donation_analytics import load_donation_columns, donation_breakdowns
+from src.services.revenue_rollup import rebuild_revenue_rollups
+
+SEED_BATCH = 50000
+
+def seed_donations(count):
+    """Inserir doações em três anos, 90% concluídas"""
+    rng = random.Random(42)
+    start = datetime(2022, 1, 1)
+    for offset in range(0, count, SEED_BATCH):
+        db.session.execute(db.insert(Donation), [{
+            'donor_name': f'Doador {i}',
+            'donor_email': f'doador{rng.randint(1, count // 4 + 1)}@example.com',
+            'amount': rng.choice([10, 25, 50, 100, 250]),
+            'donation_type': rng.choice(['one_time', 'recurring']),
+            'payment_method': rng.choice(['pix', 'credit_card', 'boleto']),
+            'payment_status': 'completed' if rng.random() < 0.9 else 'failed',
+            'created_at': start + timedelta(minutes=rng.randint(0, 3 * 525600))
+        } for i in range(offset, min(offset + SEED_BATCH, count))])
+    # O INSERT em lote não passa pelo listener dos totais diários
+    rebuild_revenue_rollups(db.session)
+    db.session.commit()
+
+def loop_breakdowns():
+    """Agrupamentos como o donations_report fazia: ORM e laços em Python"""
+    donations = Donation.query.filter(Donation.payment_status == 'completed').order_by(
+        Donation.created_at.desc()
+    ).all()
+    total_amount = sum(float(d.amount) for d in donations)
+    total_count = len(donations)
+    monthly_data = defaultdict(lambda: {'count': 0, 'amount': 0})
+    for donation in donations:
+        month_key = donation.created_at.strftime('%Y-%m')
+        monthly_data[month_key]['count'] += 1
+        monthly_data[month_key]['amount'] += float(donation.amount)
+    type_data = defaultdict(lambda: {'count': 0, 'amount': 0})
+    for donation in donations:
+        type_data[donation.donation_type]['count'] += 1
+        type_data[donation.donation_type]['amount'] += float(donation.amount)
+    return {
+        'summary': {
+            'total_count': total_count,
+            'total_amount': total_amount,
+            'average_donation': total_amount / total_count if total_count > 0 else 0
+        },
+        'monthly_breakdown': dict(monthly_data),
+        'type_breakdown': dict(type_data)
+    }
+
+def columns_breakdowns():
+    return donation_breakdowns(load_donation_columns(Donation.payment_status == 'completed'))
+
+def rollup_report():
+    return rollup_breakdowns(DonationDailyTotal.payment_status == 'completed')
+
+def measure(function, repeat):
+    """(mediana ms, pico MiB, resultado)"""
+    timings = []
+    for _ in range(repeat):
+        db.session.expunge_all()
+        gc.collect()
+        start = time.perf_counter()
+        result = function()
+        timings.append((time.perf_counter() - start) * 1000)
+        del result
+
+    db.session.expunge_all()
+    gc.collect()
+    tracemalloc.start()
+    result = function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    db.session.expunge_all()
+    return statistics.median(timings), peak / 2 ** 20, result
+
+def run(count, repeat):
+    app = create_bench_app()
+    with app.app_context():
+        seed_donations(count)
+
+        methods = [('loop', loop_breakdowns)]
+        numpy = donation_analytics.numpy
+        donation_analytics.numpy = None
+        methods.append(('colunas/array', columns_breakdowns))
+        results = []
+        for label, function in methods:
+            results.append((label, *measure(function, repeat)))
+        donation_analytics.numpy = numpy
+        if numpy is not None:
+            results.append(('colunas/numpy', *measure(columns_breakdowns, repeat)))
+        results.append(('totais', *measure(rollup_report, repeat)))
+
+    expected = results[0][3]
+    print(f'\n{count} doações, mediana de {repeat} repetição(ões)')
+    baseline = results[0][1]
+    for label, elapsed, peak, result in results:
+        same = result['summary']['total_count'] == expected['summary']['total_count'] and \
+            set(result['monthly_breakdown']) == set(expected['monthly_breakdown'])
+        print(f'{label:14} {elapsed:9.1f} ms {peak:9.1f} MiB {baseline / elapsed:7.1f}x'
+              f'{"" if same else "  (resultado diferente!)"}')
+    if numpy is None:
+        print('numpy não instalado: colunas agrupadas com o módulo array')
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('counts', nargs='*', type=int, default=[100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    for count in args.counts:
+        run(count, args.repeat)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark da serialização do payload de /reports/donations
+
+Monta o mesmo dicionário da rota (resumo, agrupamentos e to_dict de cada
+doação) e compara o custo de gerar a resposta JSON com:
+    legado:   to_dict com float()/isoformat() + DefaultJSONProvider (json padrão)
+    stdlib:   to_dict com valores das colunas + FastJSONProvider sem orjson
+    orjson:   to_dict com valores das colunas + FastJSONProvider com orjson
+
+Uso: python benchmarks/bench_json_serialization.py [doações] [repetições]
+"""
+
+import random
+import statistics
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from flask.json.provider import DefaultJSONProvider
+
+from common import create_bench_app
+from src.models.donation import Donation
+from src.middleware import json_provider
+from src.middleware.json_provider import FastJSONProvider
+
+def build_donations(count):
+    """Doações em memória (sem banco), com os tipos das colunas"""
+    rng = random.Random(42)
+    start = datetime(2024, 1, 1)
+    donations = []
+    for i in range(count):
+        created_at = start + timedelta(minutes=rng.randint(0, 525600))
+        donations.append(Donation(
+            id=i + 1, donor_name=f'Doador {i}', donor_email=f'doador{i}@example.com',
+            donor_phone='(32) 99999-9999', amount=Decimal(rng.choice(['10.00', '25.00', '50.00', '99.90'])),
+            donation_type=rng.choice(['one_time', 'recurring']), payment_method='pix',
+            payment_status='completed', payment_id=f'PIX{i}', created_at=created_at, updated_at=created_at
+        ))
+    return donations
+
+def legacy_to_dict(donation):
+    """to_dict anterior, com as conversões feitas no modelo"""
+    data = donation.to_dict()
+    data['amount'] = float(donation.amount)
+    data['created_at'] = donation.created_at.isoformat()
+    data['updated_at'] = donation.updated_at.isoformat()
+    return data
+
+def report_payload(donations, to_dict):
+    """Mesmo formato de resposta de donations_report"""
+    total_amount = sum(float(d.amount) for d in donations)
+    monthly_data = defaultdict(lambda: {'count': 0, 'amount': 0})
+    type_data = defaultdict(lambda: {'count': 0, 'amount': 0})
+    for donation in donations:
+        month_key = donation.created_at.strftime('%Y-%m')
+        monthly_data[month_key]['count'] += 1
+        monthly_data[month_key]['amount'] += float(donation.amount)
+        type_data[donation.donation_type]['count'] += 1
+        type_data[donation.donation_type]['amount'] += float(donation.amount)
+
+    return {
+        'summary': {
+            'total_count': len(donations),
+            'total_amount': total_amount,
+            'average_donation': total_amount / len(donations)
+        },
+        'monthly_breakdown': dict(monthly_data),
+        'type_breakdown': dict(type_data),
+        'donations': [to_dict(donation) for donation in donations]
+    }
+
+def measure(provider, donations, to_dict, repeat):
+    """Mediana (ms) de to_dict + provider.response e tamanho do corpo"""
+    timings = []
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = provider.response(report_payload(donations, to_dict))
+        timings.append((time.perf_counter() - start) * 1000)
+        size = len(response.get_data())
+    return statistics.median(timings), size
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    app = create_bench_app()
+    donations = build_donations(count)
+    orjson = json_provider.orjson
+
+    with app.app_context():
+        legacy = DefaultJSONProvider(app)
+        legacy.compact = True
+        legacy.ensure_ascii = False
+        fast = FastJSONProvider(app)
+        fast.compact = True
+        fast.ensure_ascii = False
+
+        results = [('legado', *measure(legacy, donations, legacy_to_dict, repeat))]
+        json_provider.orjson = None
+        results.append(('stdlib', *measure(fast, donations, Donation.to_dict, repeat)))
+        json_provider.orjson = orjson
+        if orjson is not None:
+            results.append(('orjson', *measure(fast, donations, Donation.to_dict, repeat)))
+        else:
+            print('orjson não instalado: apenas legado e stdlib')
+
+    print(f'{count} doações, mediana de {repeat} repetições')
+    baseline = results[0][1]
+    for label, elapsed, size in results:
+        print(f'{label:8} {elapsed:8.1f} ms  {size / 1024:8.0f} KiB  {baseline / elapsed:5.2f}x')
+
+if __name__ == '__main__':
+    main()
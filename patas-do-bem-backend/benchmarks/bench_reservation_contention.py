@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark de contenção na reserva de números de rifa
+
+Vários compradores concorrentes disputam os mesmos números; ao final
+verifica que nenhum número foi entregue a dois compradores.
+
+Uso: python benchmarks/bench_reservation_contention.py [threads] [tentativas]
+"""
+
+import sys
+import threading
+import time
+
+from common import create_bench_app
+from src.models.user import db
+from src.models.raffle import Raffle, RaffleTicket
+from src.services.reservation_service import reservation_service
+
+def run(threads=16, attempts=50, total_numbers=1000, numbers_per_purchase=5):
+    app = create_bench_app()
+
+    with app.app_context():
+        raffle = Raffle(title='Benchmark', ticket_price=10, total_numbers=total_numbers)
+        db.session.add(raffle)
+        db.session.commit()
+        raffle_id = raffle.id
+
+    won_numbers = []
+    lost_count = [0]
+    latencies = []
+    lock = threading.Lock()
+
+    def buyer(seed):
+        import random
+        rng = random.Random(seed)
+        with app.app_context():
+            for _ in range(attempts):
+                # Todos escolhem numa faixa estreita para forçar conflitos
+                numbers = rng.sample(range(1, total_numbers // 4 + 1), numbers_per_purchase)
+                start = time.perf_counter()
+                result = reservation_service.reserve(
+                    raffle_id, numbers,
+                    {'buyer_name': f'Comprador {seed}', 'buyer_email': 'bench@example.com'},
+                    allow_partial=True
+                )
+                elapsed = time.perf_counter() - start
+                with lock:
+                    won_numbers.extend(result['won'])
+                    lost_count[0] += len(result['lost'])
+                    latencies.append(elapsed)
+
+    workers = [threading.Thread(target=buyer, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    with app.app_context():
+        rows = RaffleTicket.query.filter_by(raffle_id=raffle_id).count()
+        reserved_count = db.session.get(Raffle, raffle_id).reserved_count
+
+    latencies.sort()
+    total_requests = threads * attempts
+    print(f'Threads: {threads}, reservas: {total_requests}, tempo total: {elapsed:.2f} s')
+    print(f'Vazão: {total_requests / elapsed:.0f} reservas/s')
+    print(f'Latência p50: {latencies[len(latencies) // 2] * 1000:.1f} ms, '
+          f'p99: {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms')
+    print(f'Números ganhos: {len(won_numbers)}, perdidos por conflito: {lost_count[0]}')
+
+    duplicated = len(won_numbers) - len(set(won_numbers))
+    assert duplicated == 0, f'{duplicated} número(s) entregues em duplicidade'
+    assert rows == len(won_numbers) == reserved_count, 'Tickets e contadores divergem'
+    print('OK: nenhum número duplicado, contadores consistentes')
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:3]]
+    run(*args)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark de leituras concorrentes com rajadas de escrita no SQLite
+
+Compara os perfis de PRAGMA (SQLITE_PROFILES): leitores executam as
+consultas agregadas do dashboard enquanto escritores inserem doações em
+rajadas, e é medida a latência das leituras.
+
+Uso: python benchmarks/bench_sqlite_profiles.py [leitores] [escritores] [segundos]
+"""
+
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import func
+from sqlalchemy.exc import OperationalError
+
+from common import create_bench_app
+from src.models.user import db
+from src.models.donation import Donation
+from src.services.database_config import SQLITE_PROFILES
+
+def read_dashboard():
+    """Consultas agregadas equivalentes às do dashboard"""
+    db.session.query(func.count(Donation.id)).scalar()
+    db.session.query(func.sum(Donation.amount)).filter(Donation.payment_status == 'completed').scalar()
+    db.session.query(func.count(func.distinct(Donation.donor_email))).scalar()
+    db.session.rollback()
+
+def write_burst(rng, size):
+    """Inserir uma rajada de doações em uma única transação"""
+    for i in range(size):
+        db.session.add(Donation(
+            donor_name='Benchmark', donor_email=f'doador{rng.randint(1, 5000)}@example.com',
+            amount=rng.choice([10, 25, 50, 100]), donation_type='one_time',
+            payment_method='pix', payment_status=rng.choice(['completed', 'pending']),
+            created_at=datetime.utcnow()
+        ))
+    db.session.commit()
+
+def run_profile(profile, readers, writers, duration, burst_size=2000, seed_rows=20000):
+    app = create_bench_app(sqlite_profile=profile)
+    rng = random.Random(42)
+
+    with app.app_context():
+        write_burst(rng, seed_rows)
+
+    latencies = []
+    errors = [0]
+    writes = [0]
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def reader():
+        with app.app_context():
+            while not stop.is_set():
+                start = time.perf_counter()
+                try:
+                    read_dashboard()
+                except OperationalError:
+                    db.session.rollback()
+                    with lock:
+                        errors[0] += 1
+                    continue
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies.append(elapsed)
+
+    def writer(seed):
+        writer_rng = random.Random(seed)
+        with app.app_context():
+            while not stop.is_set():
+                try:
+                    write_burst(writer_rng, burst_size)
+                except OperationalError:
+                    db.session.rollback()
+                    with lock:
+                        errors[0] += 1
+                    continue
+                with lock:
+                    writes[0] += burst_size
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    count = len(latencies)
+    print(f"Perfil '{profile}': {count} leituras, {writes[0]} doações gravadas, {errors[0]} erro(s) de lock")
+    if count:
+        print(f'  Latência de leitura p50: {latencies[count // 2] * 1000:.1f} ms, '
+              f'p99: {latencies[int(count * 0.99)] * 1000:.1f} ms, '
+              f'máx: {latencies[-1] * 1000:.1f} ms')
+
+def run(readers=4, writers=1, duration=5):
+    for profile in SQLITE_PROFILES:
+        run_profile(profile, readers, writers, duration)
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:4]]
+    run(*args)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Benchmark da exportação de doações com compressão em memória e em stream
+
+Gera N doações e exporta o CSV de três formas pela mesma aplicação (com o
+middleware compress_response registrado):
+    buffered: CSV montado em StringIO e comprimido de uma vez (como hoje)
+    streamed: linhas geradas por yield_per e comprimidas parte a parte
+    json:     as mesmas linhas em JSON, compactado pelo provider do Flask
+              versus o antigo reparse com json.dumps(separators=...)
+
+Mede o tempo total, o tempo até o primeiro byte comprimido e o pico de
+memória alocada (tracemalloc) de cada forma.
+
+Uso: python benchmarks/bench_streaming_compression.py [doações]
+"""
+
+import csv
+import gzip
+import io
+import json
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from flask import Response, jsonify, stream_with_context
+
+from common import create_bench_app
+from src.models.user import db
+from src.models.donation import Donation
+from src.middleware.compression import compress_response
+
+HEADER = ['Data', 'Nome', 'Email', 'Valor', 'Tipo', 'Método de Pagamento', 'Status']
+
+def seed_donations(count):
+    """Inserir doações concluídas com datas espalhadas em um ano"""
+    rng = random.Random(42)
+    start = datetime(2024, 1, 1)
+    rows = [{
+        'donor_name': f'Doador {i}',
+        'donor_email': f'doador{rng.randint(1, count // 4)}@example.com',
+        'amount': rng.choice([10, 25, 50, 100, 250]),
+        'donation_type': rng.choice(['one_time', 'recurring']),
+        'payment_method': rng.choice(['pix', 'credit_card', 'boleto']),
+        'payment_status': 'completed',
+        'created_at': start + timedelta(minutes=rng.randint(0, 525600))
+    } for i in range(count)]
+    db.session.execute(db.insert(Donation), rows)
+    db.session.commit()
+
+def csv_row(donation):
+    return [
+        donation.created_at.strftime('%d/%m/%Y %H:%M'),
+        donation.donor_name,
+        donation.donor_email,
+        f"R$ {donation.amount:.2f}",
+        'Recorrente' if donation.donation_type == 'recurring' else 'Única',
+        donation.payment_method.upper(),
+        donation.payment_status
+    ]
+
+def donations_query():
+    return Donation.query.filter(Donation.payment_status == 'completed').order_by(Donation.created_at.desc())
+
+def register_routes(app):
+    @app.route('/buffered')
+    def buffered():
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(HEADER)
+        for donation in donations_query().all():
+            writer.writerow(csv_row(donation))
+        return Response(output.getvalue(), mimetype='text/csv')
+
+    @app.route('/streamed')
+    def streamed():
+        def generate():
+            output = io.StringIO()
+            writer = csv.writer(output)
+            writer.writerow(HEADER)
+            for donation in donations_query().yield_per(1000):
+                writer.writerow(csv_row(donation))
+                if output.tell() > 64 * 1024:
+                    yield output.getvalue()
+                    output.seek(0)
+                    output.truncate()
+            yield output.getvalue()
+        return Response(stream_with_context(generate()), mimetype='text/csv')
+
+    @app.route('/json')
+    def json_rows():
+        return jsonify([dict(zip(HEADER, csv_row(donation))) for donation in donations_query().all()])
+
+def measure(client, url):
+    """(total ms, primeiro byte ms, pico MiB, bytes comprimidos, bytes originais)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    response = client.get(url, headers={'Accept-Encoding': 'gzip'}, buffered=False)
+    chunks = iter(response.response)
+    first = next(chunks)
+    first_byte = time.perf_counter() - start
+    body = first + b''.join(chunks)
+    total = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    response.close()
+    return total * 1000, first_byte * 1000, peak / 2 ** 20, len(body), len(gzip.decompress(body))
+
+def measure_reparse(client):
+    """Custo do antigo optimize_json_response: parse e novo dumps do corpo"""
+    data = client.get('/json').get_data()
+    start = time.perf_counter()
+    compact = json.dumps(json.loads(data), separators=(',', ':'), ensure_ascii=False)
+    return (time.perf_counter() - start) * 1000, len(compact.encode('utf-8'))
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    app = create_bench_app()
+    app.json.compact = True
+    app.json.ensure_ascii = False
+    app.after_request(compress_response())
+    register_routes(app)
+
+    with app.app_context():
+        seed_donations(count)
+
+    client = app.test_client()
+    print(f'{count} doações')
+    print(f"{'modo':10} {'total':>10} {'1º byte':>10} {'pico':>10} {'gzip':>10} {'original':>10}")
+    for url in ('/buffered', '/streamed', '/json'):
+        total, first_byte, peak, compressed, original = measure(client, url)
+        print(f'{url[1:]:10} {total:8.0f}ms {first_byte:8.0f}ms {peak:8.1f}MiB '
+              f'{compressed / 1024:8.0f}KiB {original / 1024:8.0f}KiB')
+
+    reparse_ms, reparse_size = measure_reparse(client)
+    print(f'reparse JSON (antigo optimize_json_response): +{reparse_ms:.0f}ms, {reparse_size / 1024:.0f}KiB')
+
+if __name__ == '__main__':
+    main()
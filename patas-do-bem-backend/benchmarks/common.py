@@ -0,0 +1,46 @@
+"""
+Benchmark Helpers
+Aplicação Flask mínima apontando para um banco de dados descartável
+"""
+
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from flask import Flask
+from src.models.user import db
+from src.models.donation import Donation
+from src.models.raffle import Raffle, RaffleTicket
+from src.models.contact import ContactMessage
+from src.models.admin import Admin
+from src.services.database_config import configure_sqlite
+
+def create_bench_app(database_uri=None, sqlite_profile='default'):
+    """Criar aplicação com banco SQLite temporário (ou o URI informado)"""
+    if database_uri is None:
+        fd, path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        database_uri = f'sqlite:///{path}'
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_uri
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+
+    with app.app_context():
+        configure_sqlite(db.engine, sqlite_profile)
+        db.create_all()
+
+    return app
+
+@contextmanager
+def timer(label):
+    """Medir e imprimir o tempo de um bloco"""
+    start = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - start
+    print(f'{label}: {elapsed * 1000:.1f} ms')
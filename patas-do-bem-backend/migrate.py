@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Script para aplicar as migrações do banco de dados sem subir a aplicação
+
+Uso:
+    python migrate.py status
+    python migrate.py upgrade
+    python migrate.py upgrade --database-url postgresql://...
+"""
+
+import argparse
+import os
+import sys
+sys.path.insert(0, os.path.dirname(__file__))
+
+from sqlalchemy import create_engine
+
+from src.migrations import load_migrations, applied_versions, run_migrations
+from src.services.database_config import get_database_url
+
+def show_status(engine):
+    """Listar as migrações e se já foram aplicadas"""
+    applied = applied_versions(engine)
+    for migration in load_migrations():
+        mark = '✅' if migration.VERSION in applied else '⏳'
+        print(f"{mark} {migration.VERSION:04d} {migration.DESCRIPTION}")
+
+def upgrade(engine):
+    """Aplicar as migrações pendentes"""
+    versions = run_migrations(engine)
+    if versions:
+        print(f"✅ Migrações aplicadas: {', '.join(f'{version:04d}' for version in versions)}")
+    else:
+        print("✅ Banco de dados já está atualizado")
+
+def main():
+    parser = argparse.ArgumentParser(description='Migrações do banco de dados - Patas do Bem')
+    parser.add_argument('command', choices=['status', 'upgrade'])
+    parser.add_argument('--database-url', default=get_database_url(),
+                        help='URL do banco (padrão: DATABASE_URL ou src/database/app.db)')
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    try:
+        if args.command == 'status':
+            show_status(engine)
+        else:
+            upgrade(engine)
+    finally:
+        engine.dispose()
+
+if __name__ == '__main__':
+    main()
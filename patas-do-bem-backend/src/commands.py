@@ -0,0 +1,81 @@
+"""
+CLI Commands
+Comandos de manutenção executados com `flask --app src.main <comando>`
+"""
+
+import os
+import click
+from flask import current_app
+
+from src.models.user import db
+from src.migrations import run_migrations
+from src.services.raffle_stats import reconcile_raffle_counters
+from src.services.reservation_service import reservation_service
+from src.services.raffle_changes import prune_ticket_changes
+from src.services.revenue_rollup import rebuild_revenue_rollups
+from src.middleware.compression import precompress_static
+
+def register_commands(app):
+    """Registrar comandos de manutenção no CLI do Flask"""
+
+    @app.cli.command('db-upgrade')
+    def db_upgrade():
+        """Aplicar as migrações pendentes do banco de dados"""
+        versions = run_migrations(db.engine)
+        if versions:
+            click.echo(f"Migrações aplicadas: {', '.join(f'{version:04d}' for version in versions)}")
+        else:
+            click.echo('Banco de dados já está atualizado')
+
+    @app.cli.command('reconcile-raffles')
+    @click.option('--fix', is_flag=True, help='Gravar os contadores recalculados')
+    def reconcile_raffles(fix):
+        """Recalcular contadores das rifas a partir dos tickets"""
+        drift = reconcile_raffle_counters(fix=fix)
+
+        if not drift:
+            click.echo('Contadores das rifas consistentes com os tickets')
+            return
+
+        for item in drift:
+            click.echo(
+                f"Rifa {item['raffle_id']}: "
+                f"vendidos {item['current']['sold']} -> {item['expected']['sold']}, "
+                f"reservados {item['current']['pending']} -> {item['expected']['pending']}, "
+                f"receita {item['current']['revenue']:.2f} -> {item['expected']['revenue']:.2f}"
+            )
+
+        status = 'corrigida(s)' if fix else 'com divergência (use --fix para corrigir)'
+        click.echo(f'{len(drift)} rifa(s) {status}')
+
+    @app.cli.command('release-expired-reservations')
+    @click.option('--batch-size', default=500, show_default=True, help='Reservas liberadas por lote')
+    def release_expired_reservations(batch_size):
+        """Liberar reservas de números vencidas (alternativa ao sweeper em thread)"""
+        released = reservation_service.release_expired(batch_size=batch_size)
+        click.echo(f'{released} reserva(s) vencida(s) liberada(s)')
+
+    @app.cli.command('prune-ticket-changes')
+    @click.option('--keep-versions', type=int, default=None,
+                  help='Versões mantidas por rifa (padrão: RAFFLE_CHANGE_LOG_VERSIONS)')
+    def prune_ticket_changes_command(keep_versions):
+        """Remover mudanças antigas do log de sincronização dos números"""
+        removed = prune_ticket_changes(keep_versions)
+        click.echo(f'{removed} mudança(s) removida(s) do log')
+
+    @app.cli.command('backfill-rollups')
+    def backfill_rollups():
+        """Recalcular os totais diários de receita a partir do histórico"""
+        try:
+            counts = rebuild_revenue_rollups(db.session)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        click.echo(f"{counts['donations']} linha(s) de totais de doações, {counts['tickets']} de rifas")
+
+    @app.cli.command('precompress-static')
+    def precompress_static_command():
+        """Gerar as versões .gz/.br dos assets do frontend"""
+        created = precompress_static(os.path.join(current_app.static_folder, 'assets'))
+        click.echo(f'{created} arquivo(s) comprimido(s) gerado(s)')
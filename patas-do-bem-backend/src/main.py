@@ -20,13 +20,31 @@ from src.routes.dashboard import dashboard_bp
 from src.routes.reports import reports_bp
 from src.routes.auth import auth_bp
 from src.routes.upload import upload_bp
+from src.migrations import run_migrations, pending_migrations
+from src.services.database_config import get_database_url, get_engine_options, get_sqlite_profile, configure_sqlite
+from src.services.reservation_service import start_reservation_sweeper
+from src.commands import register_commands
+from src.middleware.compression import compress_response, precompress_static, send_precompressed
+from src.middleware.json_provider import FastJSONProvider
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config["SEND_FILE_MAX_AGE_DEFAULT"] = 0
 
+# JSON com orjson (Decimal, datetime e date nativos), compacto e em UTF-8
+# (sem escapes \uXXXX) já na serialização, também em debug
+app.json = FastJSONProvider(app)
+app.json.compact = True
+app.json.ensure_ascii = False
+
+# Assets do build do frontend (nomes com hash): cache imutável e versões .gz/.br
+ASSETS_DIR = 'assets'
+
 # Configurar CORS para permitir requisições do frontend
 CORS(app, origins="*")
 
+# Compressão brotli/gzip das respostas dinâmicas
+app.after_request(compress_response())
+
 # Registrar blueprints
 app.register_blueprint(user_bp, url_prefix='/api')
 app.register_blueprint(donation_bp, url_prefix='/api')
@@ -39,12 +57,28 @@ app.register_blueprint(auth_bp, url_prefix='/api')
 app.register_blueprint(upload_bp, url_prefix='/api')
 app.register_blueprint(payment_bp)
 
-# uncomment if you need to use database
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+# Banco de dados (DATABASE_URL; padrão SQLite em src/database/app.db)
+app.config['SQLALCHEMY_DATABASE_URI'] = get_database_url()
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = get_engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db.init_app(app)
 with app.app_context():
-    db.create_all()
+    # PRAGMAs do SQLite (SQLITE_PROFILE=wal para instalações em um único servidor)
+    configure_sqlite(db.engine, get_sqlite_profile())
+    
+    # Migrações aplicadas no deploy (`python migrate.py upgrade` ou `flask db-upgrade`);
+    # AUTO_MIGRATE=true só com um único processo, pois workers disputariam o DDL
+    if os.getenv('AUTO_MIGRATE', 'false').lower() == 'true':
+        run_migrations(db.engine)
+    elif pending_migrations(db.engine):
+        app.logger.warning("Há migrações pendentes: execute `python migrate.py upgrade`")
+
+register_commands(app)
+
+# Assets pré-comprimidos uma vez no deploy com `flask precompress-static`;
+# PRECOMPRESS_STATIC=true comprime ao iniciar, só com um único processo
+if os.getenv('PRECOMPRESS_STATIC', 'false').lower() == 'true':
+    precompress_static(os.path.join(app.static_folder, ASSETS_DIR))
 
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
@@ -54,6 +88,8 @@ def serve(path):
             return "Static folder not configured", 404
 
     if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
+        if path.startswith(ASSETS_DIR + '/'):
+            return send_precompressed(static_folder_path, path)
         return send_from_directory(static_folder_path, path)
     else:
         index_path = os.path.join(static_folder_path, 'index.html')
@@ -64,4 +100,7 @@ def serve(path):
 
 
 if __name__ == '__main__':
+    # Só no servidor: workers, comandos `flask` e migrações não iniciam a thread.
+    # Com gunicorn/WSGI, agendar `flask release-expired-reservations` (cron)
+    start_reservation_sweeper(app)
     app.run(host='0.0.0.0', port=5000, debug=False) #mudar depois para debug=False
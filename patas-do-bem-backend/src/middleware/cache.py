@@ -1,113 +1,180 @@
 from functools import wraps
-from flask import request, jsonify, current_app
-import json
-import hashlib
+from flask import request, current_app, make_response
+import threading
 import time
-from datetime import datetime, timedelta
-
-# Cache simples em memória
-_cache = {}
-_cache_timestamps = {}
-
-def clear_expired_cache():
-    """Remove entradas expiradas do cache"""
-    current_time = time.time()
-    expired_keys = [
-        key for key, timestamp in _cache_timestamps.items()
-        if current_time - timestamp > 300  # 5 minutos
-    ]
-    
-    for key in expired_keys:
-        _cache.pop(key, None)
-        _cache_timestamps.pop(key, None)
+from collections import defaultdict
+from src.services.cache_backend import get_cache_backend, invalidate_cache_tags
+
+# Acertos e falhas por endpoint (contadores deste processo)
+_hit_counts = defaultdict(lambda: {'hits': 0, 'misses': 0})
+_hit_counts_lock = threading.Lock()
+
+def record_cache_access(endpoint, hit):
+    """Contabilizar um acerto ou falha do cache"""
+    with _hit_counts_lock:
+        _hit_counts[endpoint]['hits' if hit else 'misses'] += 1
+
+def hit_ratio(hits, misses):
+    """Fração de acertos (None sem acessos)"""
+    total = hits + misses
+    return round(hits / total, 4) if total else None
 
 def generate_cache_key(prefix, *args, **kwargs):
-    """Gera uma chave única para o cache"""
-    # Inclui argumentos da função e parâmetros da requisição
-    key_data = {
-        'prefix': prefix,
-        'args': args,
-        'kwargs': kwargs,
-        'query_string': request.query_string.decode('utf-8'),
-        'method': request.method
-    }
-    
-    key_string = json.dumps(key_data, sort_keys=True)
-    return hashlib.md5(key_string.encode()).hexdigest()
+    """
+    Gera a chave do cache: prefixo, método, caminho e query string ordenada
+
+    A chave é legível (ex.: get_raffle:GET:/api/raffles/42?format=ranges)
+    para que invalidate_cache_pattern possa localizar as entradas por rota.
+    """
+    query = '&'.join(
+        f'{name}={value}'
+        for name, values in sorted(request.args.lists())
+        for value in values
+    )
+    return f'{prefix}:{request.method}:{request.path}?{query}'
+
+# Recomputações em andamento neste processo: chave -> Event sinalizado ao terminar
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+def _claim_refresh(cache_key):
+    """
+    Tornar esta requisição a responsável por recomputar a chave
 
-def cache_response(timeout=300):
+    Returns:
+        (True, event) se deve recomputar; (False, event) se outra requisição
+        já está recomputando (event é sinalizado quando ela terminar)
+    """
+    with _inflight_lock:
+        event = _inflight.get(cache_key)
+        if event is not None:
+            return False, event
+        event = _inflight[cache_key] = threading.Event()
+        return True, event
+
+def _release_refresh(cache_key, event):
+    """Encerrar a recomputação e liberar as requisições em espera"""
+    with _inflight_lock:
+        _inflight.pop(cache_key, None)
+    event.set()
+
+# Cabeçalhos da resposta guardados junto com o corpo
+CACHED_HEADERS = ('ETag', 'Last-Modified', 'Cache-Control')
+
+def _cached_response(cached):
+    response = current_app.response_class(cached['body'], status=cached['status'], mimetype=cached['mimetype'])
+    response.headers.extend(cached.get('headers', {}))
+    return _conditional(response)
+
+def _conditional(response):
+    """Responder 304 quando o cliente já tem a versão atual (If-None-Match/If-Modified-Since)"""
+    if 'ETag' in response.headers or 'Last-Modified' in response.headers:
+        return response.make_conditional(request)
+    return response
+
+def cache_response(timeout=300, tags=None, stale_ttl=0, wait_timeout=30):
     """
     Decorator para cache de respostas
-    
+
+    Quando a entrada falta ou venceu, só uma requisição por processo
+    recomputa (single-flight): as concorrentes esperam por ela e usam o
+    resultado, ou, dentro da janela stale_ttl, recebem na hora a resposta
+    anterior (stale-while-revalidate).
+
     Args:
         timeout (int): Tempo em segundos para expirar o cache (padrão: 5 minutos)
+        tags (list): Tags para invalidação (ex.: ['raffles', 'raffle:{raffle_id}']);
+            os campos entre chaves são preenchidos com os argumentos da rota
+        stale_ttl (int): Segundos após o timeout em que a resposta vencida
+            ainda pode ser servida enquanto outra requisição a recomputa
+        wait_timeout (int): Máximo de segundos esperando a recomputação de
+            outra requisição antes de recomputar também
     """
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            # Limpar cache expirado periodicamente
-            clear_expired_cache()
-            
-            # Gerar chave do cache
+            backend = get_cache_backend()
             cache_key = generate_cache_key(f.__name__, *args, **kwargs)
-            current_time = time.time()
-            
-            # Verificar se existe no cache e não expirou
-            if cache_key in _cache:
-                cache_time = _cache_timestamps.get(cache_key, 0)
-                if current_time - cache_time < timeout:
-                    current_app.logger.info(f"Cache HIT para {f.__name__}")
-                    return _cache[cache_key]
-            
-            # Executar função e armazenar resultado
-            current_app.logger.info(f"Cache MISS para {f.__name__}")
-            result = f(*args, **kwargs)
-            
-            # Armazenar no cache apenas se for uma resposta de sucesso
-            if isinstance(result, tuple):
-                response, status_code = result
-                if status_code == 200:
-                    _cache[cache_key] = result
-                    _cache_timestamps[cache_key] = current_time
-            else:
-                _cache[cache_key] = result
-                _cache_timestamps[cache_key] = current_time
-            
-            return result
-        
+
+            cached = backend.get(cache_key)
+            if cached is not None and cached['fresh_until'] > time.time():
+                record_cache_access(f.__name__, True)
+                current_app.logger.debug(f"Cache HIT para {f.__name__}")
+                return _cached_response(cached)
+
+            is_leader, event = _claim_refresh(cache_key)
+            if not is_leader:
+                if cached is not None:
+                    # Vencida, mas outra requisição já está recomputando
+                    record_cache_access(f.__name__, True)
+                    current_app.logger.debug(f"Cache STALE para {f.__name__}")
+                    return _cached_response(cached)
+
+                event.wait(wait_timeout)
+                cached = backend.get(cache_key)
+                if cached is not None:
+                    record_cache_access(f.__name__, True)
+                    return _cached_response(cached)
+                # A outra requisição falhou (ou demorou demais): recomputar aqui
+
+            record_cache_access(f.__name__, False)
+            current_app.logger.debug(f"Cache MISS para {f.__name__}")
+            try:
+                response = make_response(f(*args, **kwargs))
+
+                # Armazenar no cache apenas respostas de sucesso
+                if response.status_code == 200 and not response.is_streamed:
+                    entry_tags = [tag.format(**kwargs) for tag in (tags or [])]
+                    backend.set(cache_key, {
+                        'body': response.get_data(),
+                        'status': response.status_code,
+                        'mimetype': response.mimetype,
+                        'headers': {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers},
+                        'fresh_until': time.time() + timeout
+                    }, timeout + stale_ttl, entry_tags)
+            finally:
+                if is_leader:
+                    _release_refresh(cache_key, event)
+
+            return _conditional(response)
+
         return decorated_function
     return decorator
 
-def cache_database_query(timeout=600):
+def cache_database_query(timeout=600, tags=None):
     """
     Cache específico para consultas de banco de dados
     Timeout padrão maior (10 minutos) pois dados mudam menos frequentemente
     """
-    return cache_response(timeout)
+    return cache_response(timeout, tags)
 
 def invalidate_cache_pattern(pattern):
-    """Remove todas as entradas do cache que contenham o padrão"""
-    keys_to_remove = [key for key in _cache.keys() if pattern in key]
-    for key in keys_to_remove:
-        _cache.pop(key, None)
-        _cache_timestamps.pop(key, None)
-    
-    current_app.logger.info(f"Invalidated {len(keys_to_remove)} cache entries with pattern: {pattern}")
+    """Remove todas as entradas do cache cuja chave contenha o padrão"""
+    removed = get_cache_backend().invalidate_pattern(pattern)
+    current_app.logger.info(f"Invalidated {removed} cache entries with pattern: {pattern}")
+    return removed
 
 def get_cache_stats():
-    """Retorna estatísticas do cache"""
-    clear_expired_cache()
+    """Retorna estatísticas do cache, com a taxa de acertos geral e por endpoint"""
+    stats = get_cache_backend().stats()
     
-    current_time = time.time()
-    valid_entries = sum(
-        1 for timestamp in _cache_timestamps.values()
-        if current_time - timestamp < 300
-    )
+    with _hit_counts_lock:
+        endpoints = {
+            endpoint: dict(counts, hit_ratio=hit_ratio(counts['hits'], counts['misses']))
+            for endpoint, counts in _hit_counts.items()
+        }
     
-    return {
-        'total_entries': len(_cache),
-        'valid_entries': valid_entries,
-        'memory_usage_kb': len(str(_cache)) / 1024,  # Estimativa aproximada
-        'oldest_entry': min(_cache_timestamps.values()) if _cache_timestamps else None,
-        'newest_entry': max(_cache_timestamps.values()) if _cache_timestamps else None
-    }
\ No newline at end of file
+    hits = sum(counts['hits'] for counts in endpoints.values())
+    misses = sum(counts['misses'] for counts in endpoints.values())
+    stats.update({
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hit_ratio(hits, misses),
+        'endpoints': endpoints
+    })
+    return stats
+
+def reset_cache_stats():
+    """Zerar os contadores de acertos e falhas"""
+    with _hit_counts_lock:
+        _hit_counts.clear()
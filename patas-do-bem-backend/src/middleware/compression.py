@@ -1,34 +1,116 @@
-from flask import request, current_app
+from flask import request, current_app, send_from_directory
+from werkzeug.security import safe_join
 import gzip
-import json
-from io import BytesIO
+import mimetypes
+import os
+import zlib
+import logging
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional (pip install brotli); sem ele só gzip
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Respostas menores que isso não compensam a compressão
+MIN_COMPRESS_SIZE = 1000
+
+COMPRESSIBLE_TYPES = [
+    'text/',
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml'
+]
+
+# Níveis para respostas dinâmicas (velocidade) e arquivos estáticos
+# comprimidos uma única vez (tamanho)
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+STATIC_GZIP_LEVEL = 9
+STATIC_BROTLI_QUALITY = 11
+
+# Streams em que cada mensagem precisa chegar na hora (SSE) não são comprimidos
+UNBUFFERED_TYPES = ['text/event-stream']
+
+# Extensão dos arquivos pré-comprimidos por codificação
+PRECOMPRESSED_SUFFIXES = {
+    'br': '.br',
+    'gzip': '.gz'
+}
+
+# Assets com hash no nome (gerados pelo build do frontend) nunca mudam
+IMMUTABLE_MAX_AGE = 31536000
+
+def available_encodings():
+    """Codificações suportadas, na ordem de preferência"""
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+def is_compressible(content_type):
+    """Tipo de conteúdo que se beneficia de compressão"""
+    return any(ct in (content_type or '') for ct in COMPRESSIBLE_TYPES)
+
+def compress_data(data, encoding, static=False):
+    """Comprime dados com gzip ou brotli"""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    
+    if encoding == 'br':
+        return brotli.compress(data, quality=STATIC_BROTLI_QUALITY if static else BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=STATIC_GZIP_LEVEL if static else GZIP_LEVEL, mtime=0)
+
+def compress_stream(chunks, encoding):
+    """
+    Comprimir um corpo gerado em partes, sem juntá-lo em memória
+
+    Cada parte passa pelo compressor incremental (zlib/brotli) e só os bytes
+    já produzidos são repassados, então a memória fica limitada à janela do
+    compressor e o envio começa antes de o gerador terminar.
+    """
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        process, finish = compressor.process, compressor.finish
+    else:
+        # wbits=31: formato gzip (cabeçalho e CRC) em vez de zlib puro
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        process, finish = compressor.compress, compressor.flush
+    
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = process(chunk)
+            if data:
+                yield data
+        yield finish()
+    finally:
+        # Repassar o fechamento ao gerador original (libera cursores e contextos)
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
 
 def compress_response():
-    """Middleware para compressão gzip de respostas"""
+    """Middleware (after_request) para compressão brotli/gzip de respostas"""
     
     def should_compress(response):
         """Determina se a resposta deve ser comprimida"""
-        # Verificar se o cliente aceita gzip
-        accept_encoding = request.headers.get('Accept-Encoding', '')
-        if 'gzip' not in accept_encoding.lower():
+        # Sem corpo (204, 304...) ou enviada direto do arquivo
+        if response.status_code < 200 or response.status_code in (204, 304):
+            return False
+        if response.direct_passthrough:
             return False
         
         # Verificar tamanho mínimo
         content_length = response.content_length
-        if content_length and content_length < 1000:  # Menos de 1KB
+        if content_length is not None and content_length < MIN_COMPRESS_SIZE:
             return False
         
         # Verificar tipo de conteúdo
-        content_type = response.headers.get('Content-Type', '')
-        compressible_types = [
-            'text/',
-            'application/json',
-            'application/javascript',
-            'application/xml',
-            'image/svg+xml'
-        ]
-        
-        if not any(ct in content_type for ct in compressible_types):
+        content_type = response.headers.get('Content-Type')
+        if not is_compressible(content_type):
+            return False
+        if response.is_streamed and any(ct in content_type for ct in UNBUFFERED_TYPES):
             return False
         
         # Não comprimir se já estiver comprimido
@@ -37,65 +119,110 @@ def compress_response():
         
         return True
     
-    def compress_data(data):
-        """Comprime dados usando gzip"""
-        if isinstance(data, str):
-            data = data.encode('utf-8')
+    def middleware(response):
+        if not should_compress(response):
+            return response
         
-        buffer = BytesIO()
-        with gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=6) as f:
-            f.write(data)
+        # A resposta depende do Accept-Encoding mesmo quando não é comprimida
+        response.vary.add('Accept-Encoding')
         
-        return buffer.getvalue()
-    
-    def middleware(response):
-        if should_compress(response):
-            try:
-                # Comprimir dados
-                compressed_data = compress_data(response.get_data())
-                
-                # Atualizar resposta
-                response.set_data(compressed_data)
-                response.headers['Content-Encoding'] = 'gzip'
-                response.headers['Content-Length'] = len(compressed_data)
-                
-                # Adicionar header Vary
-                vary = response.headers.get('Vary')
-                if vary:
-                    if 'Accept-Encoding' not in vary:
-                        response.headers['Vary'] = vary + ', Accept-Encoding'
-                else:
-                    response.headers['Vary'] = 'Accept-Encoding'
-                
-                current_app.logger.debug(f"Response compressed with gzip")
-                
-            except Exception as e:
-                current_app.logger.error(f"Error compressing response: {e}")
+        encoding = request.accept_encodings.best_match(available_encodings())
+        if encoding is None:
+            return response
+        
+        try:
+            if response.is_streamed:
+                # Gerador: comprimir parte a parte, tamanho final desconhecido
+                response.response = compress_stream(response.response, encoding)
+                response.headers.pop('Content-Length', None)
+            else:
+                response.set_data(compress_data(response.get_data(), encoding))
+            response.headers['Content-Encoding'] = encoding
+            
+            # O corpo mudou: ETag forte deixa de valer, vira fraco
+            etag, is_weak = response.get_etag()
+            if etag and not is_weak:
+                response.set_etag(etag, weak=True)
+            
+            current_app.logger.debug(f"Response compressed with {encoding}")
+            
+        except Exception as e:
+            current_app.logger.error(f"Error compressing response: {e}")
         
         return response
     
     return middleware
 
-def optimize_json_response():
-    """Otimiza respostas JSON removendo espaços desnecessários"""
+def precompress_static(directory):
+    """
+    Gerar arquivos .gz (e .br, com brotli instalado) ao lado dos arquivos
+    comprimíveis do diretório, para serem enviados sem compressão por requisição
+
+    Arquivos já comprimidos e mais novos que o original são mantidos.
+
+    Returns:
+        Quantidade de arquivos comprimidos gerados
+    """
+    if not os.path.isdir(directory):
+        return 0
     
-    def middleware(response):
-        content_type = response.headers.get('Content-Type', '')
-        
-        if 'application/json' in content_type:
-            try:
-                # Parsear JSON e recriar sem espaços extras
-                data = response.get_json()
-                if data is not None:
-                    compact_json = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
-                    response.set_data(compact_json)
-                    response.headers['Content-Length'] = len(compact_json.encode('utf-8'))
-                    
-                    current_app.logger.debug("JSON response optimized")
-                    
-            except Exception as e:
-                current_app.logger.error(f"Error optimizing JSON response: {e}")
-        
-        return response
+    suffixes = tuple(PRECOMPRESSED_SUFFIXES.values())
+    created = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            path = os.path.join(root, name)
+            if name.endswith(suffixes) or not is_compressible(mimetypes.guess_type(name)[0]):
+                continue
+            if os.path.getsize(path) < MIN_COMPRESS_SIZE:
+                continue
+            
+            data = None
+            for encoding in available_encodings():
+                target = path + PRECOMPRESSED_SUFFIXES[encoding]
+                if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(path):
+                    continue
+                if data is None:
+                    with open(path, 'rb') as f:
+                        data = f.read()
+                
+                # Escrever em arquivo temporário e renomear: nunca servir um .gz pela metade
+                tmp_path = f'{target}.{os.getpid()}.tmp'
+                with open(tmp_path, 'wb') as f:
+                    f.write(compress_data(data, encoding, static=True))
+                os.replace(tmp_path, target)
+                created += 1
+    
+    if created:
+        logger.info(f"{created} arquivo(s) estático(s) pré-comprimido(s) em {directory}")
+    return created
+
+def send_precompressed(directory, path, max_age=IMMUTABLE_MAX_AGE):
+    """
+    Enviar um asset com hash no nome, usando a versão pré-comprimida
+    aceita pelo cliente, e cache imutável
+
+    O arquivo é enviado por send_from_directory (wsgi.file_wrapper), sem
+    passar pelo middleware de compressão.
+    """
+    encoding = None
+    encodings = [
+        candidate for candidate in PRECOMPRESSED_SUFFIXES
+        if os.path.exists(safe_join(directory, path + PRECOMPRESSED_SUFFIXES[candidate]) or '')
+    ]
+    if encodings:
+        encoding = request.accept_encodings.best_match(encodings)
+    
+    if encoding:
+        response = send_from_directory(
+            directory, path + PRECOMPRESSED_SUFFIXES[encoding],
+            mimetype=mimetypes.guess_type(path)[0] or 'application/octet-stream', max_age=max_age
+        )
+        response.headers['Content-Encoding'] = encoding
+    else:
+        response = send_from_directory(directory, path, max_age=max_age)
     
-    return middleware
\ No newline at end of file
+    if encodings:
+        response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
@@ -0,0 +1,74 @@
+"""
+JSON Provider
+Serialização JSON das respostas com orjson (quando instalado) e suporte
+nativo a Decimal, datetime e date, para os to_dict() dos modelos devolverem
+os valores das colunas sem conversões
+"""
+
+import json
+from datetime import date
+from decimal import Decimal
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional; sem ele usa o json da biblioteca padrão
+    orjson = None
+
+def _default(obj):
+    """Conversão dos tipos que o json da biblioteca padrão não serializa"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, date):  # também datetime
+        return obj.isoformat()
+    return DefaultJSONProvider.default(obj)
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Provider JSON do Flask com orjson e fallback para a biblioteca padrão
+
+    Decimal vira número e datetime/date viram ISO 8601 nos dois caminhos.
+    As opções compact, sort_keys e ensure_ascii do DefaultJSONProvider
+    continuam valendo (o orjson sempre gera UTF-8, como ensure_ascii=False).
+    """
+
+    default = staticmethod(_default)
+
+    def _orjson_options(self, indent=False):
+        # Chaves não-string (ex.: meses e IDs) como no json padrão
+        options = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def _use_orjson(self):
+        # ensure_ascii=True exige escapes \uXXXX, que o orjson não gera
+        return orjson is not None and not self.ensure_ascii
+
+    def dumps(self, obj, **kwargs):
+        if self._use_orjson() and not kwargs:
+            return orjson.dumps(obj, default=_default, option=self._orjson_options()).decode('utf-8')
+        kwargs.setdefault('default', self.default)
+        kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        if self.compact and 'indent' not in kwargs:
+            # Mesma saída compacta do orjson
+            kwargs.setdefault('separators', (',', ':'))
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        if not self._use_orjson():
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        # Bytes direto para a resposta, sem passar por str
+        body = orjson.dumps(obj, default=_default, option=self._orjson_options(indent)) + b'\n'
+        return self._app.response_class(body, mimetype=self.mimetype)
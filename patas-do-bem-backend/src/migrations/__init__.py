@@ -0,0 +1,138 @@
+"""
+Schema Migrations
+Migrações versionadas do banco de dados, registradas na tabela schema_version
+
+Cada migração é um módulo vNNNN_<descricao>.py neste pacote com:
+    VERSION: número inteiro crescente
+    DESCRIPTION: descrição curta
+    TRANSACTIONAL: (opcional, padrão True) False para DDL que não pode rodar
+        dentro de transação, como CREATE INDEX CONCURRENTLY no Postgres;
+        essas migrações precisam ser idempotentes
+    upgrade(connection): aplica a migração
+
+As migrações devem ser aditivas (tabelas, colunas e índices novos), para
+poderem ser aplicadas com a aplicação no ar.
+"""
+
+import importlib
+import pkgutil
+from datetime import datetime
+from typing import List
+from sqlalchemy import MetaData, Table, Column, Integer, String, DateTime, inspect, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.schema import CreateColumn, CreateIndex
+import logging
+
+from src.models.user import db
+# Registrar todas as tabelas em db.metadata, também fora da aplicação
+from src.models import admin, contact, donation, raffle  # noqa: F401
+
+logger = logging.getLogger(__name__)
+
+_version_metadata = MetaData()
+
+schema_version = Table(
+    'schema_version', _version_metadata,
+    Column('version', Integer, primary_key=True),
+    Column('description', String(200)),
+    Column('applied_at', DateTime)
+)
+
+def load_migrations() -> List:
+    """Módulos de migração ordenados por versão"""
+    migrations = []
+    for module_info in pkgutil.iter_modules(__path__):
+        if module_info.name.startswith('v'):
+            migrations.append(importlib.import_module(f'{__name__}.{module_info.name}'))
+
+    migrations.sort(key=lambda migration: migration.VERSION)
+    versions = [migration.VERSION for migration in migrations]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError(f'Versões de migração duplicadas: {versions}')
+    return migrations
+
+def applied_versions(engine) -> set:
+    """Versões já aplicadas no banco"""
+    if not inspect(engine).has_table('schema_version'):
+        return set()
+    with engine.connect() as connection:
+        return {row[0] for row in connection.execute(select(schema_version.c.version))}
+
+def current_version(engine) -> int:
+    """Maior versão aplicada (0 para banco sem migrações)"""
+    return max(applied_versions(engine), default=0)
+
+def pending_migrations(engine) -> List:
+    """Migrações ainda não aplicadas"""
+    applied = applied_versions(engine)
+    return [migration for migration in load_migrations() if migration.VERSION not in applied]
+
+def run_migrations(engine) -> List[int]:
+    """
+    Aplicar as migrações pendentes, em ordem
+
+    Returns:
+        Versões aplicadas nesta execução
+    """
+    pending = pending_migrations(engine)
+    if not pending:
+        return []
+
+    _version_metadata.create_all(engine, checkfirst=True)
+    applied = []
+
+    for migration in pending:
+        logger.info(f"Aplicando migração {migration.VERSION}: {migration.DESCRIPTION}")
+        record = schema_version.insert().values(
+            version=migration.VERSION,
+            description=migration.DESCRIPTION,
+            applied_at=datetime.utcnow()
+        )
+
+        try:
+            if getattr(migration, 'TRANSACTIONAL', True):
+                with engine.begin() as connection:
+                    migration.upgrade(connection)
+                    connection.execute(record)
+            else:
+                with engine.connect() as connection:
+                    migration.upgrade(connection.execution_options(isolation_level='AUTOCOMMIT'))
+                with engine.begin() as connection:
+                    connection.execute(record)
+        except IntegrityError:
+            # Outro processo aplicou a mesma versão ao mesmo tempo
+            logger.info(f"Migração {migration.VERSION} já aplicada por outro processo")
+            continue
+
+        applied.append(migration.VERSION)
+
+    return applied
+
+# Operações usadas pelas migrações (idempotentes)
+
+def create_tables(connection, *table_names):
+    """Criar as tabelas dos modelos que ainda não existem"""
+    tables = [db.metadata.tables[name] for name in table_names]
+    db.metadata.create_all(connection, tables=tables, checkfirst=True)
+
+def add_column(connection, table_name, column_name):
+    """Adicionar uma coluna declarada no modelo, se ainda não existir"""
+    existing = {column['name'] for column in inspect(connection).get_columns(table_name)}
+    if column_name in existing:
+        return
+
+    column = db.metadata.tables[table_name].columns[column_name]
+    column_ddl = CreateColumn(column).compile(dialect=connection.dialect)
+    quoted_table = connection.dialect.identifier_preparer.quote(table_name)
+    connection.execute(text(f'ALTER TABLE {quoted_table} ADD COLUMN {column_ddl}'))
+
+def create_index(connection, table_name, index_name):
+    """Criar um índice declarado no modelo, se ainda não existir"""
+    index = next(index for index in db.metadata.tables[table_name].indexes if index.name == index_name)
+    ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=connection.dialect))
+
+    if connection.dialect.name == 'postgresql' and connection.get_isolation_level() == 'AUTOCOMMIT':
+        # Sem bloquear escritas na tabela durante a criação
+        ddl = ddl.replace('CREATE INDEX', 'CREATE INDEX CONCURRENTLY', 1)
+
+    connection.execute(text(ddl))
@@ -0,0 +1,9 @@
+"""Schema inicial (bancos criados com db.create_all() já o possuem)"""
+
+from src.migrations import create_tables
+
+VERSION = 1
+DESCRIPTION = 'Schema inicial'
+
+def upgrade(connection):
+    create_tables(connection, 'user', 'admins', 'donations', 'raffles', 'raffle_tickets', 'contact_messages')
@@ -0,0 +1,25 @@
+"""Contadores de vendidos, reservados e receita na tabela de rifas"""
+
+from sqlalchemy import text
+
+from src.migrations import add_column
+
+VERSION = 2
+DESCRIPTION = 'Contadores de vendas nas rifas'
+
+def upgrade(connection):
+    add_column(connection, 'raffles', 'sold_count')
+    add_column(connection, 'raffles', 'reserved_count')
+    add_column(connection, 'raffles', 'revenue')
+
+    # Preencher os contadores a partir dos tickets existentes
+    connection.execute(text("""
+        UPDATE raffles SET
+            sold_count = (SELECT COUNT(*) FROM raffle_tickets
+                          WHERE raffle_tickets.raffle_id = raffles.id
+                            AND raffle_tickets.payment_status = 'completed'),
+            reserved_count = (SELECT COUNT(*) FROM raffle_tickets
+                              WHERE raffle_tickets.raffle_id = raffles.id
+                                AND raffle_tickets.payment_status = 'pending')
+    """))
+    connection.execute(text("UPDATE raffles SET revenue = sold_count * ticket_price"))
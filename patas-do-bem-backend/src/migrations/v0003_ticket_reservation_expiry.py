@@ -0,0 +1,10 @@
+"""Prazo de expiração das reservas de números"""
+
+from src.migrations import add_column, create_index
+
+VERSION = 3
+DESCRIPTION = 'Expiração das reservas de números'
+
+def upgrade(connection):
+    add_column(connection, 'raffle_tickets', 'reserved_until')
+    create_index(connection, 'raffle_tickets', 'ix_raffle_tickets_status_reserved_until')
@@ -0,0 +1,23 @@
+"""Índices compostos para as consultas das rotas"""
+
+from src.migrations import create_index
+
+VERSION = 4
+DESCRIPTION = 'Índices das consultas das rotas'
+
+# Fora de transação: no Postgres os índices são criados com CONCURRENTLY
+TRANSACTIONAL = False
+
+INDEXES = [
+    ('raffles', 'ix_raffles_status_created_at'),
+    ('raffle_tickets', 'ix_raffle_tickets_raffle_status'),
+    ('donations', 'ix_donations_status_created_at'),
+    ('donations', 'ix_donations_type_status'),
+    ('donations', 'ix_donations_payment_id'),
+    ('donations', 'ix_donations_donor_email'),
+    ('contact_messages', 'ix_contact_messages_status_created_at'),
+]
+
+def upgrade(connection):
+    for table_name, index_name in INDEXES:
+        create_index(connection, table_name, index_name)
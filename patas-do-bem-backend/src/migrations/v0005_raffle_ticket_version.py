@@ -0,0 +1,9 @@
+"""Versão dos números da rifa, usada nas requisições condicionais (ETag)"""
+
+from src.migrations import add_column
+
+VERSION = 5
+DESCRIPTION = 'Versão dos números das rifas'
+
+def upgrade(connection):
+    add_column(connection, 'raffles', 'ticket_version')
@@ -0,0 +1,15 @@
+"""Log de mudanças dos números das rifas (sincronização incremental)"""
+
+from sqlalchemy import text
+
+from src.migrations import add_column, create_tables
+
+VERSION = 6
+DESCRIPTION = 'Log de mudanças dos números das rifas'
+
+def upgrade(connection):
+    create_tables(connection, 'raffle_ticket_changes')
+    add_column(connection, 'raffles', 'ticket_log_start')
+
+    # Mudanças anteriores a esta migração não estão no log
+    connection.execute(text("UPDATE raffles SET ticket_log_start = ticket_version"))
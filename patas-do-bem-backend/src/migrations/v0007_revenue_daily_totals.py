@@ -0,0 +1,11 @@
+"""Totais diários de doações e de números vendidos, com o histórico recalculado"""
+
+from src.migrations import create_tables
+from src.services.revenue_rollup import rebuild_revenue_rollups
+
+VERSION = 7
+DESCRIPTION = 'Totais diários de receita'
+
+def upgrade(connection):
+    create_tables(connection, 'donation_daily_totals', 'raffle_ticket_daily_totals')
+    rebuild_revenue_rollups(connection)
@@ -0,0 +1,18 @@
+"""Índices (created_at, id) da paginação por cursor"""
+
+from src.migrations import create_index
+
+VERSION = 8
+DESCRIPTION = 'Índices da paginação por cursor'
+
+# Fora de transação: no Postgres os índices são criados com CONCURRENTLY
+TRANSACTIONAL = False
+
+INDEXES = [
+    ('donations', 'ix_donations_created_at_id'),
+    ('contact_messages', 'ix_contact_messages_created_at_id'),
+]
+
+def upgrade(connection):
+    for table_name, index_name in INDEXES:
+        create_index(connection, table_name, index_name)
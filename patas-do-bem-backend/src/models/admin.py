@@ -37,8 +37,8 @@ class Admin(db.Model):
             'email': self.email,
             'is_active': self.is_active,
             'role': self.role,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'last_login': self.last_login.isoformat() if self.last_login else None
+            'created_at': self.created_at,
+            'last_login': self.last_login
         }
     
     def __repr__(self):
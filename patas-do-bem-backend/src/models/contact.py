@@ -12,6 +12,13 @@ class ContactMessage(db.Model):
     message = db.Column(db.Text, nullable=False)
     status = db.Column(db.String(20), default='new')  # 'new', 'read', 'replied'
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        # Mensagens por status (não lidas) em ordem de data
+        db.Index('ix_contact_messages_status_created_at', 'status', 'created_at'),
+        # Paginação por cursor (created_at, id) sem filtro de status
+        db.Index('ix_contact_messages_created_at_id', 'created_at', 'id'),
+    )
 
     def __repr__(self):
         return f'<ContactMessage {self.id}: {self.name} - {self.subject}>'
@@ -25,6 +32,6 @@ class ContactMessage(db.Model):
             'subject': self.subject,
             'message': self.message,
             'status': self.status,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at
         }
 
@@ -16,6 +16,19 @@ class Donation(db.Model):
     subscription_id = db.Column(db.String(100))  # Para doações recorrentes
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        # Doações por status em ordem/intervalo de data (listagens, relatórios)
+        db.Index('ix_donations_status_created_at', 'payment_status', 'created_at'),
+        # Paginação por cursor (created_at, id) sem filtro de status
+        db.Index('ix_donations_created_at_id', 'created_at', 'id'),
+        # Totais por tipo (recorrentes) e status
+        db.Index('ix_donations_type_status', 'donation_type', 'payment_status'),
+        # Webhooks e consulta de status pelo ID do gateway
+        db.Index('ix_donations_payment_id', 'payment_id'),
+        # Doadores únicos e top doadores
+        db.Index('ix_donations_donor_email', 'donor_email'),
+    )
 
     def __repr__(self):
         return f'<Donation {self.id}: {self.donor_name} - R${self.amount}>'
@@ -26,13 +39,32 @@ class Donation(db.Model):
             'donor_name': self.donor_name,
             'donor_email': self.donor_email,
             'donor_phone': self.donor_phone,
-            'amount': float(self.amount),
+            'amount': self.amount,
             'donation_type': self.donation_type,
             'payment_method': self.payment_method,
             'payment_status': self.payment_status,
             'payment_id': self.payment_id,
             'subscription_id': self.subscription_id,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
         }
 
+
+class DonationDailyTotal(db.Model):
+    """Totais diários de doações, mantidos por services/revenue_rollup.py"""
+    __tablename__ = 'donation_daily_totals'
+    
+    day = db.Column(db.Date, primary_key=True)
+    donation_type = db.Column(db.String(20), primary_key=True)
+    payment_method = db.Column(db.String(20), primary_key=True)
+    payment_status = db.Column(db.String(20), primary_key=True)
+    donation_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    amount = db.Column(db.Numeric(12, 2), nullable=False, default=0, server_default='0')
+    
+    __table_args__ = (
+        # Totais por status em um intervalo de dias (dashboard e relatórios)
+        db.Index('ix_donation_daily_totals_status_day', 'payment_status', 'day'),
+    )
+
+    def __repr__(self):
+        return f'<DonationDailyTotal {self.day} {self.donation_type}/{self.payment_method}/{self.payment_status}>'
@@ -16,12 +16,25 @@ class Raffle(db.Model):
     winner_name = db.Column(db.String(100))
     winner_email = db.Column(db.String(100))
     drawn_at = db.Column(db.DateTime)
+    # Contadores mantidos pelas rotas de tickets (ver services/raffle_stats.py)
+    sold_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    reserved_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    revenue = db.Column(db.Numeric(12, 2), nullable=False, default=0, server_default='0')
+    # Incrementada a cada mudança de disponibilidade dos números (ETag)
+    ticket_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Versão a partir da qual raffle_ticket_changes tem todas as mudanças (delta sync)
+    ticket_log_start = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     created_by = db.Column(db.Integer, db.ForeignKey('user.id'))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relacionamento com tickets
     tickets = db.relationship('RaffleTicket', backref='raffle', lazy=True, cascade='all, delete-orphan')
+    
+    __table_args__ = (
+        # Listagem de rifas por status ordenada por data
+        db.Index('ix_raffles_status_created_at', 'status', 'created_at'),
+    )
 
     def __repr__(self):
         return f'<Raffle {self.id}: {self.title}>'
@@ -32,17 +45,20 @@ class Raffle(db.Model):
             'title': self.title,
             'description': self.description,
             'image_url': self.image_url,
-            'ticket_price': float(self.ticket_price),
+            'ticket_price': self.ticket_price,
             'total_numbers': self.total_numbers,
-            'draw_date': self.draw_date.isoformat() if self.draw_date else None,
+            'draw_date': self.draw_date,
             'status': self.status,
             'winner_number': self.winner_number,
             'winner_name': self.winner_name,
             'winner_email': self.winner_email,
-            'drawn_at': self.drawn_at.isoformat() if self.drawn_at else None,
+            'drawn_at': self.drawn_at,
+            'sold_count': self.sold_count or 0,
+            'reserved_count': self.reserved_count or 0,
+            'revenue': self.revenue or 0,
             'created_by': self.created_by,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
         }
 
 class RaffleTicket(db.Model):
@@ -57,9 +73,16 @@ class RaffleTicket(db.Model):
     payment_status = db.Column(db.String(20), default='pending')
     payment_id = db.Column(db.String(100))
     purchased_at = db.Column(db.DateTime)
+    reserved_until = db.Column(db.DateTime)  # Expiração da reserva pendente (None = sem expiração)
     
-    # Constraint para garantir que cada número seja único por rifa
-    __table_args__ = (db.UniqueConstraint('raffle_id', 'ticket_number', name='unique_raffle_ticket'),)
+    __table_args__ = (
+        # Constraint para garantir que cada número seja único por rifa
+        db.UniqueConstraint('raffle_id', 'ticket_number', name='unique_raffle_ticket'),
+        # Tickets de uma rifa por status (vendidos, reservados)
+        db.Index('ix_raffle_tickets_raffle_status', 'raffle_id', 'payment_status'),
+        # Busca de reservas vencidas pelo sweeper
+        db.Index('ix_raffle_tickets_status_reserved_until', 'payment_status', 'reserved_until'),
+    )
 
     def __repr__(self):
         return f'<RaffleTicket {self.id}: Rifa {self.raffle_id} - Número {self.ticket_number}>'
@@ -74,6 +97,35 @@ class RaffleTicket(db.Model):
             'buyer_phone': self.buyer_phone,
             'payment_status': self.payment_status,
             'payment_id': self.payment_id,
-            'purchased_at': self.purchased_at.isoformat() if self.purchased_at else None
+            'purchased_at': self.purchased_at,
+            'reserved_until': self.reserved_until
         }
 
+class RaffleTicketChange(db.Model):
+    """Mudança de estado de um número, na versão (ticket_version) em que ocorreu"""
+    __tablename__ = 'raffle_ticket_changes'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    raffle_id = db.Column(db.Integer, db.ForeignKey('raffles.id', ondelete='CASCADE'), nullable=False)
+    version = db.Column(db.Integer, nullable=False)
+    ticket_number = db.Column(db.Integer, nullable=False)
+    state = db.Column(db.String(10), nullable=False)  # 'available', 'reserved', 'sold'
+    
+    __table_args__ = (
+        # Mudanças de uma rifa após um cursor de versão
+        db.Index('ix_raffle_ticket_changes_raffle_version', 'raffle_id', 'version'),
+    )
+
+    def __repr__(self):
+        return f'<RaffleTicketChange {self.raffle_id}#{self.ticket_number} v{self.version}: {self.state}>'
+
+class RaffleTicketDailyTotal(db.Model):
+    """Números vendidos e receita por dia da compra, mantidos por services/revenue_rollup.py"""
+    __tablename__ = 'raffle_ticket_daily_totals'
+    
+    day = db.Column(db.Date, primary_key=True)
+    tickets_sold = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    revenue = db.Column(db.Numeric(12, 2), nullable=False, default=0, server_default='0')
+
+    def __repr__(self):
+        return f'<RaffleTicketDailyTotal {self.day}: {self.tickets_sold}>'
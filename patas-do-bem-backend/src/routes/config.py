@@ -3,10 +3,12 @@ from src.models.user import db
 from src.models.donation import Donation
 from src.models.raffle import Raffle, RaffleTicket
 from src.models.contact import ContactMessage
+from src.middleware.cache import cache_response
 
 config_bp = Blueprint('config', __name__)
 
 @config_bp.route('/config', methods=['GET'])
+@cache_response(timeout=3600)
 def get_public_config():
     """Configurações públicas do site"""
     try:
@@ -57,7 +59,11 @@ def get_public_config():
             }
         }
         
-        return jsonify(config)
+        # Conteúdo estático: ETag do próprio corpo, para respostas 304
+        response = jsonify(config)
+        response.add_etag()
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
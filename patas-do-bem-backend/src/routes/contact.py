@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
 from src.models.user import db
 from src.models.contact import ContactMessage
+from src.middleware.cache import invalidate_cache_tags
+from src.services.keyset_pagination import keyset_page, page_limit
 
 contact_bp = Blueprint('contact', __name__)
 
@@ -27,6 +29,7 @@ def send_contact_message():
         
         db.session.add(message)
         db.session.commit()
+        invalidate_cache_tags('contact')
         
         return jsonify({'message': 'Mensagem enviada com sucesso'}), 201
         
@@ -36,10 +39,10 @@ def send_contact_message():
 
 @contact_bp.route('/contact/messages', methods=['GET'])
 def list_contact_messages():
-    """Listar mensagens de contato (Admin)"""
+    """Listar mensagens de contato (Admin), paginadas por cursor"""
     try:
-        page = request.args.get('page', 1, type=int)
-        limit = request.args.get('limit', 20, type=int)
+        cursor = request.args.get('cursor')
+        limit = page_limit(request.args.get('limit', type=int))
         status = request.args.get('status', 'all')
         
         query = ContactMessage.query
@@ -47,21 +50,19 @@ def list_contact_messages():
         if status != 'all':
             query = query.filter(ContactMessage.status == status)
         
-        messages = query.order_by(ContactMessage.created_at.desc()).paginate(
-            page=page, per_page=limit, error_out=False
-        )
+        messages, next_cursor = keyset_page(query, ContactMessage, cursor, limit)
         
         # Contar mensagens não lidas
         unread_count = ContactMessage.query.filter(ContactMessage.status == 'new').count()
         
         return jsonify({
-            'messages': [message.to_dict() for message in messages.items],
-            'total': messages.total,
-            'pages': messages.pages,
-            'current_page': page,
+            'messages': [message.to_dict() for message in messages],
+            'next_cursor': next_cursor,
             'unread_count': unread_count
         })
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -75,6 +76,7 @@ def update_message_status(message_id):
         if 'status' in data:
             message.status = data['status']
             db.session.commit()
+            invalidate_cache_tags('contact')
         
         return jsonify({'message': 'Status atualizado', 'contact_message': message.to_dict()})
         
@@ -4,6 +4,8 @@ from src.models.user import db
 from src.models.donation import Donation
 from src.services.payment_factory import get_payment_gateway
 from src.services.payment_gateway import PaymentMethod
+from src.middleware.cache import cache_response, invalidate_cache_tags
+from src.services.keyset_pagination import keyset_page, page_limit
 
 donation_bp = Blueprint('donation', __name__)
 
@@ -111,10 +113,14 @@ def create_donation():
 
 @donation_bp.route('/donations', methods=['GET'])
 def list_donations():
-    """Listar doações (área administrativa)"""
+    """
+    Listar doações (área administrativa)
+
+    Paginação por cursor: a próxima página é pedida com ?cursor=<next_cursor>
+    """
     try:
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', request.args.get('limit', 20), type=int)
+        cursor = request.args.get('cursor')
+        limit = page_limit(request.args.get('per_page', type=int) or request.args.get('limit', type=int))
         status = request.args.get('status', 'all')
         donation_type = request.args.get('type', 'all')
         
@@ -126,21 +132,20 @@ def list_donations():
         if donation_type != 'all':
             query = query.filter(Donation.donation_type == donation_type)
         
-        donations = query.order_by(Donation.created_at.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+        donations, next_cursor = keyset_page(query, Donation, cursor, limit)
         
         return jsonify({
-            'donations': [donation.to_dict() for donation in donations.items],
-            'total': donations.total,
-            'pages': donations.pages,
-            'current_page': page
+            'donations': [donation.to_dict() for donation in donations],
+            'next_cursor': next_cursor
         })
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @donation_bp.route('/donations/stats', methods=['GET'])
+@cache_response(timeout=300, tags=['donations'])
 def donation_stats():
     """Estatísticas de doações"""
     try:
@@ -183,6 +188,7 @@ def confirm_payment(donation_id):
         
         data = request.get_json()
         payment_status = data.get('status', 'completed')
+        previous_status = donation.payment_status
         
         donation.payment_status = payment_status
         donation.payment_id = data.get('payment_id', f'PAY{donation_id:06d}')
@@ -192,6 +198,9 @@ def confirm_payment(donation_id):
             donation.subscription_id = data.get('subscription_id', f'SUB{donation_id:06d}')
         
         db.session.commit()
+        # Respostas públicas (stats/history) só incluem doações completed
+        if 'completed' in (previous_status, payment_status):
+            invalidate_cache_tags('donations')
         
         return jsonify({'message': 'Pagamento confirmado', 'donation': donation.to_dict()})
         
@@ -200,21 +209,20 @@ def confirm_payment(donation_id):
         return jsonify({'error': str(e)}), 500
 
 @donation_bp.route('/donations/history', methods=['GET'])
+@cache_response(timeout=120, tags=['donations'])
 def donation_history():
-    """Histórico público de doações (anonimizado)"""
+    """Histórico público de doações (anonimizado), paginado por cursor"""
     try:
-        page = request.args.get('page', 1, type=int)
-        limit = request.args.get('limit', 10, type=int)
+        cursor = request.args.get('cursor')
+        limit = page_limit(request.args.get('limit', 10, type=int))
         
-        donations = Donation.query.filter(
-            Donation.payment_status == 'completed'
-        ).order_by(Donation.created_at.desc()).paginate(
-            page=page, per_page=limit, error_out=False
+        donations, next_cursor = keyset_page(
+            Donation.query.filter(Donation.payment_status == 'completed'), Donation, cursor, limit
         )
         
         # Anonimizar dados para exibição pública
         history = []
-        for donation in donations.items:
+        for donation in donations:
             history.append({
                 'amount': float(donation.amount),
                 'donation_type': donation.donation_type,
@@ -224,11 +232,11 @@ def donation_history():
         
         return jsonify({
             'donations': history,
-            'total': donations.total,
-            'pages': donations.pages,
-            'current_page': page
+            'next_cursor': next_cursor
         })
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -3,6 +3,7 @@ from src.services.payment_service import payment_service
 from src.models.donation import Donation
 from src.models.raffle import RaffleTicket
 from src.models.user import db
+from src.middleware.cache import invalidate_cache_tags
 import uuid
 
 payment_bp = Blueprint('payment', __name__)
@@ -105,6 +106,8 @@ def create_credit_card_payment():
                 )
                 db.session.add(donation)
                 db.session.commit()
+                # Cartão pode ser aprovado na hora: a doação já entra nos totais
+                invalidate_cache_tags('donations')
             
             return jsonify({
                 'success': True,
@@ -160,6 +163,7 @@ def create_recurring_payment():
             )
             db.session.add(donation)
             db.session.commit()
+            invalidate_cache_tags('donations')
             
             return jsonify({
                 'success': True,
@@ -247,8 +251,11 @@ def get_payment_status(payment_id):
             # Atualizar status no banco de dados
             donation = Donation.query.filter_by(payment_id=payment_id).first()
             if donation:
+                previous_status = donation.payment_status
                 donation.payment_status = status_result['status']
                 db.session.commit()
+                if 'completed' in (previous_status, donation.payment_status):
+                    invalidate_cache_tags('donations')
             
             return jsonify({
                 'success': True,
@@ -277,8 +284,11 @@ def mercadopago_webhook():
             if payment_id:
                 donation = Donation.query.filter_by(payment_id=str(payment_id)).first()
                 if donation:
+                    previous_status = donation.payment_status
                     donation.payment_status = result['status']
                     db.session.commit()
+                    if 'completed' in (previous_status, donation.payment_status):
+                        invalidate_cache_tags('donations')
         
         return jsonify({'success': True}), 200
         
@@ -1,12 +1,53 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, current_app
 from datetime import datetime
 from src.models.user import db
 from src.models.raffle import Raffle, RaffleTicket
 from src.services.auth_service import token_required, admin_required
+from src.services.raffle_availability import availability_index, FREE, RESERVED, SOLD
+from src.services.raffle_stats import apply_ticket_transitions, ticket_versions
+from src.services.raffle_changes import get_changes_since
+from src.services.reservation_service import reservation_service, MAX_RANDOM_TICKETS, HOLDING_STATUSES
+from src.services.raffle_events import raffle_events, format_sse, HEARTBEAT_SECONDS
+from src.middleware.cache import cache_response, invalidate_cache_tags
 
 raffle_bp = Blueprint('raffle', __name__)
 
+def raffle_etag(raffle, availability, with_expiration=False):
+    """
+    ETag da rifa a partir da versão dos números e da data de edição
+
+    Não consulta os tickets: a versão é a do índice de disponibilidade de
+    onde sai o corpo da resposta (availability.version), que muda a cada
+    reserva, venda ou liberação de número, e updated_at muda a cada edição
+    da rifa. Reservas que vencem com o tempo não mudam nenhuma das duas;
+    com with_expiration (respostas que separam os números reservados), o
+    prazo da próxima reserva também entra na ETag.
+    """
+    updated_at = raffle.updated_at.timestamp() if raffle.updated_at else 0
+    etag = f'raffle-{raffle.id}-{availability.version}-{updated_at:.0f}'
+    if with_expiration:
+        next_expiration = availability.next_expiration()
+        if next_expiration is not None:
+            etag += f'-{next_expiration.timestamp() * 1000000:.0f}'
+    return etag
+
+def not_modified(etag):
+    """Resposta 304 se o cliente já tem a versão etag (If-None-Match), senão None"""
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    return None
+
+def with_etag(response, etag):
+    """Adicionar ETag (fraco, pois o corpo pode ser comprimido) e exigir revalidação"""
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
 @raffle_bp.route('/raffles', methods=['GET'])
+@cache_response(timeout=60, tags=['raffles'])
 def list_raffles():
     """Listar rifas ativas (público)"""
     try:
@@ -15,11 +56,8 @@ def list_raffles():
         raffles_data = []
         for raffle in raffles:
             raffle_dict = raffle.to_dict()
-            # Adicionar contagem de números vendidos
-            sold_count = RaffleTicket.query.filter(
-                RaffleTicket.raffle_id == raffle.id,
-                RaffleTicket.payment_status == 'completed'
-            ).count()
+            # Contagem de números vendidos mantida na própria rifa
+            sold_count = raffle.sold_count
             raffle_dict['sold_numbers'] = sold_count
             raffle_dict['available_numbers'] = raffle.total_numbers - sold_count
             raffles_data.append(raffle_dict)
@@ -30,6 +68,7 @@ def list_raffles():
         return jsonify({'error': str(e)}), 500
 
 @raffle_bp.route('/raffles/<int:raffle_id>', methods=['GET'])
+@cache_response(timeout=30, tags=['raffle:{raffle_id}'])
 def get_raffle(raffle_id):
     """Detalhes de uma rifa específica"""
     try:
@@ -37,20 +76,23 @@ def get_raffle(raffle_id):
         if not raffle:
             return jsonify({'error': 'Rifa não encontrada'}), 404
         
-        # Números vendidos
-        sold_tickets = RaffleTicket.query.filter(
-            RaffleTicket.raffle_id == raffle_id,
-            RaffleTicket.payment_status == 'completed'
-        ).all()
-        
-        sold_numbers = [ticket.ticket_number for ticket in sold_tickets]
-        available_numbers = [i for i in range(1, raffle.total_numbers + 1) if i not in sold_numbers]
+        # Cliente com a versão atual: 304 sem montar as listas de números
+        availability = availability_index.get(raffle)
+        etag = raffle_etag(raffle, availability)
+        unchanged = not_modified(etag)
+        if unchanged:
+            return unchanged
         
         raffle_data = raffle.to_dict()
-        raffle_data['sold_numbers'] = sold_numbers
-        raffle_data['available_numbers'] = available_numbers
+        if request.args.get('format') == 'ranges':
+            # Intervalos [início, fim] em vez de listas completas
+            raffle_data['sold_ranges'] = availability.ranges(SOLD)
+            raffle_data['available_ranges'] = availability.ranges(FREE, RESERVED)
+        else:
+            raffle_data['sold_numbers'] = availability.numbers(SOLD)
+            raffle_data['available_numbers'] = availability.numbers(FREE, RESERVED)
         
-        return jsonify({'raffle': raffle_data})
+        return with_etag(jsonify({'raffle': raffle_data}), etag)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -82,6 +124,7 @@ def create_raffle():
         
         db.session.add(raffle)
         db.session.commit()
+        invalidate_cache_tags('raffles')
         
         return jsonify({'message': 'Rifa criada com sucesso', 'raffle': raffle.to_dict()}), 201
         
@@ -109,6 +152,7 @@ def update_raffle(raffle_id):
         
         raffle.updated_at = datetime.utcnow()
         db.session.commit()
+        invalidate_cache_tags('raffles', f'raffle:{raffle_id}')
         
         return jsonify({'message': 'Rifa atualizada com sucesso', 'raffle': raffle.to_dict()})
         
@@ -136,6 +180,7 @@ def cancel_raffle(raffle_id):
         raffle.status = 'cancelled'
         raffle.updated_at = datetime.utcnow()
         db.session.commit()
+        invalidate_cache_tags('raffles', f'raffle:{raffle_id}')
         
         return jsonify({'message': 'Rifa cancelada com sucesso'})
         
@@ -183,8 +228,14 @@ def buy_raffle_tickets(raffle_id):
         if raffle.status != 'active':
             return jsonify({'error': 'Rifa não está ativa'}), 400
         
+        # Números escolhidos ou sorteados, nunca os dois
+        if 'quantity' in data and 'selected_numbers' in data:
+            return jsonify({'error': 'Envie selected_numbers ou quantity, não ambos'}), 400
+        
         # Validar dados obrigatórios
-        required_fields = ['buyer_name', 'buyer_email', 'selected_numbers', 'payment_method']
+        required_fields = ['buyer_name', 'buyer_email', 'payment_method']
+        if 'quantity' not in data:
+            required_fields.insert(2, 'selected_numbers')
         for field in required_fields:
             if field not in data or not data[field]:
                 return jsonify({'error': f'Campo {field} é obrigatório'}), 400
@@ -195,64 +246,77 @@ def buy_raffle_tickets(raffle_id):
         if not re.match(email_pattern, data['buyer_email']):
             return jsonify({'error': 'Formato de email inválido'}), 400
         
-        ticket_numbers = data['selected_numbers']
-        
-        # Validar se é uma lista
-        if not isinstance(ticket_numbers, list):
-            return jsonify({'error': 'selected_numbers deve ser uma lista'}), 400
-        
-        # Validar se há números
-        if len(ticket_numbers) == 0:
-            return jsonify({'error': 'Deve selecionar pelo menos um número'}), 400
-        
-        # Validar números duplicados
-        if len(ticket_numbers) != len(set(ticket_numbers)):
-            return jsonify({'error': 'Números duplicados não são permitidos'}), 400
-        
-        # Verificar se os números estão disponíveis
-        existing_tickets = RaffleTicket.query.filter(
-            RaffleTicket.raffle_id == raffle_id,
-            RaffleTicket.ticket_number.in_(ticket_numbers)
-        ).all()
-        
-        if existing_tickets:
-            unavailable = [t.ticket_number for t in existing_tickets]
-            return jsonify({'error': f'Números já reservados: {unavailable}'}), 400
-        
-        # Criar tickets
-        tickets = []
-        for number in ticket_numbers:
-            if number < 1 or number > raffle.total_numbers:
-                return jsonify({'error': f'Número {number} inválido'}), 400
+        buyer = {
+            'buyer_name': data['buyer_name'],
+            'buyer_email': data['buyer_email'],
+            'buyer_phone': data.get('buyer_phone')
+        }
+        allow_partial = bool(data.get('allow_partial'))
+        
+        if 'quantity' in data:
+            # Números sorteados pelo servidor
+            quantity = data['quantity']
+            # bool é subclasse de int: true não vale como quantidade 1
+            if (not isinstance(quantity, int) or isinstance(quantity, bool)
+                    or quantity < 1 or quantity > MAX_RANDOM_TICKETS):
+                return jsonify({'error': f'quantity deve ser um inteiro entre 1 e {MAX_RANDOM_TICKETS}'}), 400
+            
+            reservation = reservation_service.reserve_random(raffle, quantity, buyer, allow_partial=allow_partial)
+            
+            if not reservation['won']:
+                return jsonify({
+                    'error': f'Não há {quantity} números disponíveis',
+                    'unavailable_numbers': reservation['lost']
+                }), 400
+        else:
+            ticket_numbers = data['selected_numbers']
+            
+            # Validar se é uma lista
+            if not isinstance(ticket_numbers, list):
+                return jsonify({'error': 'selected_numbers deve ser uma lista'}), 400
+            
+            # Validar se há números
+            if len(ticket_numbers) == 0:
+                return jsonify({'error': 'Deve selecionar pelo menos um número'}), 400
+            
+            # Validar números duplicados
+            if len(ticket_numbers) != len(set(ticket_numbers)):
+                return jsonify({'error': 'Números duplicados não são permitidos'}), 400
+            
+            # Validar intervalo dos números
+            for number in ticket_numbers:
+                if not isinstance(number, int) or number < 1 or number > raffle.total_numbers:
+                    return jsonify({'error': f'Número {number} inválido'}), 400
             
-            ticket = RaffleTicket(
-                raffle_id=raffle_id,
-                ticket_number=number,
-                buyer_name=data['buyer_name'],
-                buyer_email=data['buyer_email'],
-                buyer_phone=data.get('buyer_phone'),
-                payment_status='pending'
-            )
-            tickets.append(ticket)
-            db.session.add(ticket)
+            # Reserva atômica: números já ocupados ficam de fora
+            reservation = reservation_service.reserve(raffle_id, ticket_numbers, buyer, allow_partial=allow_partial)
+            
+            if not reservation['won']:
+                return jsonify({
+                    'error': f"Números já reservados: {reservation['lost']}",
+                    'unavailable_numbers': reservation['lost']
+                }), 400
         
-        db.session.commit()
+        ticket_numbers = reservation['won']
+        purchase_ticket_id = min(reservation['ticket_ids'])
         
         # Calcular total
         total_amount = len(ticket_numbers) * raffle.ticket_price
         
         # Simular dados de pagamento
         payment_data = {
-            'purchase_id': f'RAFFLE{raffle_id}_{tickets[0].id}',
+            'purchase_id': f'RAFFLE{raffle_id}_{purchase_ticket_id}',
             'raffle_id': raffle_id,
             'ticket_numbers': ticket_numbers,
+            'unavailable_numbers': reservation['lost'],
             'total_amount': float(total_amount),
             'payment_method': data['payment_method'],
-            'status': 'pending'
+            'status': 'pending',
+            'reserved_until': reservation['reserved_until'].isoformat()
         }
         
         if data['payment_method'] == 'pix':
-            payment_data['pix_code'] = f'RIFAPIX{raffle_id}{tickets[0].id}'
+            payment_data['pix_code'] = f'RIFAPIX{raffle_id}{purchase_ticket_id}'
             payment_data['qr_code'] = f'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=='
         
         return jsonify(payment_data), 201
@@ -261,26 +325,77 @@ def buy_raffle_tickets(raffle_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def payment_conflict(ticket, payment_status, payment_id, buyer_email, now):
+    """
+    Se o pagamento não pode ser aplicado ao ticket
+
+    Só reservas pendentes e dentro do prazo podem ser vendidas: números
+    liberados podem ter sido reivindicados por outro comprador, e reservas
+    vencidas podem ser a qualquer momento. Os demais status (falha,
+    estorno) valem para qualquer número ainda ocupado. Com buyer_email, o
+    ticket também precisa ser desse comprador. A repetição de uma
+    confirmação já aplicada (mesmo status e payment_id) é aceita.
+    """
+    if buyer_email and ticket.buyer_email != buyer_email:
+        return True
+    if ticket.payment_status == payment_status and payment_id and ticket.payment_id == payment_id:
+        return False
+    if payment_status != 'completed':
+        return ticket.payment_status not in HOLDING_STATUSES
+    if ticket.payment_status != 'pending':
+        return True
+    return ticket.reserved_until is not None and ticket.reserved_until <= now
+
 @raffle_bp.route('/raffles/<int:raffle_id>/tickets/confirm', methods=['POST'])
 def confirm_ticket_payment(raffle_id):
-    """Confirmar pagamento de números da rifa"""
+    """
+    Confirmar pagamento de números da rifa
+
+    Números sem reserva válida (inexistente, vencida, liberada ou de outro
+    comprador, se buyer_email for enviado) recusam a confirmação inteira
+    com 400 e a lista em unavailable_numbers, para estorno do pagamento.
+    """
     try:
         data = request.get_json()
         ticket_numbers = data.get('ticket_numbers', [])
         payment_status = data.get('status', 'completed')
+        payment_id = data.get('payment_id')
         
         tickets = RaffleTicket.query.filter(
             RaffleTicket.raffle_id == raffle_id,
             RaffleTicket.ticket_number.in_(ticket_numbers)
         ).all()
         
-        for ticket in tickets:
+        now = datetime.utcnow()
+        found = {t.ticket_number: t for t in tickets}
+        rejected = sorted(
+            number for number in set(ticket_numbers)
+            if number not in found
+            or payment_conflict(found[number], payment_status, payment_id, data.get('buyer_email'), now)
+        )
+        if rejected:
+            return jsonify({
+                'error': f'Números sem reserva válida para este pagamento: {rejected}',
+                'unavailable_numbers': rejected
+            }), 400
+        
+        # Confirmações repetidas não alteram de novo os tickets já confirmados
+        changed = [t for t in tickets if t.payment_status != payment_status]
+        apply_ticket_transitions(raffle_id, [(t.payment_status, payment_status) for t in changed],
+                                 [t.ticket_number for t in changed])
+        
+        for ticket in changed:
             ticket.payment_status = payment_status
-            ticket.payment_id = data.get('payment_id', f'RIFAPAY{ticket.id}')
+            ticket.payment_id = payment_id or f'RIFAPAY{ticket.id}'
             if payment_status == 'completed':
-                ticket.purchased_at = datetime.utcnow()
+                ticket.purchased_at = now
+                ticket.reserved_until = None
         
+        version = ticket_versions([raffle_id]).get(raffle_id)
         db.session.commit()
+        availability_index.mark(raffle_id, [t.ticket_number for t in changed], payment_status, version=version)
+        raffle_events.publish(raffle_id, [t.ticket_number for t in changed], payment_status)
+        invalidate_cache_tags('raffles', f'raffle:{raffle_id}')
         
         return jsonify({'message': 'Pagamento confirmado', 'tickets': [t.to_dict() for t in tickets]})
         
@@ -290,37 +405,110 @@ def confirm_ticket_payment(raffle_id):
 
 @raffle_bp.route('/raffles/<int:raffle_id>/numbers', methods=['GET'])
 def get_raffle_numbers(raffle_id):
-    """Obter números disponíveis e vendidos da rifa"""
+    """
+    Obter números disponíveis e vendidos da rifa
+
+    Com ?since=<versão>, retorna apenas os números alterados após essa
+    versão (mode 'delta'), ou o estado completo (mode 'snapshot') se o
+    cursor não estiver mais no log. 'version' é o cursor da próxima chamada.
+    """
     try:
         raffle = Raffle.query.get_or_404(raffle_id)
         
-        # Números vendidos (pagamentos confirmados)
-        sold_tickets = RaffleTicket.query.filter(
-            RaffleTicket.raffle_id == raffle_id,
-            RaffleTicket.payment_status == 'completed'
-        ).all()
-        
-        # Números reservados (pagamentos pendentes)
-        reserved_tickets = RaffleTicket.query.filter(
-            RaffleTicket.raffle_id == raffle_id,
-            RaffleTicket.payment_status == 'pending'
-        ).all()
-        
-        sold_numbers = [ticket.ticket_number for ticket in sold_tickets]
-        reserved_numbers = [ticket.ticket_number for ticket in reserved_tickets]
-        all_unavailable = set(sold_numbers + reserved_numbers)
+        # O índice aplica as mudanças de outros processos e libera as
+        # reservas vencidas antes de calcular a versão
+        availability = availability_index.get(raffle)
+        etag = raffle_etag(raffle, availability, with_expiration=True)
+        unchanged = not_modified(etag)
+        if unchanged:
+            return unchanged
+        
+        since = request.args.get('since', type=int)
+        if since is not None:
+            changes = get_changes_since(raffle, since)
+            if changes is not None:
+                return with_etag(jsonify({
+                    'mode': 'delta',
+                    'version': raffle.ticket_version,
+                    'available_numbers': changes['available'],
+                    'sold_numbers': changes['sold'],
+                    'reserved_numbers': changes['reserved'],
+                    'total_numbers': raffle.total_numbers
+                }), etag)
+        
+        if request.args.get('format') == 'ranges':
+            # Intervalos [início, fim] em vez de listas completas
+            data = {
+                'available_ranges': availability.ranges(FREE),
+                'sold_ranges': availability.ranges(SOLD),
+                'reserved_ranges': availability.ranges(RESERVED),
+                'total_numbers': raffle.total_numbers
+            }
+        else:
+            data = {
+                'available_numbers': availability.numbers(FREE),
+                'sold_numbers': availability.numbers(SOLD),
+                'reserved_numbers': availability.numbers(RESERVED),
+                'total_numbers': raffle.total_numbers
+            }
+        
+        data['version'] = availability.version
+        if since is not None:
+            data['mode'] = 'snapshot'
+        return with_etag(jsonify(data), etag)
         
-        available_numbers = [i for i in range(1, raffle.total_numbers + 1) if i not in all_unavailable]
-        
-        return jsonify({
-            'available_numbers': available_numbers,
-            'sold_numbers': sold_numbers,
-            'reserved_numbers': reserved_numbers,
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@raffle_bp.route('/raffles/<int:raffle_id>/events', methods=['GET'])
+def stream_raffle_events(raffle_id):
+    """
+    Stream SSE com as mudanças dos números da rifa
+
+    Envia primeiro um evento 'snapshot' com os intervalos de cada estado e
+    depois 'reserved', 'sold' ou 'released' com os números alterados. Se o
+    cliente não acompanhar, recebe 'resync' e o stream é encerrado (o
+    EventSource reconecta e recebe um novo snapshot).
+    """
+    raffle = Raffle.query.get_or_404(raffle_id)
+    
+    # Inscrever antes do snapshot para não perder mudanças entre os dois
+    subscription = raffle_events.subscribe(raffle_id)
+    if subscription is None:
+        return jsonify({'error': 'Limite de conexões atingido'}), 503
+    
+    try:
+        availability = availability_index.get(raffle)
+        snapshot = {
+            'available_ranges': availability.ranges(FREE),
+            'sold_ranges': availability.ranges(SOLD),
+            'reserved_ranges': availability.ranges(RESERVED),
             'total_numbers': raffle.total_numbers
-        })
-        
+        }
     except Exception as e:
+        raffle_events.unsubscribe(subscription)
         return jsonify({'error': str(e)}), 500
+    
+    def generate():
+        try:
+            yield format_sse('snapshot', snapshot)
+            while True:
+                event = subscription.get(HEARTBEAT_SECONDS)
+                if subscription.overflowed:
+                    yield format_sse('resync', {})
+                    return
+                if event is None:
+                    yield ': keepalive\n\n'
+                else:
+                    yield format_sse(event['type'], {'numbers': event['numbers']})
+        finally:
+            raffle_events.unsubscribe(subscription)
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        # Desativar o buffer do nginx para entregar os eventos na hora
+        'X-Accel-Buffering': 'no'
+    })
 
 @raffle_bp.route('/raffles/<int:raffle_id>/draw', methods=['POST'])
 @token_required
@@ -356,6 +544,7 @@ def draw_raffle(raffle_id):
         raffle.updated_at = datetime.utcnow()
         
         db.session.commit()
+        invalidate_cache_tags('raffles', f'raffle:{raffle_id}')
         
         return jsonify({
             'message': 'Sorteio realizado com sucesso',
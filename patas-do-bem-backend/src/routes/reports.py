@@ -1,82 +1,229 @@
-from flask import Blueprint, request, jsonify, send_file
-from datetime import datetime, timedelta
-from sqlalchemy import func, extract
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from datetime import date, datetime, timedelta
+from sqlalchemy import func, select, extract, case
 from src.models.user import db
-from src.models.donation import Donation
-from src.models.raffle import Raffle, RaffleTicket
+from src.models.donation import Donation, DonationDailyTotal
+from src.models.raffle import Raffle, RaffleTicket, RaffleTicketDailyTotal
 from src.models.contact import ContactMessage
 from src.services.auth_service import token_required, admin_required
+from src.services.donation_analytics import load_donation_columns, donation_breakdowns
+from src.services.keyset_pagination import keyset_page, page_limit
+from src.middleware.cache import cache_response
+from src.middleware.compression import compress_stream
 import csv
 import io
-import json
 from collections import defaultdict
 
 reports_bp = Blueprint('reports', __name__)
 
+def month_bounds(year, month):
+    """Início do mês e início do mês seguinte"""
+    start = datetime(year, month, 1)
+    end = datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+    return start, end
+
+def monthly_totals(date_column, amount_column, *filters):
+    """
+    Somas por mês em uma única consulta (GROUP BY ano, mês)
+
+    extract() vira strftime no SQLite e EXTRACT no Postgres; os filtros por
+    intervalo de datas continuam usando os índices da coluna.
+
+    Returns:
+        Dict 'AAAA-MM' -> soma (float), só com os meses que têm registros
+    """
+    year = extract('year', date_column)
+    month = extract('month', date_column)
+    rows = db.session.query(year, month, func.sum(amount_column)).filter(*filters).group_by(year, month).all()
+    return {f"{int(y)}-{int(m):02d}": float(total or 0) for y, m, total in rows}
+
+def parse_report_bound(value):
+    """Limite de período: date para 'AAAA-MM-DD', datetime quando tem hora"""
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        return datetime.fromisoformat(value)
+
+def rollup_breakdowns(*filters):
+    """
+    Resumo e agrupamentos por mês e por tipo a partir dos totais diários
+
+    Mesmo formato de donation_breakdowns (services/donation_analytics.py).
+    """
+    year = extract('year', DonationDailyTotal.day)
+    month = extract('month', DonationDailyTotal.day)
+    totals = db.session.query(
+        year, month, DonationDailyTotal.donation_type,
+        func.sum(DonationDailyTotal.donation_count), func.sum(DonationDailyTotal.amount)
+    ).filter(*filters).group_by(year, month, DonationDailyTotal.donation_type).all()
+    
+    monthly_data = defaultdict(lambda: {'count': 0, 'amount': 0})
+    type_data = defaultdict(lambda: {'count': 0, 'amount': 0})
+    for row_year, row_month, row_type, count, amount in totals:
+        if not count:
+            continue  # Linhas zeradas por cancelamentos
+        month_key = f"{int(row_year)}-{int(row_month):02d}"
+        for data in (monthly_data[month_key], type_data[row_type]):
+            data['count'] += int(count)
+            data['amount'] += float(amount or 0)
+    
+    total_count = sum(data['count'] for data in type_data.values())
+    total_amount = sum(data['amount'] for data in type_data.values())
+    return {
+        'summary': {
+            'total_count': total_count,
+            'total_amount': total_amount,
+            'average_donation': total_amount / total_count if total_count > 0 else 0
+        },
+        'monthly_breakdown': dict(monthly_data),
+        'type_breakdown': dict(type_data)
+    }
+
+def donation_report_filters():
+    """
+    Filtros de start_date, end_date, type e status da requisição
+
+    Datas AAAA-MM-DD filtram por dia (ambos inclusive); com hora, o filtro
+    é exato e não se alinha aos totais diários.
+
+    Returns:
+        (filtros sobre Donation, filtros sobre DonationDailyTotal, se algum
+        limite tem hora)
+    """
+    start_date = parse_report_bound(request.args['start_date']) if request.args.get('start_date') else None
+    end_date = parse_report_bound(request.args['end_date']) if request.args.get('end_date') else None
+    donation_type = request.args.get('type', 'all')
+    status = request.args.get('status', 'completed')
+    
+    filters = []
+    totals_filters = []
+    
+    if isinstance(start_date, datetime):
+        filters.append(Donation.created_at >= start_date)
+    elif start_date:
+        filters.append(Donation.created_at >= datetime.combine(start_date, datetime.min.time()))
+        totals_filters.append(DonationDailyTotal.day >= start_date)
+    if isinstance(end_date, datetime):
+        filters.append(Donation.created_at <= end_date)
+    elif end_date:
+        filters.append(Donation.created_at < datetime.combine(end_date + timedelta(days=1), datetime.min.time()))
+        totals_filters.append(DonationDailyTotal.day <= end_date)
+    if donation_type != 'all':
+        filters.append(Donation.donation_type == donation_type)
+        totals_filters.append(DonationDailyTotal.donation_type == donation_type)
+    if status != 'all':
+        filters.append(Donation.payment_status == status)
+        totals_filters.append(DonationDailyTotal.payment_status == status)
+    
+    exact = isinstance(start_date, datetime) or isinstance(end_date, datetime)
+    return filters, totals_filters, exact
+
+# Exportações CSV: linhas lidas em lotes e enviadas em blocos deste tamanho
+EXPORT_BATCH_SIZE = 1000
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+def iter_csv(header, rows):
+    """Gerar o CSV em blocos de até EXPORT_CHUNK_SIZE caracteres"""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(header)
+    for row in rows:
+        writer.writerow(row)
+        if output.tell() >= EXPORT_CHUNK_SIZE:
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate()
+    yield output.getvalue()
+
+def csv_export_response(name, header, stmt, format_row):
+    """
+    Resposta CSV em stream de uma consulta, com memória constante
+
+    As linhas são lidas com yield_per (cursor no servidor no Postgres) e
+    escritas à medida que chegam. Com ?gzip=true o arquivo baixado é um
+    .csv.gz comprimido parte a parte; sem ele, o middleware de compressão
+    ainda pode comprimir a transferência (Content-Encoding).
+
+    Args:
+        name: prefixo do nome do arquivo
+        header: cabeçalho do CSV
+        stmt: select das colunas usadas por format_row
+        format_row: converte uma linha do resultado em lista de valores
+    """
+    def generate():
+        result = db.session.execute(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        try:
+            yield from iter_csv(header, map(format_row, result))
+        finally:
+            result.close()
+    
+    filename = f'{name}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+    body = generate()
+    mimetype = 'text/csv'
+    if request.args.get('gzip', 'false').lower() == 'true':
+        body = compress_stream(body, 'gzip')
+        mimetype = 'application/gzip'
+        filename += '.gz'
+    
+    response = Response(stream_with_context(body), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+# Relatórios pesados: uma requisição recomputa por vez (single-flight) e,
+# na janela stale_ttl, as demais recebem a versão anterior enquanto isso
 @reports_bp.route('/reports/dashboard', methods=['GET'])
 @token_required
 @admin_required
+@cache_response(timeout=60, stale_ttl=300, tags=['donations', 'raffles', 'contact'])
 def dashboard_stats():
-    """Estatísticas para o dashboard administrativo"""
+    """
+    Estatísticas para o dashboard administrativo
+
+    Totais de doações e números vendidos lidos das tabelas de totais diários
+    (services/revenue_rollup.py): o período conta em dias inteiros.
+    """
     try:
-        # Período padrão: últimos 30 dias
+        # Período padrão: últimos 30 dias (a partir do início do dia)
         end_date = datetime.utcnow()
-        start_date = end_date - timedelta(days=30)
-        
-        # Doações no período
-        donations_query = Donation.query.filter(
-            Donation.created_at >= start_date,
-            Donation.payment_status == 'completed'
-        )
-        
-        total_donations = donations_query.count()
-        total_amount = db.session.query(func.sum(Donation.amount)).filter(
-            Donation.created_at >= start_date,
-            Donation.payment_status == 'completed'
-        ).scalar() or 0
-        
-        # Doações recorrentes ativas
-        recurring_donations = Donation.query.filter(
-            Donation.donation_type == 'recurring',
-            Donation.payment_status == 'completed'
-        ).count()
-        
-        recurring_amount = db.session.query(func.sum(Donation.amount)).filter(
-            Donation.donation_type == 'recurring',
-            Donation.payment_status == 'completed'
-        ).scalar() or 0
+        start_date = (end_date - timedelta(days=30)).replace(hour=0, minute=0, second=0, microsecond=0)
+        start_day = start_date.date()
+        
+        # Doações no período e recorrentes, em uma consulta sobre os totais diários
+        completed = DonationDailyTotal.payment_status == 'completed'
+        in_period = DonationDailyTotal.day >= start_day
+        is_recurring = DonationDailyTotal.donation_type == 'recurring'
+        total_donations, total_amount, recurring_donations, recurring_amount = db.session.query(
+            func.sum(case((in_period, DonationDailyTotal.donation_count), else_=0)),
+            func.sum(case((in_period, DonationDailyTotal.amount), else_=0)),
+            func.sum(case((is_recurring, DonationDailyTotal.donation_count), else_=0)),
+            func.sum(case((is_recurring, DonationDailyTotal.amount), else_=0))
+        ).filter(completed).one()
         
         # Rifas ativas
         active_raffles = Raffle.query.filter(Raffle.status == 'active').count()
         
-        # Total de números vendidos este mês
-        tickets_sold = RaffleTicket.query.join(Raffle).filter(
-            RaffleTicket.purchased_at >= start_date,
-            RaffleTicket.payment_status == 'completed'
-        ).count()
+        # Total de números vendidos no período
+        tickets_sold = db.session.query(func.sum(RaffleTicketDailyTotal.tickets_sold)).filter(
+            RaffleTicketDailyTotal.day >= start_day
+        ).scalar() or 0
         
         # Mensagens de contato não lidas
         unread_messages = ContactMessage.query.filter(
             ContactMessage.status == 'unread'
         ).count()
         
-        # Doações por dia (últimos 7 dias)
-        daily_donations = []
-        for i in range(7):
-            date = end_date - timedelta(days=i)
-            day_start = date.replace(hour=0, minute=0, second=0, microsecond=0)
-            day_end = day_start + timedelta(days=1)
-            
-            day_amount = db.session.query(func.sum(Donation.amount)).filter(
-                Donation.created_at >= day_start,
-                Donation.created_at < day_end,
-                Donation.payment_status == 'completed'
-            ).scalar() or 0
-            
-            daily_donations.append({
-                'date': day_start.strftime('%Y-%m-%d'),
-                'amount': float(day_amount)
-            })
+        # Doações por dia (últimos 7 dias), em ordem cronológica
+        chart_days = [end_date.date() - timedelta(days=i) for i in range(6, -1, -1)]
+        daily_amounts = dict(db.session.query(
+            DonationDailyTotal.day, func.sum(DonationDailyTotal.amount)
+        ).filter(
+            completed,
+            DonationDailyTotal.day >= chart_days[0]
+        ).group_by(DonationDailyTotal.day).all())
+        daily_donations = [
+            {'date': day.strftime('%Y-%m-%d'), 'amount': float(daily_amounts.get(day) or 0)}
+            for day in chart_days
+        ]
         
         # Doações recentes
         recent_donations = Donation.query.filter(
@@ -89,20 +236,20 @@ def dashboard_stats():
                 'end_date': end_date.isoformat()
             },
             'donations': {
-                'total_count': total_donations,
-                'total_amount': float(total_amount),
-                'recurring_count': recurring_donations,
-                'recurring_monthly': float(recurring_amount)
+                'total_count': int(total_donations or 0),
+                'total_amount': float(total_amount or 0),
+                'recurring_count': int(recurring_donations or 0),
+                'recurring_monthly': float(recurring_amount or 0)
             },
             'raffles': {
                 'active_count': active_raffles,
-                'tickets_sold_month': tickets_sold
+                'tickets_sold_month': int(tickets_sold)
             },
             'contact': {
                 'unread_messages': unread_messages
             },
             'charts': {
-                'daily_donations': daily_donations[::-1]  # Ordem cronológica
+                'daily_donations': daily_donations
             },
             'recent_activity': [donation.to_dict() for donation in recent_donations]
         })
@@ -114,62 +261,56 @@ def dashboard_stats():
 @token_required
 @admin_required
 def donations_report():
-    """Relatório detalhado de doações"""
+    """
+    Resumo do relatório de doações (as doações ficam em /reports/donations/rows)
+
+    Com datas AAAA-MM-DD, o resumo e os agrupamentos vêm dos totais diários;
+    com hora, são calculados sobre as colunas das doações
+    (services/donation_analytics.py).
+    """
     try:
-        # Parâmetros de filtro
-        start_date = request.args.get('start_date')
-        end_date = request.args.get('end_date')
-        donation_type = request.args.get('type', 'all')
-        status = request.args.get('status', 'completed')
-        
-        query = Donation.query
+        filters, totals_filters, exact = donation_report_filters()
         
-        # Aplicar filtros
-        if start_date:
-            query = query.filter(Donation.created_at >= datetime.fromisoformat(start_date))
-        if end_date:
-            query = query.filter(Donation.created_at <= datetime.fromisoformat(end_date))
-        if donation_type != 'all':
-            query = query.filter(Donation.donation_type == donation_type)
-        if status != 'all':
-            query = query.filter(Donation.payment_status == status)
-        
-        donations = query.order_by(Donation.created_at.desc()).all()
-        
-        # Estatísticas
-        total_amount = sum(float(d.amount) for d in donations)
-        total_count = len(donations)
+        if exact:
+            return jsonify(donation_breakdowns(load_donation_columns(*filters)))
+        return jsonify(rollup_breakdowns(*totals_filters))
         
-        # Agrupar por mês
-        monthly_data = defaultdict(lambda: {'count': 0, 'amount': 0})
-        for donation in donations:
-            month_key = donation.created_at.strftime('%Y-%m')
-            monthly_data[month_key]['count'] += 1
-            monthly_data[month_key]['amount'] += float(donation.amount)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@reports_bp.route('/reports/donations/rows', methods=['GET'])
+@token_required
+@admin_required
+def donations_report_rows():
+    """
+    Doações do relatório, com os mesmos filtros de /reports/donations
+
+    Paginação por cursor: a próxima página é pedida com ?cursor=<next_cursor>
+    """
+    try:
+        filters, _, _ = donation_report_filters()
+        limit = page_limit(request.args.get('limit', type=int))
         
-        # Agrupar por tipo
-        type_data = defaultdict(lambda: {'count': 0, 'amount': 0})
-        for donation in donations:
-            type_data[donation.donation_type]['count'] += 1
-            type_data[donation.donation_type]['amount'] += float(donation.amount)
+        donations, next_cursor = keyset_page(
+            Donation.query.filter(*filters), Donation, request.args.get('cursor'), limit
+        )
         
         return jsonify({
-            'summary': {
-                'total_count': total_count,
-                'total_amount': total_amount,
-                'average_donation': total_amount / total_count if total_count > 0 else 0
-            },
-            'monthly_breakdown': dict(monthly_data),
-            'type_breakdown': dict(type_data),
-            'donations': [donation.to_dict() for donation in donations]
+            'donations': [donation.to_dict() for donation in donations],
+            'next_cursor': next_cursor
         })
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @reports_bp.route('/reports/raffles', methods=['GET'])
 @token_required
 @admin_required
+@cache_response(timeout=120, stale_ttl=600, tags=['raffles'])
 def raffles_report():
     """Relatório detalhado de rifas"""
     try:
@@ -185,13 +326,9 @@ def raffles_report():
         total_revenue = 0
         
         for raffle in raffles:
-            # Calcular estatísticas de cada rifa
-            tickets_sold = RaffleTicket.query.filter(
-                RaffleTicket.raffle_id == raffle.id,
-                RaffleTicket.payment_status == 'completed'
-            ).count()
-            
-            revenue = tickets_sold * float(raffle.ticket_price)
+            # Contadores mantidos na própria rifa
+            tickets_sold = raffle.sold_count
+            revenue = float(raffle.revenue)
             total_revenue += revenue
             
             raffle_dict = raffle.to_dict()
@@ -220,41 +357,33 @@ def raffles_report():
 @reports_bp.route('/reports/financial', methods=['GET'])
 @token_required
 @admin_required
+@cache_response(timeout=300, stale_ttl=3600, tags=['donations', 'raffles'])
 def financial_report():
     """Relatório financeiro consolidado"""
     try:
         year = request.args.get('year', datetime.utcnow().year, type=int)
         
-        # Doações por mês do ano
-        monthly_donations = {}
-        for month in range(1, 13):
-            month_donations = db.session.query(func.sum(Donation.amount)).filter(
-                extract('year', Donation.created_at) == year,
-                extract('month', Donation.created_at) == month,
-                Donation.payment_status == 'completed'
-            ).scalar() or 0
-            
-            monthly_donations[f"{year}-{month:02d}"] = float(month_donations)
-        
-        # Receita de rifas por mês
-        monthly_raffles = {}
-        for month in range(1, 13):
-            # Calcular receita de rifas completadas neste mês
-            month_raffles = Raffle.query.filter(
-                extract('year', Raffle.drawn_at) == year,
-                extract('month', Raffle.drawn_at) == month,
-                Raffle.status == 'completed'
-            ).all()
-            
-            month_revenue = 0
-            for raffle in month_raffles:
-                tickets_sold = RaffleTicket.query.filter(
-                    RaffleTicket.raffle_id == raffle.id,
-                    RaffleTicket.payment_status == 'completed'
-                ).count()
-                month_revenue += tickets_sold * float(raffle.ticket_price)
-            
-            monthly_raffles[f"{year}-{month:02d}"] = month_revenue
+        # Intervalo de datas do ano no WHERE (usa os índices em created_at/drawn_at)
+        year_start, year_end = datetime(year, 1, 1), datetime(year + 1, 1, 1)
+        months = [f"{year}-{month:02d}" for month in range(1, 13)]
+        
+        # Doações por mês do ano (totais diários)
+        donations_by_month = monthly_totals(
+            DonationDailyTotal.day, DonationDailyTotal.amount,
+            DonationDailyTotal.day >= year_start.date(),
+            DonationDailyTotal.day < year_end.date(),
+            DonationDailyTotal.payment_status == 'completed'
+        )
+        monthly_donations = {month: donations_by_month.get(month, 0.0) for month in months}
+        
+        # Receita de rifas por mês (rifas sorteadas no ano)
+        raffles_by_month = monthly_totals(
+            Raffle.drawn_at, Raffle.revenue,
+            Raffle.drawn_at >= year_start,
+            Raffle.drawn_at < year_end,
+            Raffle.status == 'completed'
+        )
+        monthly_raffles = {month: raffles_by_month.get(month, 0.0) for month in months}
         
         # Totais anuais
         total_donations = sum(monthly_donations.values())
@@ -266,7 +395,8 @@ def financial_report():
             Donation.donor_email,
             func.sum(Donation.amount).label('total_amount')
         ).filter(
-            extract('year', Donation.created_at) == year,
+            Donation.created_at >= year_start,
+            Donation.created_at < year_end,
             Donation.payment_status == 'completed'
         ).group_by(Donation.donor_email).order_by(
             func.sum(Donation.amount).desc()
@@ -303,53 +433,103 @@ def financial_report():
 @token_required
 @admin_required
 def export_donations():
-    """Exportar relatório de doações em CSV"""
+    """Exportar doações em CSV (mesmos filtros de /reports/donations)"""
     try:
-        start_date = request.args.get('start_date')
-        end_date = request.args.get('end_date')
-        
-        query = Donation.query.filter(Donation.payment_status == 'completed')
-        
-        if start_date:
-            query = query.filter(Donation.created_at >= datetime.fromisoformat(start_date))
-        if end_date:
-            query = query.filter(Donation.created_at <= datetime.fromisoformat(end_date))
-        
-        donations = query.order_by(Donation.created_at.desc()).all()
-        
-        # Criar CSV
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Cabeçalho
-        writer.writerow([
-            'Data', 'Nome', 'Email', 'Valor', 'Tipo', 'Método de Pagamento', 'Status'
-        ])
-        
-        # Dados
-        for donation in donations:
-            writer.writerow([
-                donation.created_at.strftime('%d/%m/%Y %H:%M'),
-                donation.donor_name,
-                donation.donor_email,
-                f"R$ {donation.amount:.2f}",
-                'Recorrente' if donation.donation_type == 'recurring' else 'Única',
-                donation.payment_method.upper(),
-                donation.payment_status
-            ])
-        
-        output.seek(0)
-        
-        # Criar arquivo em memória
-        csv_data = output.getvalue()
-        output.close()
-        
-        # Retornar arquivo
-        return jsonify({
-            'filename': f'doacoes_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv',
-            'data': csv_data,
-            'total_records': len(donations)
-        })
+        filters, _, _ = donation_report_filters()
+        
+        stmt = select(
+            Donation.created_at, Donation.donor_name, Donation.donor_email, Donation.amount,
+            Donation.donation_type, Donation.payment_method, Donation.payment_status
+        ).where(*filters).order_by(Donation.created_at.desc(), Donation.id.desc())
+        
+        def format_row(row):
+            return [
+                row.created_at.strftime('%d/%m/%Y %H:%M'),
+                row.donor_name,
+                row.donor_email,
+                f"R$ {row.amount:.2f}",
+                'Recorrente' if row.donation_type == 'recurring' else 'Única',
+                row.payment_method.upper(),
+                row.payment_status
+            ]
+        
+        return csv_export_response(
+            'doacoes',
+            ['Data', 'Nome', 'Email', 'Valor', 'Tipo', 'Método de Pagamento', 'Status'],
+            stmt, format_row
+        )
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@reports_bp.route('/reports/export/raffles/<int:raffle_id>/tickets', methods=['GET'])
+@token_required
+@admin_required
+def export_raffle_tickets(raffle_id):
+    """Exportar números de uma rifa em CSV (?status=, padrão completed)"""
+    try:
+        if db.session.get(Raffle, raffle_id) is None:
+            return jsonify({'error': 'Rifa não encontrada'}), 404
+        
+        status = request.args.get('status', 'completed')
+        stmt = select(
+            RaffleTicket.ticket_number, RaffleTicket.buyer_name, RaffleTicket.buyer_email,
+            RaffleTicket.buyer_phone, RaffleTicket.payment_status, RaffleTicket.purchased_at
+        ).where(RaffleTicket.raffle_id == raffle_id).order_by(RaffleTicket.ticket_number)
+        if status != 'all':
+            stmt = stmt.where(RaffleTicket.payment_status == status)
+        
+        def format_row(row):
+            return [
+                row.ticket_number,
+                row.buyer_name,
+                row.buyer_email,
+                row.buyer_phone,
+                row.payment_status,
+                row.purchased_at.strftime('%d/%m/%Y %H:%M') if row.purchased_at else ''
+            ]
+        
+        return csv_export_response(
+            f'rifa_{raffle_id}_numeros',
+            ['Número', 'Comprador', 'Email', 'Telefone', 'Status', 'Data da Compra'],
+            stmt, format_row
+        )
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@reports_bp.route('/reports/export/contact-messages', methods=['GET'])
+@token_required
+@admin_required
+def export_contact_messages():
+    """Exportar mensagens de contato em CSV (?status=, padrão all)"""
+    try:
+        status = request.args.get('status', 'all')
+        stmt = select(
+            ContactMessage.created_at, ContactMessage.name, ContactMessage.email, ContactMessage.phone,
+            ContactMessage.subject, ContactMessage.message, ContactMessage.status
+        ).order_by(ContactMessage.created_at.desc(), ContactMessage.id.desc())
+        if status != 'all':
+            stmt = stmt.where(ContactMessage.status == status)
+        
+        def format_row(row):
+            return [
+                row.created_at.strftime('%d/%m/%Y %H:%M') if row.created_at else '',
+                row.name,
+                row.email,
+                row.phone,
+                row.subject,
+                row.message,
+                row.status
+            ]
+        
+        return csv_export_response(
+            'mensagens_contato',
+            ['Data', 'Nome', 'Email', 'Telefone', 'Assunto', 'Mensagem', 'Status'],
+            stmt, format_row
+        )
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -357,33 +537,32 @@ def export_donations():
 @reports_bp.route('/reports/monthly-summary', methods=['GET'])
 @token_required
 @admin_required
+@cache_response(timeout=300, stale_ttl=3600, tags=['donations', 'raffles'])
 def monthly_summary():
     """Relatório de resumo mensal para emails automatizados"""
     try:
         month = request.args.get('month', datetime.utcnow().month, type=int)
         year = request.args.get('year', datetime.utcnow().year, type=int)
         
-        start_date = datetime(year, month, 1)
-        if month == 12:
-            end_date = datetime(year + 1, 1, 1)
-        else:
-            end_date = datetime(year, month + 1, 1)
-        
-        # Doações do mês
-        monthly_donations = Donation.query.filter(
-            Donation.created_at >= start_date,
-            Donation.created_at < end_date,
-            Donation.payment_status == 'completed'
-        ).all()
-        
-        total_donations = len(monthly_donations)
-        total_amount = sum(float(d.amount) for d in monthly_donations)
+        start_date, end_date = month_bounds(year, month)
         
-        # Novos doadores
-        existing_donors = db.session.query(Donation.donor_email).filter(
+        # Doações do mês (totais diários)
+        total_donations, total_amount = db.session.query(
+            func.sum(DonationDailyTotal.donation_count), func.sum(DonationDailyTotal.amount)
+        ).filter(
+            DonationDailyTotal.day >= start_date.date(),
+            DonationDailyTotal.day < end_date.date(),
+            DonationDailyTotal.payment_status == 'completed'
+        ).one()
+        total_donations = int(total_donations or 0)
+        total_amount = float(total_amount or 0)
+        
+        # Novos doadores (sem e-mails nulos: NOT IN com NULL não retorna nada)
+        existing_donors = select(Donation.donor_email).where(
             Donation.created_at < start_date,
-            Donation.payment_status == 'completed'
-        ).distinct().subquery()
+            Donation.payment_status == 'completed',
+            Donation.donor_email.isnot(None)
+        )
         
         new_donors = db.session.query(func.count(func.distinct(Donation.donor_email))).filter(
             Donation.created_at >= start_date,
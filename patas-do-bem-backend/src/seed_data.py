@@ -11,6 +11,7 @@ from src.models.user import db, User
 from src.models.donation import Donation
 from src.models.raffle import Raffle, RaffleTicket
 from src.models.contact import ContactMessage
+from src.services.raffle_stats import reconcile_raffle_counters
 from src.main import app
 
 def seed_database():
@@ -158,6 +159,9 @@ def seed_database():
         
         db.session.commit()
         
+        # Tickets criados diretamente: recalcular contadores das rifas
+        reconcile_raffle_counters(fix=True)
+        
         print("Banco de dados populado com sucesso!")
         print(f"- {len(donations)} doações criadas")
         print(f"- {len(raffles)} rifas criadas")
@@ -0,0 +1,407 @@
+"""
+Cache Backends
+Armazenamento do cache de respostas: LRU em memória (por processo) ou
+SQLite compartilhado entre os workers, com invalidação por tags
+"""
+
+import heapq
+import os
+import pickle
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, Iterable, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+class CacheBackend(ABC):
+    """Interface dos backends de cache"""
+
+    name = 'base'
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """Valor armazenado ou None (ausente ou expirado)"""
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: int, tags: Iterable[str] = ()):
+        """Armazenar um valor por ttl segundos, associado às tags"""
+        pass
+
+    @abstractmethod
+    def delete(self, key: str):
+        """Remover uma entrada"""
+        pass
+
+    @abstractmethod
+    def invalidate_tags(self, *tags: str) -> int:
+        """Remover as entradas associadas a qualquer das tags; retorna quantas"""
+        pass
+
+    @abstractmethod
+    def invalidate_pattern(self, pattern: str) -> int:
+        """Remover as entradas cuja chave contém o padrão; retorna quantas"""
+        pass
+
+    @abstractmethod
+    def clear(self):
+        """Remover todas as entradas"""
+        pass
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """Estatísticas do backend"""
+        pass
+
+def value_size(value: Any) -> int:
+    """
+    Bytes ocupados por um valor do cache
+
+    Respostas são guardadas como dict com o corpo em bytes; o tamanho é a
+    soma dos bytes/strings armazenados (os demais campos contam pelo
+    tamanho do objeto Python).
+    """
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode('utf-8'))
+    if isinstance(value, dict):
+        return sum(value_size(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(value_size(item) for item in value)
+    return sys.getsizeof(value)
+
+class _Entry:
+    """Entrada do cache em memória"""
+
+    __slots__ = ('value', 'expires_at', 'tags', 'size')
+
+    def __init__(self, value, expires_at, tags, size):
+        self.value = value
+        self.expires_at = expires_at
+        self.tags = tags
+        self.size = size
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    LRU em memória limitado por número de entradas e por bytes
+
+    get/set são O(1) (OrderedDict na ordem de uso); a expiração é
+    preguiçosa: a entrada vencida é descartada ao ser lida, e um heap
+    (expira_em, chave) permite remover as vencidas a cada set sem varrer
+    o cache. O tamanho de cada entrada é calculado uma vez, no set.
+    """
+
+    name = 'memory'
+
+    def __init__(self, max_entries: int = 1000, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # chave -> _Entry, do menos para o mais recentemente usado
+        self._entries: OrderedDict = OrderedDict()
+        self._tags: Dict[str, set] = defaultdict(set)
+        self._expirations: List = []
+        self._bytes = 0
+        self._evictions = 0
+        self._expired = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.time():
+                self._remove(key)
+                self._expired += 1
+                return None
+            self._entries.move_to_end(key)
+            return entry.value
+
+    def set(self, key, value, ttl, tags=()):
+        tags = tuple(tags)
+        size = len(key.encode('utf-8')) + value_size(value)
+        now = time.time()
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                return
+
+            entry = _Entry(value, now + ttl, tags, size)
+            self._entries[key] = entry
+            self._bytes += size
+            for tag in tags:
+                self._tags[tag].add(key)
+            heapq.heappush(self._expirations, (entry.expires_at, key))
+
+            self._purge_expired(now)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+
+    def _purge_expired(self, now):
+        """Remover as entradas vencidas do topo do heap (com o lock adquirido)"""
+        while self._expirations and self._expirations[0][0] <= now:
+            expires_at, key = heapq.heappop(self._expirations)
+            entry = self._entries.get(key)
+            # Itens antigos do heap (entrada removida ou regravada) são ignorados
+            if entry is not None and entry.expires_at == expires_at:
+                self._remove(key)
+                self._expired += 1
+
+        # Itens antigos acumulados no heap: reconstruir a partir das entradas
+        if len(self._expirations) > 2 * len(self._entries) + 64:
+            self._expirations = [(entry.expires_at, key) for key, entry in self._entries.items()]
+            heapq.heapify(self._expirations)
+
+    def _remove(self, key):
+        """Remover entrada e suas referências nas tags (com o lock adquirido)"""
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def invalidate_tags(self, *tags):
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                keys.update(self._tags.get(tag, ()))
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def invalidate_pattern(self, pattern):
+        with self._lock:
+            keys = [key for key in self._entries if pattern in key]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._expirations = []
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            self._purge_expired(time.time())
+            return {
+                'backend': self.name,
+                'total_entries': len(self._entries),
+                'valid_entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'memory_usage_kb': round(self._bytes / 1024, 1),
+                'evictions': self._evictions,
+                'expired': self._expired,
+                'tags': len(self._tags)
+            }
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    Cache em um arquivo SQLite compartilhado pelos workers do servidor
+
+    Todos os processos enxergam as mesmas entradas e a invalidação por tag
+    feita em um worker vale para os demais. Os valores são serializados com
+    pickle: o arquivo deve ficar em um diretório acessível só à aplicação.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, path: str, max_entries: int = 10000):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+
+        with self._connect() as connection:
+            connection.executescript("""
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS ix_cache_entries_accessed_at ON cache_entries (accessed_at);
+                CREATE TABLE IF NOT EXISTS cache_tags (
+                    tag TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    PRIMARY KEY (tag, key)
+                );
+                CREATE INDEX IF NOT EXISTS ix_cache_tags_key ON cache_tags (key);
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Conexão da thread atual (sqlite3 não compartilha conexões entre threads)"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def get(self, key):
+        connection = self._connect()
+        now = time.time()
+        row = connection.execute(
+            'SELECT value FROM cache_entries WHERE key = ? AND expires_at > ?', (key, now)
+        ).fetchone()
+        if row is None:
+            return None
+
+        with connection:
+            connection.execute('UPDATE cache_entries SET accessed_at = ? WHERE key = ?', (now, key))
+        return pickle.loads(row[0])
+
+    def set(self, key, value, ttl, tags=()):
+        connection = self._connect()
+        now = time.time()
+        with connection:
+            connection.execute('DELETE FROM cache_tags WHERE key = ?', (key,))
+            connection.execute(
+                'INSERT OR REPLACE INTO cache_entries (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)',
+                (key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), now + ttl, now)
+            )
+            connection.executemany(
+                'INSERT OR IGNORE INTO cache_tags (tag, key) VALUES (?, ?)',
+                [(tag, key) for tag in tags]
+            )
+            self._evict(connection, now)
+
+    def _evict(self, connection, now):
+        """Remover expiradas e, acima do limite, as menos acessadas"""
+        connection.execute('DELETE FROM cache_entries WHERE expires_at <= ?', (now,))
+        connection.execute("""
+            DELETE FROM cache_entries WHERE key IN (
+                SELECT key FROM cache_entries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.max_entries,))
+        connection.execute('DELETE FROM cache_tags WHERE key NOT IN (SELECT key FROM cache_entries)')
+
+    def delete(self, key):
+        connection = self._connect()
+        with connection:
+            connection.execute('DELETE FROM cache_entries WHERE key = ?', (key,))
+            connection.execute('DELETE FROM cache_tags WHERE key = ?', (key,))
+
+    def invalidate_tags(self, *tags):
+        if not tags:
+            return 0
+        connection = self._connect()
+        placeholders = ', '.join('?' for _ in tags)
+        with connection:
+            removed = connection.execute(f"""
+                DELETE FROM cache_entries WHERE key IN (
+                    SELECT key FROM cache_tags WHERE tag IN ({placeholders})
+                )
+            """, tags).rowcount
+            connection.execute(f'DELETE FROM cache_tags WHERE tag IN ({placeholders})', tags)
+        return removed
+
+    def invalidate_pattern(self, pattern):
+        connection = self._connect()
+        escaped = pattern.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        with connection:
+            removed = connection.execute(
+                "DELETE FROM cache_entries WHERE key LIKE ? ESCAPE '\\'", (f'%{escaped}%',)
+            ).rowcount
+            connection.execute('DELETE FROM cache_tags WHERE key NOT IN (SELECT key FROM cache_entries)')
+        return removed
+
+    def clear(self):
+        connection = self._connect()
+        with connection:
+            connection.execute('DELETE FROM cache_entries')
+            connection.execute('DELETE FROM cache_tags')
+
+    def stats(self):
+        connection = self._connect()
+        total, valid, size = connection.execute(
+            'SELECT COUNT(*), COALESCE(SUM(expires_at > ?), 0), COALESCE(SUM(LENGTH(key) + LENGTH(value)), 0) '
+            'FROM cache_entries', (time.time(),)
+        ).fetchone()
+        tags = connection.execute('SELECT COUNT(DISTINCT tag) FROM cache_tags').fetchone()[0]
+        return {
+            'backend': self.name,
+            'total_entries': total,
+            'valid_entries': valid,
+            'max_entries': self.max_entries,
+            'bytes': size,
+            'memory_usage_kb': round(size / 1024, 1),
+            'tags': tags,
+            'path': self.path
+        }
+
+def create_cache_backend() -> CacheBackend:
+    """
+    Criar o backend configurado no ambiente
+
+    Variáveis:
+        CACHE_BACKEND: memory (padrão, um cache por processo) ou sqlite
+            (compartilhado entre os workers da mesma máquina)
+        CACHE_MAX_ENTRIES: limite de entradas (padrão 1000)
+        CACHE_MAX_BYTES: limite de bytes do backend memory (padrão 64 MiB)
+        CACHE_SQLITE_PATH: arquivo do backend sqlite
+    """
+    backend = os.getenv('CACHE_BACKEND', 'memory').lower()
+    max_entries = int(os.getenv('CACHE_MAX_ENTRIES', '1000'))
+
+    if backend == 'memory':
+        max_bytes = int(os.getenv('CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+        return MemoryCacheBackend(max_entries=max_entries, max_bytes=max_bytes)
+    if backend == 'sqlite':
+        path = os.getenv('CACHE_SQLITE_PATH') or os.path.join(tempfile.gettempdir(), 'patas-do-bem-cache.db')
+        return SQLiteCacheBackend(path, max_entries=max_entries)
+
+    raise ValueError(f'CACHE_BACKEND inválido: {backend} (opções: memory, sqlite)')
+
+_backend: Optional[CacheBackend] = None
+_backend_lock = threading.Lock()
+
+def get_cache_backend() -> CacheBackend:
+    """Backend global, criado no primeiro uso"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_cache_backend()
+    return _backend
+
+def set_cache_backend(backend: CacheBackend):
+    """Substituir o backend global"""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+def invalidate_cache_tags(*tags: str) -> int:
+    """Invalidar as respostas em cache associadas às tags"""
+    try:
+        removed = get_cache_backend().invalidate_tags(*tags)
+    except Exception as e:
+        # Falha no cache não deve derrubar a escrita já confirmada
+        logger.error(f"Erro ao invalidar cache ({', '.join(tags)}): {e}")
+        return 0
+
+    if removed:
+        logger.debug(f"Cache invalidado ({', '.join(tags)}): {removed} entrada(s)")
+    return removed
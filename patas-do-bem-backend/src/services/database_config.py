@@ -0,0 +1,112 @@
+"""
+Database Configuration
+URL do banco, opções do engine (pool de conexões) e perfis de PRAGMA do
+SQLite a partir de variáveis de ambiente
+"""
+
+import os
+from typing import Dict, Any
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Diretório do backend (patas-do-bem-backend)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DEFAULT_DATABASE_URL = f"sqlite:///{os.path.join(BASE_DIR, 'src', 'database', 'app.db')}"
+
+def get_database_url() -> str:
+    """
+    URL do banco em DATABASE_URL (padrão: SQLite em src/database/app.db)
+
+    Caminhos SQLite relativos são resolvidos a partir do diretório do
+    backend, e o prefixo postgres:// (usado por alguns provedores) é
+    convertido para postgresql://.
+    """
+    url = os.getenv('DATABASE_URL') or DEFAULT_DATABASE_URL
+
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+
+    parsed = make_url(url)
+    if (parsed.get_backend_name() == 'sqlite' and parsed.database
+            and parsed.database != ':memory:' and not os.path.isabs(parsed.database)):
+        url = parsed.set(database=os.path.join(BASE_DIR, parsed.database)).render_as_string(hide_password=False)
+
+    return url
+
+def get_engine_options(url: str) -> Dict[str, Any]:
+    """
+    Opções do engine para SQLALCHEMY_ENGINE_OPTIONS
+
+    Variáveis (bancos cliente/servidor, como Postgres):
+        DB_POOL_SIZE: conexões mantidas abertas (padrão 10)
+        DB_MAX_OVERFLOW: conexões extras em picos (padrão 20)
+        DB_POOL_TIMEOUT: segundos aguardando uma conexão livre (padrão 30)
+        DB_POOL_RECYCLE: segundos até reabrir uma conexão, abaixo do
+            timeout de ociosidade do servidor/proxy (padrão 1800)
+        DB_POOL_PRE_PING: testar a conexão antes de usar (padrão true)
+    """
+    if make_url(url).get_backend_name() == 'sqlite':
+        # Conexões SQLite são locais: o pool padrão do SQLAlchemy já serve
+        return {}
+
+    return {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', '10')),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '20')),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', '30')),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', '1800')),
+        'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'
+    }
+
+# Perfis de PRAGMA aplicados a cada nova conexão SQLite (SQLITE_PROFILE)
+SQLITE_PROFILES = {
+    # Padrão do SQLite: journal de rollback, escrita bloqueia as leituras
+    'default': {},
+    # Instalação em um único servidor: leituras não esperam as escritas
+    'wal': {
+        'journal_mode': 'WAL',
+        # Em WAL, NORMAL só sincroniza no checkpoint (seguro contra
+        # corrupção; uma queda de energia pode perder as últimas transações)
+        'synchronous': 'NORMAL',
+        # Cache de páginas em KiB quando negativo (64 MiB)
+        'cache_size': -64000,
+        # Aguardar até 5 s pelo lock de escrita em vez de falhar
+        'busy_timeout': 5000,
+        # Leitura do arquivo via mmap (256 MiB)
+        'mmap_size': 268435456,
+        'temp_store': 'MEMORY'
+    }
+}
+
+def get_sqlite_profile() -> str:
+    """Nome do perfil de PRAGMA do SQLite em SQLITE_PROFILE (padrão: default)"""
+    profile = os.getenv('SQLITE_PROFILE', 'default').lower()
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"SQLITE_PROFILE inválido: {profile} (opções: {', '.join(SQLITE_PROFILES)})")
+    return profile
+
+def configure_sqlite(engine, profile: str):
+    """
+    Registrar no engine o hook que aplica os PRAGMAs do perfil a cada conexão
+
+    Não faz nada para bancos que não sejam SQLite ou para o perfil default.
+    """
+    pragmas = SQLITE_PROFILES[profile]
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+    # Conexões já abertas no pool não passariam pelo hook
+    engine.dispose()
+    logger.debug(f"Perfil SQLite '{profile}' aplicado")
@@ -0,0 +1,89 @@
+"""
+Keyset Pagination
+Paginação por cursor em (created_at, id), do mais recente para o mais
+antigo: cada página continua depois do último registro da anterior, com
+custo constante (sem OFFSET) e sem pular ou repetir registros quando
+novos são inseridos entre uma página e outra
+
+Registros sem created_at (coluna anulável) vêm depois de todos os datados,
+em ordem de id decrescente.
+"""
+
+import base64
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+from sqlalchemy import tuple_
+
+# Registros por página
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+def encode_cursor(created_at: Optional[datetime], record_id: int) -> str:
+    """Cursor opaco (base64 URL-safe) para a posição (created_at, id)"""
+    raw = f'{created_at.isoformat() if created_at else ""}|{record_id}'
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    """
+    Posição (created_at, id) de um cursor gerado por encode_cursor
+    (created_at None para registros sem data)
+
+    Raises:
+        ValueError: cursor malformado
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, record_id = base64.urlsafe_b64decode(padded).decode('utf-8').split('|')
+        return datetime.fromisoformat(created_at) if created_at else None, int(record_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError('Cursor inválido') from None
+
+def page_limit(value: Optional[int]) -> int:
+    """Tamanho de página pedido, limitado a 1..MAX_LIMIT"""
+    if value is None:
+        return DEFAULT_LIMIT
+    return max(1, min(value, MAX_LIMIT))
+
+def keyset_page(query, model, cursor: Optional[str] = None,
+                limit: int = DEFAULT_LIMIT) -> Tuple[List[Any], Optional[str]]:
+    """
+    Uma página da consulta em ordem (created_at, id) decrescente
+
+    Args:
+        query: consulta do ORM sobre model (com os filtros já aplicados)
+        model: modelo com as colunas created_at e id
+        cursor: next_cursor da página anterior (None para a primeira)
+        limit: registros por página
+
+    Returns:
+        (registros, next_cursor), com next_cursor None na última página
+
+    Raises:
+        ValueError: cursor malformado
+    """
+    created_at = record_id = None
+    if cursor:
+        created_at, record_id = decode_cursor(cursor)
+
+    # Um registro a mais indica se existe próxima página. Datados e sem data
+    # em consultas separadas: um OR com IS NULL impediria o uso do índice
+    # (created_at, id) para a ordenação
+    items = []
+    if record_id is None or created_at is not None:
+        dated = query.filter(model.created_at.isnot(None))
+        if record_id is not None:
+            dated = dated.filter(tuple_(model.created_at, model.id) < tuple_(created_at, record_id))
+        items = dated.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+
+    if len(items) <= limit:
+        undated = query.filter(model.created_at.is_(None))
+        if record_id is not None and created_at is None:
+            undated = undated.filter(model.id < record_id)
+        items += undated.order_by(model.id.desc()).limit(limit + 1 - len(items)).all()
+
+    if len(items) <= limit:
+        return items, None
+
+    items = items[:limit]
+    last = items[-1]
+    return items, encode_cursor(last.created_at, last.id)
@@ -0,0 +1,269 @@
+"""
+Raffle Availability Index
+Índice compacto (bytearray) do estado de cada número das rifas
+"""
+
+import heapq
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+import logging
+
+from src.models.user import db
+from src.models.raffle import RaffleTicket
+from src.services.raffle_changes import get_changes_since
+
+logger = logging.getLogger(__name__)
+
+# Estados possíveis de um número (1 byte por número)
+FREE = 0
+RESERVED = 1
+SOLD = 2
+
+# Mapeamento do payment_status do ticket para o estado do número
+STATUS_TO_STATE = {
+    'pending': RESERVED,
+    'completed': SOLD
+}
+
+# Estado do log de mudanças (services/raffle_changes.py) para o estado do número
+CHANGE_TO_STATE = {
+    'available': FREE,
+    'reserved': RESERVED,
+    'sold': SOLD
+}
+
+_RUN_PATTERN = re.compile(b'\x01+')
+
+class RaffleAvailability:
+    """Estado de todos os números de uma rifa"""
+
+    def __init__(self, total_numbers: int, version: int = 0):
+        self.total_numbers = total_numbers
+        # ticket_version da rifa quando o índice foi construído; o estado
+        # pode já incluir mudanças posteriores, aplicadas por mark()
+        self.version = version
+        # Posição 0 não é usada para que o índice seja o próprio número
+        self._states = bytearray(total_numbers + 1)
+        self.counts = {FREE: total_numbers, RESERVED: 0, SOLD: 0}
+        self.built_at = time.time()
+        # Expiração das reservas: dict número -> prazo e heap (prazo, número)
+        # para liberar as vencidas sem varrer todos os números
+        self._reserved_until: Dict[int, datetime] = {}
+        self._expirations = []
+
+    def state(self, number: int) -> int:
+        """Estado atual de um número"""
+        return self._states[number]
+
+    def mark(self, number: int, state: int, reserved_until: Optional[datetime] = None):
+        """Atualizar o estado de um número mantendo as contagens"""
+        if number < 1 or number > self.total_numbers:
+            return
+
+        if state == RESERVED and reserved_until is not None:
+            self._reserved_until[number] = reserved_until
+            heapq.heappush(self._expirations, (reserved_until, number))
+        else:
+            self._reserved_until.pop(number, None)
+
+        previous = self._states[number]
+        if previous == state:
+            return
+
+        self._states[number] = state
+        self.counts[previous] -= 1
+        self.counts[state] += 1
+
+    def expire(self, now: Optional[datetime] = None) -> int:
+        """Liberar as reservas vencidas, sem esperar pelo sweeper"""
+        now = now or datetime.utcnow()
+        released = 0
+        while self._expirations and self._expirations[0][0] <= now:
+            reserved_until, number = heapq.heappop(self._expirations)
+            # Entradas antigas no heap (reserva renovada ou já paga) são ignoradas
+            if self._reserved_until.get(number) == reserved_until and self._states[number] == RESERVED:
+                self.mark(number, FREE)
+                released += 1
+        return released
+
+    def next_expiration(self) -> Optional[datetime]:
+        """Prazo da próxima reserva a vencer, ou None se não houver reservas com prazo"""
+        # Descarta do topo do heap as entradas antigas (reserva renovada ou já paga)
+        while self._expirations:
+            reserved_until, number = self._expirations[0]
+            if self._reserved_until.get(number) == reserved_until and self._states[number] == RESERVED:
+                return reserved_until
+            heapq.heappop(self._expirations)
+        return None
+
+    def ranges(self, *states: int) -> List[List[int]]:
+        """Intervalos [início, fim] contínuos de números em algum dos estados"""
+        # Traduz o bytearray para uma máscara (1 = estado desejado) e busca
+        # as sequências de 1 com regex, tudo em C sem laço Python por número
+        table = bytes(1 if value in states else 0 for value in range(256))
+        mask = self._states.translate(table)
+        mask[0] = 0
+        return [[match.start(), match.end() - 1] for match in _RUN_PATTERN.finditer(mask)]
+
+    def sample_free(self, count: int, rng, exclude: Iterable[int] = ()) -> List[int]:
+        """
+        Sortear até count números livres
+
+        Sorteia posições aleatórias e aceita as livres, em O(count) enquanto
+        houver boa fração de números livres; quando as tentativas se esgotam
+        (rifa quase cheia) sorteia sobre a lista de livres.
+        """
+        exclude = set(exclude)
+        chosen = set()
+        attempts = 0
+        max_attempts = count * 4 + 16
+        while len(chosen) < count and attempts < max_attempts:
+            attempts += 1
+            number = rng.randint(1, self.total_numbers)
+            if self._states[number] == FREE and number not in exclude:
+                chosen.add(number)
+
+        if len(chosen) < count:
+            candidates = [number for number in self.numbers(FREE)
+                          if number not in exclude and number not in chosen]
+            chosen.update(rng.sample(candidates, min(count - len(chosen), len(candidates))))
+
+        return list(chosen)
+
+    def numbers(self, *states: int) -> List[int]:
+        """Lista ordenada de números em algum dos estados"""
+        result = []
+        for start, end in self.ranges(*states):
+            result.extend(range(start, end + 1))
+        return result
+
+class AvailabilityIndex:
+    """Registro em memória dos índices de disponibilidade por rifa"""
+
+    def __init__(self, max_age: int = 30):
+        # Índices mais antigos que max_age segundos são reconstruídos, para
+        # absorver escritas feitas por outros processos
+        self.max_age = max_age
+        self._indexes: Dict[int, RaffleAvailability] = {}
+        self._lock = threading.Lock()
+
+    def get(self, raffle) -> RaffleAvailability:
+        """
+        Obter (ou construir) o índice de uma rifa
+
+        Se o banco já está em uma ticket_version posterior à do índice
+        (escritas de outros processos), aplica antes as mudanças do log desde
+        a versão do índice, ou reconstrói se o log não cobre mais essa versão.
+        """
+        target = raffle.ticket_version or 0
+        with self._lock:
+            availability = self._indexes.get(raffle.id)
+            usable = (availability is not None
+                      and availability.total_numbers == raffle.total_numbers
+                      and time.time() - availability.built_at < self.max_age)
+            if usable and availability.version >= target:
+                availability.expire()
+                return availability
+
+        if usable and self._catch_up(raffle, availability):
+            with self._lock:
+                availability.expire()
+            return availability
+
+        availability = self._build(raffle)
+        with self._lock:
+            self._indexes[raffle.id] = availability
+        return availability
+
+    def _build(self, raffle) -> RaffleAvailability:
+        """Construir o índice a partir dos tickets (apenas as colunas necessárias)"""
+        # Versão lida antes dos tickets: o estado é sempre igual ou mais novo
+        availability = RaffleAvailability(raffle.total_numbers, raffle.ticket_version or 0)
+        now = datetime.utcnow()
+
+        rows = db.session.query(
+            RaffleTicket.ticket_number, RaffleTicket.payment_status, RaffleTicket.reserved_until
+        ).filter(
+            RaffleTicket.raffle_id == raffle.id,
+            RaffleTicket.payment_status.in_(list(STATUS_TO_STATE.keys()))
+        )
+        for ticket_number, payment_status, reserved_until in rows:
+            if payment_status == 'pending' and reserved_until is not None and reserved_until <= now:
+                continue  # Reserva vencida ainda não liberada pelo sweeper
+            availability.mark(ticket_number, STATUS_TO_STATE[payment_status], reserved_until)
+
+        logger.debug(f"Índice de disponibilidade construído para rifa {raffle.id}")
+        return availability
+
+    def _catch_up(self, raffle, availability: RaffleAvailability) -> bool:
+        """
+        Aplicar ao índice as mudanças do log após a sua versão
+
+        Returns:
+            False se o log não cobre mais a versão do índice (reconstruir)
+        """
+        since = availability.version
+        changes = get_changes_since(raffle, since)
+        if changes is None:
+            return False
+
+        reserved_until = {}
+        if changes['reserved']:
+            reserved_until = dict(db.session.query(
+                RaffleTicket.ticket_number, RaffleTicket.reserved_until
+            ).filter(
+                RaffleTicket.raffle_id == raffle.id,
+                RaffleTicket.ticket_number.in_(changes['reserved'])
+            ))
+
+        with self._lock:
+            # Outra thread já avançou o índice: as mudanças lidas aqui podem ser mais antigas
+            if availability.version != since:
+                return True
+            for change, numbers in changes.items():
+                state = CHANGE_TO_STATE[change]
+                for number in numbers:
+                    availability.mark(number, state, reserved_until.get(number) if state == RESERVED else None)
+            availability.version = max(since, raffle.ticket_version or 0)
+
+        logger.debug(f"Índice da rifa {raffle.id} atualizado pelo log: versão {since} -> {availability.version}")
+        return True
+
+    def mark(self, raffle_id: int, numbers: Iterable[int], payment_status: Optional[str],
+             reserved_until: Optional[datetime] = None, version: Optional[int] = None):
+        """
+        Registrar mudança de status de tickets (chamar após o commit)
+
+        Args:
+            version: ticket_version da rifa gravada com a mudança (ver
+                raffle_stats.ticket_versions); o índice passa a essa versão
+                quando ela é a seguinte à sua, isto é, quando nenhum outro
+                processo alterou a rifa no meio. Senão get() completa pelo log.
+        """
+        state = STATUS_TO_STATE.get(payment_status, FREE)
+        with self._lock:
+            availability = self._indexes.get(raffle_id)
+            if availability is None:
+                return
+            if version is not None and availability.version >= version:
+                return  # Mudança já aplicada pelo log, junto com as posteriores
+            for number in numbers:
+                availability.mark(number, state, reserved_until)
+            if version is not None and availability.version == version - 1:
+                availability.version = version
+
+    def invalidate(self, raffle_id: int):
+        """Descartar o índice de uma rifa"""
+        with self._lock:
+            self._indexes.pop(raffle_id, None)
+
+    def clear(self):
+        """Descartar todos os índices"""
+        with self._lock:
+            self._indexes.clear()
+
+# Instância global do índice
+availability_index = AvailabilityIndex()
@@ -0,0 +1,127 @@
+"""
+Raffle Ticket Change Log
+Log das mudanças de estado dos números por versão da rifa (ticket_version),
+para clientes sincronizarem apenas o que mudou desde o último cursor
+"""
+
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import insert, delete, select, update
+import logging
+
+from src.models.user import db
+from src.models.raffle import Raffle, RaffleTicketChange
+
+logger = logging.getLogger(__name__)
+
+# Estado do número conforme o payment_status do ticket; os demais status
+# (failed, cancelled, expired...) liberam o número
+STATE_BY_STATUS = {
+    'completed': 'sold',
+    'pending': 'reserved'
+}
+
+AVAILABLE_STATE = 'available'
+
+STATES = (AVAILABLE_STATE, 'reserved', 'sold')
+
+def ticket_state(payment_status: Optional[str]) -> str:
+    """Estado do número para um payment_status"""
+    return STATE_BY_STATUS.get(payment_status, AVAILABLE_STATE)
+
+def record_ticket_changes(raffle_id: int, changes: Iterable[Tuple[int, str]]):
+    """
+    Registrar mudanças de números na versão atual da rifa (sem commit)
+
+    Deve ser chamada na mesma transação, logo após incrementar
+    ticket_version, para que o log e a versão sejam gravados juntos.
+
+    Args:
+        raffle_id: ID da rifa
+        changes: pares (número, novo estado)
+    """
+    changes = list(changes)
+    if not changes:
+        return
+
+    version = db.session.execute(
+        select(Raffle.ticket_version).where(Raffle.id == raffle_id)
+    ).scalar_one()
+    db.session.execute(insert(RaffleTicketChange), [{
+        'raffle_id': raffle_id,
+        'version': version,
+        'ticket_number': number,
+        'state': state
+    } for number, state in changes])
+
+def get_changes_since(raffle, since: int) -> Optional[Dict[str, List[int]]]:
+    """
+    Números alterados após a versão since, no estado mais recente
+
+    Aplicar o resultado sobre um estado de versão >= since resulta no estado
+    atual: cada número aparece uma vez, com seu último estado.
+
+    Args:
+        raffle: rifa
+        since: versão já conhecida pelo cliente
+
+    Returns:
+        Dict estado -> números ordenados, ou None se o cursor for anterior
+        ao início do log (ou posterior à versão atual) e o cliente precisar
+        de um snapshot completo
+    """
+    if since < (raffle.ticket_log_start or 0) or since > (raffle.ticket_version or 0):
+        return None
+
+    latest = {}
+    rows = db.session.execute(
+        select(RaffleTicketChange.ticket_number, RaffleTicketChange.state).where(
+            RaffleTicketChange.raffle_id == raffle.id,
+            RaffleTicketChange.version > since
+        ).order_by(RaffleTicketChange.version, RaffleTicketChange.id)
+    )
+    for number, state in rows:
+        latest[number] = state
+
+    changes = {state: [] for state in STATES}
+    for number in sorted(latest):
+        changes[latest[number]].append(number)
+    return changes
+
+def prune_ticket_changes(keep_versions: Optional[int] = None) -> int:
+    """
+    Remover do log as mudanças mais antigas que as últimas keep_versions
+    versões de cada rifa (cursores anteriores passam a receber snapshot)
+
+    Args:
+        keep_versions: versões mantidas por rifa (padrão: RAFFLE_CHANGE_LOG_VERSIONS)
+
+    Returns:
+        Quantidade de mudanças removidas
+    """
+    if keep_versions is None:
+        keep_versions = int(os.getenv('RAFFLE_CHANGE_LOG_VERSIONS', '1000'))
+
+    cutoff = Raffle.ticket_version - keep_versions
+    try:
+        db.session.execute(update(Raffle).where(cutoff > Raffle.ticket_log_start).values({
+            Raffle.ticket_log_start: cutoff,
+            # Limpeza do log não conta como edição da rifa
+            Raffle.updated_at: Raffle.updated_at
+        }).execution_options(synchronize_session=False))
+
+        log_start = select(Raffle.ticket_log_start).where(
+            Raffle.id == RaffleTicketChange.raffle_id
+        ).scalar_subquery()
+        result = db.session.execute(
+            delete(RaffleTicketChange).where(RaffleTicketChange.version <= log_start)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    if result.rowcount:
+        logger.info(f"{result.rowcount} mudança(s) antiga(s) removida(s) do log de números")
+    return result.rowcount
@@ -0,0 +1,120 @@
+"""
+Raffle Events Broadcaster
+Distribuição em memória (por processo) das mudanças de estado dos números
+das rifas para os streams SSE de /api/raffles/<id>/events
+"""
+
+import json
+import os
+import queue
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Set, Any
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Tipo do evento conforme o novo payment_status do ticket; os demais
+# status (failed, cancelled, expired...) liberam o número
+EVENT_BY_STATUS = {
+    'pending': 'reserved',
+    'completed': 'sold'
+}
+
+RELEASED_EVENT = 'released'
+
+# Intervalo dos comentários de keepalive nos streams ociosos (proxies e
+# balanceadores costumam encerrar conexões sem tráfego)
+HEARTBEAT_SECONDS = float(os.getenv('SSE_HEARTBEAT_SECONDS', '15'))
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Mensagem no formato text/event-stream"""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+class Subscription:
+    """Fila de eventos de um cliente conectado"""
+
+    def __init__(self, raffle_id: int, max_pending: int):
+        self.raffle_id = raffle_id
+        self._queue = queue.Queue(maxsize=max_pending)
+        # Cliente lento demais: eventos perdidos, precisa recarregar o estado
+        self.overflowed = False
+
+    def put(self, event: Dict[str, Any]):
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            if not self.overflowed:
+                logger.warning(f"Cliente SSE da rifa {self.raffle_id} atrasado; eventos descartados")
+            self.overflowed = True
+
+    def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """Próximo evento, ou None se nada chegar em timeout segundos"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+class RaffleEventBroadcaster:
+    """
+    Fan-out das mudanças dos números para os clientes inscritos em cada rifa
+
+    Os eventos são publicados pelas rotinas de escrita dos tickets após o
+    commit. Cada processo só enxerga as escritas feitas nele; clientes de
+    outros processos recebem as mudanças ao reconectar (snapshot inicial).
+    """
+
+    def __init__(self, max_subscribers: int = 1000, max_pending: int = 256):
+        self.max_subscribers = max_subscribers
+        self.max_pending = max_pending
+        self._subscribers: Dict[int, Set[Subscription]] = defaultdict(set)
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def subscribe(self, raffle_id: int) -> Optional[Subscription]:
+        """Inscrever um cliente na rifa (None se o limite de conexões foi atingido)"""
+        with self._lock:
+            if self._count >= self.max_subscribers:
+                return None
+            subscription = Subscription(raffle_id, self.max_pending)
+            self._subscribers[raffle_id].add(subscription)
+            self._count += 1
+            return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """Remover a inscrição de um cliente desconectado"""
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.raffle_id)
+            if subscribers is None or subscription not in subscribers:
+                return
+            subscribers.discard(subscription)
+            self._count -= 1
+            if not subscribers:
+                del self._subscribers[subscription.raffle_id]
+
+    def publish(self, raffle_id: int, numbers: Iterable[int], payment_status: Optional[str]):
+        """Publicar a mudança de status de números (chamar após o commit)"""
+        numbers = sorted(numbers)
+        if not numbers:
+            return
+
+        event = {
+            'type': EVENT_BY_STATUS.get(payment_status, RELEASED_EVENT),
+            'numbers': numbers
+        }
+        with self._lock:
+            subscribers = list(self._subscribers.get(raffle_id, ()))
+        for subscription in subscribers:
+            subscription.put(event)
+
+    def subscriber_count(self, raffle_id: Optional[int] = None) -> int:
+        """Clientes conectados (em uma rifa ou no total)"""
+        with self._lock:
+            if raffle_id is None:
+                return self._count
+            return len(self._subscribers.get(raffle_id, ()))
+
+# Instância global do broadcaster
+raffle_events = RaffleEventBroadcaster(
+    max_subscribers=int(os.getenv('SSE_MAX_SUBSCRIBERS', '1000'))
+)
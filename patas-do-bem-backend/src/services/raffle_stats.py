@@ -0,0 +1,163 @@
+"""
+Raffle Stats Query Layer
+Estatísticas de vendas das rifas: contadores mantidos no modelo Raffle e
+recálculo a partir dos tickets em uma única consulta agrupada
+"""
+
+from typing import Dict, Iterable, List, Sequence, Tuple, Any, Optional
+import logging
+from sqlalchemy import func, case
+
+from src.models.user import db
+from src.models.raffle import Raffle, RaffleTicket
+from src.services.raffle_changes import ticket_state, record_ticket_changes
+
+logger = logging.getLogger(__name__)
+
+def empty_stats() -> Dict[str, Any]:
+    """Estatísticas de uma rifa sem tickets"""
+    return {'sold': 0, 'pending': 0, 'revenue': 0.0}
+
+def get_raffle_stats(raffle_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+    """
+    Calcular vendidos, pendentes e receita de um conjunto de rifas
+
+    Args:
+        raffle_ids: IDs das rifas
+
+    Returns:
+        Dict raffle_id -> {'sold', 'pending', 'revenue'} (todas as rifas pedidas
+        estão presentes, mesmo sem tickets)
+    """
+    raffle_ids = list(raffle_ids)
+    stats = {raffle_id: empty_stats() for raffle_id in raffle_ids}
+    if not raffle_ids:
+        return stats
+
+    is_sold = RaffleTicket.payment_status == 'completed'
+    is_pending = RaffleTicket.payment_status == 'pending'
+
+    rows = db.session.query(
+        RaffleTicket.raffle_id,
+        func.sum(case((is_sold, 1), else_=0)),
+        func.sum(case((is_pending, 1), else_=0)),
+        func.sum(case((is_sold, Raffle.ticket_price), else_=0))
+    ).join(Raffle, Raffle.id == RaffleTicket.raffle_id).filter(
+        RaffleTicket.raffle_id.in_(raffle_ids)
+    ).group_by(RaffleTicket.raffle_id).all()
+
+    for raffle_id, sold, pending, revenue in rows:
+        stats[raffle_id] = {
+            'sold': int(sold or 0),
+            'pending': int(pending or 0),
+            'revenue': float(revenue or 0)
+        }
+
+    return stats
+
+def apply_ticket_transitions(raffle_id: int, transitions: Iterable[Tuple[Optional[str], Optional[str]]],
+                             numbers: Optional[Sequence[int]] = None):
+    """
+    Atualizar os contadores da rifa na transação corrente
+
+    Deve ser chamada junto com a alteração dos tickets, antes do commit.
+    O UPDATE é relativo (coluna + delta), então escritas concorrentes não
+    sobrescrevem umas às outras. ticket_version é incrementada sempre que
+    algum número muda de estado (livre, reservado ou vendido), mesmo que
+    os contadores não mudem no total; com numbers, as mudanças também são
+    gravadas no log de sincronização (services/raffle_changes.py).
+
+    Args:
+        raffle_id: ID da rifa
+        transitions: pares (status anterior, novo status) de cada ticket;
+            None representa ticket inexistente/removido
+        numbers: números dos tickets, na ordem de transitions
+    """
+    sold_delta = 0
+    reserved_delta = 0
+    changes = []
+    for index, (old_status, new_status) in enumerate(transitions):
+        state = ticket_state(new_status)
+        if ticket_state(old_status) == state:
+            continue
+        changes.append((numbers[index] if numbers is not None else None, state))
+        if old_status == 'completed':
+            sold_delta -= 1
+        elif old_status == 'pending':
+            reserved_delta -= 1
+        if new_status == 'completed':
+            sold_delta += 1
+        elif new_status == 'pending':
+            reserved_delta += 1
+
+    if not changes:
+        return
+
+    values = {
+        Raffle.sold_count: Raffle.sold_count + sold_delta,
+        Raffle.reserved_count: Raffle.reserved_count + reserved_delta,
+        Raffle.revenue: Raffle.revenue + sold_delta * Raffle.ticket_price,
+        Raffle.ticket_version: Raffle.ticket_version + 1,
+        # Vendas não contam como edição da rifa
+        Raffle.updated_at: Raffle.updated_at
+    }
+    if numbers is None:
+        # Mudança fora do log: cursores anteriores precisam de snapshot
+        values[Raffle.ticket_log_start] = Raffle.ticket_version + 1
+    db.session.query(Raffle).filter(Raffle.id == raffle_id).update(values, synchronize_session=False)
+
+    if numbers is not None:
+        record_ticket_changes(raffle_id, changes)
+
+def ticket_versions(raffle_ids: Iterable[int]) -> Dict[int, int]:
+    """
+    ticket_version das rifas lida na transação corrente
+
+    Chamada antes do commit, já inclui os incrementos da própria transação:
+    é a versão a informar ao índice de disponibilidade junto com as
+    mudanças (services/raffle_availability.py).
+    """
+    raffle_ids = list(raffle_ids)
+    if not raffle_ids:
+        return {}
+    rows = db.session.query(Raffle.id, Raffle.ticket_version).filter(Raffle.id.in_(raffle_ids))
+    return {raffle_id: version or 0 for raffle_id, version in rows}
+
+def reconcile_raffle_counters(fix: bool = False) -> List[Dict[str, Any]]:
+    """
+    Recalcular os contadores de todas as rifas a partir dos tickets
+
+    Args:
+        fix: se True, grava os valores recalculados
+
+    Returns:
+        Lista com as rifas cujos contadores divergem dos tickets
+    """
+    raffles = Raffle.query.order_by(Raffle.id).all()
+    stats = get_raffle_stats(raffle.id for raffle in raffles)
+
+    drift = []
+    for raffle in raffles:
+        expected = stats[raffle.id]
+        current = {
+            'sold': raffle.sold_count or 0,
+            'pending': raffle.reserved_count or 0,
+            'revenue': float(raffle.revenue or 0)
+        }
+        if current == expected:
+            continue
+
+        drift.append({'raffle_id': raffle.id, 'current': current, 'expected': expected})
+        if fix:
+            db.session.query(Raffle).filter(Raffle.id == raffle.id).update({
+                Raffle.sold_count: expected['sold'],
+                Raffle.reserved_count: expected['pending'],
+                Raffle.revenue: expected['revenue'],
+                Raffle.updated_at: Raffle.updated_at
+            }, synchronize_session=False)
+
+    if fix and drift:
+        db.session.commit()
+        logger.info(f"Contadores corrigidos em {len(drift)} rifa(s)")
+
+    return drift
@@ -0,0 +1,354 @@
+"""
+Ticket Reservation Service
+Reserva atômica de números de rifa com um único INSERT ... ON CONFLICT,
+com prazo de expiração e liberação em lote das reservas vencidas
+"""
+
+import os
+import random
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Iterable, Optional
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql, sqlite
+import logging
+
+from src.models.user import db
+from src.models.raffle import RaffleTicket
+from src.services.raffle_stats import apply_ticket_transitions, ticket_versions
+from src.services.raffle_changes import prune_ticket_changes
+from src.services.raffle_availability import availability_index
+from src.services.raffle_events import raffle_events
+from src.services.cache_backend import invalidate_cache_tags
+
+logger = logging.getLogger(__name__)
+
+# Status que ainda ocupam o número; os demais (failed, cancelled...) podem
+# ser reaproveitados por uma nova reserva
+HOLDING_STATUSES = ('pending', 'completed')
+
+# Status atribuído às reservas vencidas (libera o número)
+EXPIRED_STATUS = 'expired'
+
+# Máximo de números sorteados em uma única compra
+MAX_RANDOM_TICKETS = 1000
+
+# Rodadas de sorteio para repor números perdidos para outros compradores
+RANDOM_CLAIM_ROUNDS = 3
+
+# Linhas por INSERT, para ficar abaixo do limite de parâmetros do SQLite
+CLAIM_BATCH_SIZE = 500
+
+_INSERT_BY_DIALECT = {
+    'sqlite': sqlite.insert,
+    'postgresql': postgresql.insert
+}
+
+class ReservationService:
+    """Serviço de reserva de números de rifa"""
+
+    def __init__(self):
+        # Tempo que um número fica reservado aguardando pagamento
+        self.ttl_minutes = int(os.getenv('RAFFLE_RESERVATION_TTL_MINUTES', '30'))
+
+    def _insert(self):
+        """INSERT com suporte a ON CONFLICT para o banco em uso"""
+        dialect = db.engine.dialect.name
+        if dialect not in _INSERT_BY_DIALECT:
+            raise RuntimeError(f'Banco de dados não suportado para reservas: {dialect}')
+        return _INSERT_BY_DIALECT[dialect](RaffleTicket)
+
+    def _expire_where(self, now: datetime):
+        """Condição de reserva pendente vencida"""
+        return (
+            (RaffleTicket.payment_status == 'pending')
+            & RaffleTicket.reserved_until.isnot(None)
+            & (RaffleTicket.reserved_until <= now)
+        )
+
+    def _release(self, condition, now: datetime) -> Dict[int, List[int]]:
+        """
+        Marcar como expiradas as reservas vencidas que atendem à condição,
+        atualizando os contadores (sem commit)
+
+        Returns:
+            Dict raffle_id -> números liberados
+        """
+        stmt = update(RaffleTicket).where(condition, self._expire_where(now)).values(
+            payment_status=EXPIRED_STATUS
+        ).returning(RaffleTicket.raffle_id, RaffleTicket.ticket_number).execution_options(
+            synchronize_session=False
+        )
+
+        released = defaultdict(list)
+        for raffle_id, ticket_number in db.session.execute(stmt):
+            released[raffle_id].append(ticket_number)
+
+        for raffle_id, numbers in released.items():
+            apply_ticket_transitions(raffle_id, [('pending', EXPIRED_STATUS)] * len(numbers), numbers)
+
+        return released
+
+    def claim(self, raffle_id: int, numbers: Iterable[int], buyer: Dict[str, Any],
+              reserved_until: Optional[datetime] = None) -> Dict[int, int]:
+        """
+        Reivindicar números na transação corrente (sem commit)
+
+        Os números livres são inseridos e os ocupados por tickets liberados
+        (failed, cancelled, expired...) são reaproveitados; os ocupados por
+        reservas válidas ou vendas ficam de fora. Reservas vencidas desses
+        números são liberadas antes, na mesma transação.
+
+        Args:
+            raffle_id: ID da rifa
+            numbers: números desejados (já validados)
+            buyer: buyer_name, buyer_email e buyer_phone
+            reserved_until: prazo da reserva (padrão: agora + TTL)
+
+        Returns:
+            Dict ticket_number -> id dos tickets efetivamente reservados
+        """
+        numbers = list(numbers)
+        now = datetime.utcnow()
+        if reserved_until is None:
+            reserved_until = now + timedelta(minutes=self.ttl_minutes)
+
+        for start in range(0, len(numbers), CLAIM_BATCH_SIZE):
+            self._release(
+                (RaffleTicket.raffle_id == raffle_id)
+                & RaffleTicket.ticket_number.in_(numbers[start:start + CLAIM_BATCH_SIZE]),
+                now
+            )
+
+        rows = [{
+            'raffle_id': raffle_id,
+            'ticket_number': number,
+            'buyer_name': buyer.get('buyer_name'),
+            'buyer_email': buyer.get('buyer_email'),
+            'buyer_phone': buyer.get('buyer_phone'),
+            'payment_status': 'pending',
+            'payment_id': None,
+            'purchased_at': None,
+            'reserved_until': reserved_until
+        } for number in numbers]
+        won = {}
+        for start in range(0, len(rows), CLAIM_BATCH_SIZE):
+            won.update(self._claim_batch(rows[start:start + CLAIM_BATCH_SIZE]))
+
+        # Números reaproveitados não estavam nos contadores (status liberado)
+        apply_ticket_transitions(raffle_id, [(None, 'pending')] * len(won), list(won))
+        return won
+
+    def _claim_batch(self, rows: List[Dict[str, Any]]) -> Dict[int, int]:
+        """Executar o INSERT ... ON CONFLICT de um lote de números"""
+        stmt = self._insert().values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[RaffleTicket.raffle_id, RaffleTicket.ticket_number],
+            set_={
+                'buyer_name': stmt.excluded.buyer_name,
+                'buyer_email': stmt.excluded.buyer_email,
+                'buyer_phone': stmt.excluded.buyer_phone,
+                'payment_status': stmt.excluded.payment_status,
+                'reserved_until': stmt.excluded.reserved_until,
+                'payment_id': None,
+                'purchased_at': None
+            },
+            where=RaffleTicket.payment_status.notin_(HOLDING_STATUSES)
+        ).returning(RaffleTicket.ticket_number, RaffleTicket.id)
+
+        return {number: ticket_id for number, ticket_id in db.session.execute(stmt)}
+
+    def reserve(self, raffle_id: int, numbers: List[int], buyer: Dict[str, Any],
+                allow_partial: bool = False) -> Dict[str, Any]:
+        """
+        Reservar números e confirmar a transação
+
+        Args:
+            raffle_id: ID da rifa
+            numbers: números desejados (já validados)
+            buyer: buyer_name, buyer_email e buyer_phone
+            allow_partial: se False, nada é reservado quando algum número
+                já estiver ocupado
+
+        Returns:
+            Dict com 'won' (números reservados), 'lost' (números indisponíveis),
+            'ticket_ids' (IDs dos tickets reservados, na ordem de 'won') e
+            'reserved_until' (prazo para pagamento)
+        """
+        reserved_until = datetime.utcnow() + timedelta(minutes=self.ttl_minutes)
+        try:
+            claimed = self.claim(raffle_id, numbers, buyer, reserved_until)
+            won = sorted(claimed)
+            lost = sorted(number for number in numbers if number not in claimed)
+
+            if lost and (not allow_partial or not won):
+                db.session.rollback()
+                return {'won': [], 'lost': lost, 'ticket_ids': [], 'reserved_until': None}
+
+            version = ticket_versions([raffle_id]).get(raffle_id)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        availability_index.mark(raffle_id, won, 'pending', reserved_until, version)
+        raffle_events.publish(raffle_id, won, 'pending')
+        invalidate_cache_tags('raffles', f'raffle:{raffle_id}')
+        logger.debug(f"Rifa {raffle_id}: reservados {len(won)}, indisponíveis {len(lost)}")
+        return {
+            'won': won,
+            'lost': lost,
+            'ticket_ids': [claimed[number] for number in won],
+            'reserved_until': reserved_until
+        }
+
+    def reserve_random(self, raffle, quantity: int, buyer: Dict[str, Any],
+                       allow_partial: bool = False) -> Dict[str, Any]:
+        """
+        Reservar quantity números sorteados pelo servidor ("surpresinha")
+
+        Os números são sorteados no índice de disponibilidade sem montar a
+        lista de livres e reivindicados com o mesmo INSERT ... ON CONFLICT
+        de reserve(); os perdidos para outros compradores são repostos em
+        novas rodadas, tudo na mesma transação.
+
+        Args:
+            raffle: rifa
+            quantity: quantidade de números desejada
+            buyer: buyer_name, buyer_email e buyer_phone
+            allow_partial: se False, nada é reservado quando não houver
+                quantity números disponíveis
+
+        Returns:
+            Mesmo formato de reserve(), com 'lost' (números sorteados que outro
+            comprador levou) e 'missing' (quantidade que não pôde ser reservada)
+        """
+        rng = random.SystemRandom()
+        reserved_until = datetime.utcnow() + timedelta(minutes=self.ttl_minutes)
+        claimed: Dict[int, int] = {}
+        tried = set()
+
+        try:
+            for _ in range(RANDOM_CLAIM_ROUNDS):
+                missing = quantity - len(claimed)
+                if missing <= 0:
+                    break
+
+                availability = availability_index.get(raffle)
+                numbers = availability.sample_free(missing, rng, exclude=tried)
+                if not numbers:
+                    break
+
+                tried.update(numbers)
+                round_claimed = self.claim(raffle.id, numbers, buyer, reserved_until)
+                claimed.update(round_claimed)
+
+                if len(round_claimed) < len(numbers):
+                    # Índice local desatualizado (escritas de outro processo):
+                    # reconstruir a partir do banco antes da próxima rodada
+                    availability_index.invalidate(raffle.id)
+
+            missing = quantity - len(claimed)
+            if missing > 0 and (not allow_partial or not claimed):
+                db.session.rollback()
+                # O índice pode ter sido reconstruído com as reservas desfeitas
+                availability_index.invalidate(raffle.id)
+                return {'won': [], 'lost': [], 'missing': missing, 'ticket_ids': [], 'reserved_until': None}
+
+            version = ticket_versions([raffle.id]).get(raffle.id)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            availability_index.invalidate(raffle.id)
+            raise
+
+        won = sorted(claimed)
+        availability_index.mark(raffle.id, won, 'pending', reserved_until, version)
+        raffle_events.publish(raffle.id, won, 'pending')
+        invalidate_cache_tags('raffles', f'raffle:{raffle.id}')
+        return {
+            'won': won,
+            'lost': sorted(tried - set(claimed)),
+            'missing': quantity - len(won),
+            'ticket_ids': [claimed[number] for number in won],
+            'reserved_until': reserved_until
+        }
+
+    def release_expired(self, batch_size: int = 500, now: Optional[datetime] = None) -> int:
+        """
+        Liberar reservas vencidas em lotes, com um commit por lote
+
+        Args:
+            batch_size: reservas por lote
+            now: instante de referência (padrão: agora)
+
+        Returns:
+            Total de reservas liberadas
+        """
+        now = now or datetime.utcnow()
+        total = 0
+
+        while True:
+            # Busca pelo índice (payment_status, reserved_until)
+            ids = [row[0] for row in db.session.query(RaffleTicket.id).filter(
+                self._expire_where(now)
+            ).order_by(RaffleTicket.reserved_until).limit(batch_size)]
+            if not ids:
+                break
+
+            try:
+                released = self._release(RaffleTicket.id.in_(ids), now)
+                versions = ticket_versions(released)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+
+            for raffle_id, numbers in released.items():
+                availability_index.mark(raffle_id, numbers, EXPIRED_STATUS, version=versions.get(raffle_id))
+                raffle_events.publish(raffle_id, numbers, EXPIRED_STATUS)
+                invalidate_cache_tags('raffles', f'raffle:{raffle_id}')
+                total += len(numbers)
+
+            if len(ids) < batch_size:
+                break
+
+        if total:
+            logger.info(f"{total} reserva(s) vencida(s) liberada(s)")
+        return total
+
+# Instância global do serviço
+reservation_service = ReservationService()
+
+class ReservationSweeper(threading.Thread):
+    """Thread que libera periodicamente as reservas vencidas e poda o log de mudanças"""
+
+    def __init__(self, app, interval: int):
+        super().__init__(name='reservation-sweeper', daemon=True)
+        self.app = app
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                with self.app.app_context():
+                    reservation_service.release_expired()
+                    prune_ticket_changes()
+            except Exception as e:
+                logger.error(f"Erro ao liberar reservas vencidas: {e}")
+
+    def stop(self):
+        self._stop_event.set()
+
+def start_reservation_sweeper(app) -> Optional[ReservationSweeper]:
+    """Iniciar o sweeper se RESERVATION_SWEEPER_INTERVAL (segundos) for maior que zero"""
+    interval = int(os.getenv('RESERVATION_SWEEPER_INTERVAL', '60'))
+    if interval <= 0:
+        return None
+
+    sweeper = ReservationSweeper(app, interval)
+    sweeper.start()
+    return sweeper
+
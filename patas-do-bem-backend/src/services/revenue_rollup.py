@@ -0,0 +1,191 @@
+"""
+Revenue Rollups
+Totais diários de doações (dia × tipo × método × status) e de números de
+rifa vendidos, mantidos incrementalmente a cada flush da sessão, para os
+relatórios somarem dias em vez de varrer doações e tickets
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+from typing import Dict, Optional, Tuple
+from sqlalchemy import event, func, insert, delete, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import attributes
+import logging
+
+from src.models.user import db
+from src.models.donation import Donation, DonationDailyTotal
+from src.models.raffle import Raffle, RaffleTicket, RaffleTicketDailyTotal
+
+logger = logging.getLogger(__name__)
+
+# Atributos que definem a linha de totais de uma doação
+DONATION_KEY = ('created_at', 'donation_type', 'payment_method', 'payment_status')
+
+# Colunas da chave em donation_daily_totals, na ordem de DONATION_KEY
+DONATION_TOTAL_KEY = ('day', 'donation_type', 'payment_method', 'payment_status')
+
+_INSERT_BY_DIALECT = {
+    'sqlite': sqlite.insert,
+    'postgresql': postgresql.insert
+}
+
+def _keep_old_value(target, value, oldvalue, initiator):
+    """Listener vazio: active_history carrega o valor anterior ao alterar"""
+
+# Sem o valor anterior no histórico, não há como descontar a linha antiga
+for _attribute in (Donation.amount, Donation.created_at, Donation.donation_type,
+                   Donation.payment_method, Donation.payment_status,
+                   RaffleTicket.payment_status, RaffleTicket.purchased_at):
+    event.listen(_attribute, 'set', _keep_old_value, active_history=True)
+
+def _old_value(obj, name):
+    """Valor do atributo antes das alterações gravadas neste flush"""
+    history = attributes.get_history(obj, name)
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(obj, name)
+
+def _donation_row(values: Dict) -> Optional[Tuple[Tuple, Decimal]]:
+    """(chave da linha de totais, valor) de uma doação, ou None se incompleta"""
+    if any(values[name] is None for name in DONATION_KEY) or values['amount'] is None:
+        return None
+    key = (values['created_at'].date(), values['donation_type'],
+           values['payment_method'], values['payment_status'])
+    return key, Decimal(str(values['amount']))
+
+def _ticket_row(status, purchased_at, ticket) -> Optional[Tuple[object, Decimal]]:
+    """(dia, preço) de um ticket vendido, ou None se não conta como venda"""
+    if status != 'completed' or purchased_at is None:
+        return None
+    return purchased_at.date(), Decimal(str(ticket.raffle.ticket_price))
+
+def _collect_deltas(session):
+    """Variações dos totais causadas pelas doações e tickets deste flush"""
+    donation_deltas = defaultdict(lambda: [0, Decimal(0)])
+    ticket_deltas = defaultdict(lambda: [0, Decimal(0)])
+
+    def add(deltas, row, sign):
+        if row is not None:
+            key, amount = row
+            deltas[key][0] += sign
+            deltas[key][1] += sign * amount
+
+    for obj in session.new:
+        if isinstance(obj, Donation):
+            add(donation_deltas, _donation_row({name: getattr(obj, name) for name in (*DONATION_KEY, 'amount')}), 1)
+        elif isinstance(obj, RaffleTicket):
+            add(ticket_deltas, _ticket_row(obj.payment_status, obj.purchased_at, obj), 1)
+
+    for obj in session.dirty:
+        if isinstance(obj, Donation):
+            names = (*DONATION_KEY, 'amount')
+            old = _donation_row({name: _old_value(obj, name) for name in names})
+            new = _donation_row({name: getattr(obj, name) for name in names})
+            if old != new:
+                add(donation_deltas, old, -1)
+                add(donation_deltas, new, 1)
+        elif isinstance(obj, RaffleTicket):
+            old = _ticket_row(_old_value(obj, 'payment_status'), _old_value(obj, 'purchased_at'), obj)
+            new = _ticket_row(obj.payment_status, obj.purchased_at, obj)
+            if old != new:
+                add(ticket_deltas, old, -1)
+                add(ticket_deltas, new, 1)
+
+    for obj in session.deleted:
+        if isinstance(obj, Donation):
+            add(donation_deltas, _donation_row({name: _old_value(obj, name) for name in (*DONATION_KEY, 'amount')}), -1)
+        elif isinstance(obj, RaffleTicket):
+            add(ticket_deltas, _ticket_row(_old_value(obj, 'payment_status'), _old_value(obj, 'purchased_at'), obj), -1)
+
+    return donation_deltas, ticket_deltas
+
+def _upsert(session, model, key_columns, count_column, amount_column, deltas):
+    """Somar as variações às linhas de totais (INSERT ... ON CONFLICT relativo)"""
+    rows = []
+    for key, (count, amount) in deltas.items():
+        if count == 0 and amount == 0:
+            continue
+        key = key if isinstance(key, tuple) else (key,)
+        row = dict(zip(key_columns, key))
+        row[count_column] = count
+        row[amount_column] = amount
+        rows.append(row)
+    if not rows:
+        return
+
+    dialect = session.get_bind().dialect.name
+    if dialect not in _INSERT_BY_DIALECT:
+        raise RuntimeError(f'Banco de dados não suportado para os totais diários: {dialect}')
+
+    table = model.__table__
+    stmt = _INSERT_BY_DIALECT[dialect](table).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c[name] for name in key_columns],
+        set_={
+            count_column: table.c[count_column] + stmt.excluded[count_column],
+            amount_column: table.c[amount_column] + stmt.excluded[amount_column]
+        }
+    )
+    session.execute(stmt)
+
+@event.listens_for(db.session, 'after_flush')
+def update_revenue_rollups(session, flush_context):
+    """
+    Atualizar os totais diários na mesma transação das alterações
+
+    Cobre doações e tickets gravados pelo ORM (add, alteração de atributos e
+    delete, inclusive em cascata). Os UPDATE/INSERT em lote das reservas
+    (services/reservation_service.py) só mexem em tickets pendentes ou
+    liberados, que não entram nos totais; qualquer outra escrita em lote
+    em doações ou tickets vendidos precisa de `flask backfill-rollups`.
+    """
+    donation_deltas, ticket_deltas = _collect_deltas(session)
+    _upsert(session, DonationDailyTotal, DONATION_TOTAL_KEY, 'donation_count', 'amount', donation_deltas)
+    _upsert(session, RaffleTicketDailyTotal, ('day',), 'tickets_sold', 'revenue', ticket_deltas)
+
+def rebuild_revenue_rollups(connection) -> Dict[str, int]:
+    """
+    Recalcular os totais diários a partir das doações e tickets (sem commit)
+
+    Usada pela migração que cria as tabelas e por `flask backfill-rollups`.
+
+    Args:
+        connection: conexão (ou sessão) na transação corrente
+
+    Returns:
+        Quantidade de linhas de totais geradas por tabela
+    """
+    connection.execute(delete(DonationDailyTotal))
+    connection.execute(delete(RaffleTicketDailyTotal))
+
+    day = func.date(Donation.created_at)
+    donations = select(
+        day, Donation.donation_type, Donation.payment_method, Donation.payment_status,
+        func.count(Donation.id), func.sum(Donation.amount)
+    ).where(
+        Donation.created_at.isnot(None),
+        Donation.payment_status.isnot(None)
+    ).group_by(day, Donation.donation_type, Donation.payment_method, Donation.payment_status)
+    connection.execute(insert(DonationDailyTotal).from_select(
+        [*DONATION_TOTAL_KEY, 'donation_count', 'amount'], donations
+    ))
+
+    day = func.date(RaffleTicket.purchased_at)
+    tickets = select(
+        day, func.count(RaffleTicket.id), func.sum(Raffle.ticket_price)
+    ).join(Raffle, Raffle.id == RaffleTicket.raffle_id).where(
+        RaffleTicket.payment_status == 'completed',
+        RaffleTicket.purchased_at.isnot(None)
+    ).group_by(day)
+    connection.execute(insert(RaffleTicketDailyTotal).from_select(
+        ['day', 'tickets_sold', 'revenue'], tickets
+    ))
+
+    counts = {
+        'donations': connection.execute(select(func.count()).select_from(DonationDailyTotal)).scalar(),
+        'tickets': connection.execute(select(func.count()).select_from(RaffleTicketDailyTotal)).scalar()
+    }
+    logger.info(f"Totais diários recalculados: {counts['donations']} linha(s) de doações, "
+                f"{counts['tickets']} de rifas")
+    return counts
@@ -1,6 +1,19 @@
 import pytest
 import os
 import tempfile
+from sqlalchemy import event
+
+# Sweeper de reservas em thread desativado nos testes
+os.environ.setdefault('RESERVATION_SWEEPER_INTERVAL', '0')
+# Banco temporário criado pelas migrações ao importar a aplicação
+os.environ.setdefault('AUTO_MIGRATE', 'true')
+
+# Banco dos testes: TEST_DATABASE_URL (ex.: Postgres local) ou um SQLite
+# temporário, nunca o src/database/app.db de desenvolvimento
+_test_db_fd, _test_db_path = tempfile.mkstemp(suffix='.db')
+os.close(_test_db_fd)
+os.environ['DATABASE_URL'] = os.getenv('TEST_DATABASE_URL') or f'sqlite:///{_test_db_path}'
+
 from src.main import app
 from src.models.user import db
 from src.models.donation import Donation
@@ -8,6 +21,13 @@ from src.models.raffle import Raffle, RaffleTicket
 from src.models.contact import ContactMessage
 from src.models.admin import Admin
 from src.services.auth_service import auth_service
+from src.services.raffle_availability import availability_index
+from src.services.cache_backend import get_cache_backend
+
+def pytest_sessionfinish(session, exitstatus):
+    """Remover o banco SQLite temporário dos testes"""
+    if os.path.exists(_test_db_path):
+        os.unlink(_test_db_path)
 
 @pytest.fixture
 def client():
@@ -15,8 +35,9 @@ def client():
     # Criar banco temporário
     db_fd, app.config['DATABASE'] = tempfile.mkstemp()
     app.config['TESTING'] = True
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
     app.config['WTF_CSRF_ENABLED'] = False
+    availability_index.clear()
+    get_cache_backend().clear()
     
     with app.test_client() as client:
         with app.app_context():
@@ -115,4 +136,16 @@ def admin_token(admin_user):
 @pytest.fixture
 def auth_headers(admin_token):
     """Headers de autenticação para requisições"""
-    return {'Authorization': f'Bearer {admin_token}'}
\ No newline at end of file
+    return {'Authorization': f'Bearer {admin_token}'}
+
+@pytest.fixture
+def query_counter(client):
+    """Conta as instruções SQL executadas durante o teste"""
+    statements = []
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    yield statements
+    event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
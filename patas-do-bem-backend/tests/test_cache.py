@@ -0,0 +1,410 @@
+import pytest
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from src.main import app
+from src.models.user import db
+from src.services.cache_backend import MemoryCacheBackend, SQLiteCacheBackend, get_cache_backend
+from src.middleware import cache as cache_middleware
+from src.middleware.cache import get_cache_stats, reset_cache_stats
+from src.services.raffle_availability import availability_index
+from src.services.reservation_service import reservation_service
+from src.services.payment_service import payment_service
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def backend(request, tmp_path):
+    """Cada backend de cache, vazio"""
+    if request.param == 'memory':
+        return MemoryCacheBackend(max_entries=3)
+    return SQLiteCacheBackend(str(tmp_path / 'cache.db'), max_entries=3)
+
+class TestCacheBackends:
+    """Testes comuns aos backends de cache"""
+    
+    def test_set_and_get(self, backend):
+        """Valor armazenado é devolvido até expirar"""
+        backend.set('raffles:GET:/api/raffles?', {'body': b'[]'}, ttl=60)
+        
+        assert backend.get('raffles:GET:/api/raffles?') == {'body': b'[]'}
+        assert backend.get('outra') is None
+    
+    def test_expired_entry(self, backend):
+        """Entrada com TTL vencido não é devolvida"""
+        backend.set('chave', 'valor', ttl=0.01)
+        time.sleep(0.02)
+        
+        assert backend.get('chave') is None
+    
+    def test_invalidate_tags(self, backend):
+        """Invalidação por tag remove só as entradas associadas"""
+        backend.set('lista', 1, ttl=60, tags=['raffles'])
+        backend.set('rifa-42', 2, ttl=60, tags=['raffles', 'raffle:42'])
+        backend.set('rifa-7', 3, ttl=60, tags=['raffles', 'raffle:7'])
+        
+        assert backend.invalidate_tags('raffle:42') == 1
+        
+        assert backend.get('rifa-42') is None
+        assert backend.get('rifa-7') == 3
+        assert backend.get('lista') == 1
+    
+    def test_invalidate_pattern(self, backend):
+        """Invalidação por padrão encontra a rota na chave"""
+        backend.set('get_raffle:GET:/api/raffles/42?', 1, ttl=60)
+        backend.set('donation_stats:GET:/api/donations/stats?', 2, ttl=60)
+        
+        assert backend.invalidate_pattern('/api/raffles/') == 1
+        assert backend.get('donation_stats:GET:/api/donations/stats?') == 2
+    
+    def test_lru_eviction(self, backend):
+        """Acima do limite sai a entrada usada há mais tempo"""
+        backend.set('a', 1, ttl=60)
+        time.sleep(0.01)
+        backend.set('b', 2, ttl=60)
+        time.sleep(0.01)
+        backend.set('c', 3, ttl=60)
+        time.sleep(0.01)
+        backend.get('a')
+        time.sleep(0.01)
+        backend.set('d', 4, ttl=60)
+        
+        assert backend.get('b') is None
+        assert backend.get('a') == 1
+        assert backend.stats()['total_entries'] == 3
+
+class TestMemoryCacheBounds:
+    """Limites e contabilidade de bytes do LRU em memória"""
+    
+    def test_byte_accounting(self):
+        """Bytes contados a partir dos corpos armazenados"""
+        backend = MemoryCacheBackend()
+        backend.set('a', {'body': b'x' * 1000, 'mimetype': 'application/json'}, ttl=60)
+        
+        assert backend.stats()['bytes'] == len('a') + 1000 + len('application/json')
+        
+        backend.delete('a')
+        assert backend.stats()['bytes'] == 0
+    
+    def test_max_bytes_evicts_lru(self):
+        """Acima do limite de bytes saem as entradas menos usadas"""
+        backend = MemoryCacheBackend(max_entries=100, max_bytes=3000)
+        backend.set('a', b'x' * 1000, ttl=60)
+        backend.set('b', b'x' * 1000, ttl=60)
+        backend.get('a')
+        backend.set('c', b'x' * 1500, ttl=60)
+        
+        assert backend.get('b') is None
+        assert backend.get('a') is not None
+        stats = backend.stats()
+        assert stats['bytes'] <= 3000
+        assert stats['evictions'] == 1
+    
+    def test_oversized_entry_not_stored(self):
+        """Entrada maior que o limite não é armazenada"""
+        backend = MemoryCacheBackend(max_bytes=100)
+        backend.set('grande', b'x' * 200, ttl=60)
+        
+        assert backend.get('grande') is None
+        assert backend.stats()['bytes'] == 0
+    
+    def test_expired_entries_released_without_reads(self):
+        """Entradas vencidas liberam memória mesmo sem serem lidas"""
+        backend = MemoryCacheBackend()
+        for i in range(10):
+            backend.set(f'curta-{i}', b'x' * 100, ttl=0.01)
+        time.sleep(0.02)
+        backend.set('longa', b'x' * 100, ttl=60)
+        
+        stats = backend.stats()
+        assert stats['total_entries'] == 1
+        assert stats['expired'] == 10
+        assert stats['bytes'] == len('longa') + 100
+
+class TestSharedCache:
+    """Backend SQLite compartilhado entre processos"""
+    
+    def test_invalidation_is_shared(self, tmp_path):
+        """Invalidação em um worker vale para os outros"""
+        path = str(tmp_path / 'cache.db')
+        worker_a = SQLiteCacheBackend(path)
+        worker_b = SQLiteCacheBackend(path)
+        
+        worker_a.set('rifa-42', 'detalhes', ttl=60, tags=['raffle:42'])
+        assert worker_b.get('rifa-42') == 'detalhes'
+        
+        worker_b.invalidate_tags('raffle:42')
+        assert worker_a.get('rifa-42') is None
+
+class TestWritePathInvalidation:
+    """Escritas em rifas e doações invalidam as tags correspondentes"""
+    
+    def test_ticket_purchase_invalidates_raffle(self, client, create_sample_raffle, sample_ticket_data):
+        """Compra de números invalida o cache da rifa"""
+        raffle = create_sample_raffle
+        backend = get_cache_backend()
+        backend.set('detalhe', 'antigo', ttl=60, tags=[f'raffle:{raffle.id}'])
+        backend.set('outra', 'mantido', ttl=60, tags=['raffle:999'])
+        
+        response = client.post(f'/api/raffles/{raffle.id}/tickets',
+                               data=json.dumps(sample_ticket_data),
+                               content_type='application/json')
+        
+        assert response.status_code == 201
+        assert backend.get('detalhe') is None
+        assert backend.get('outra') == 'mantido'
+    
+    def test_donation_confirm_invalidates_donations(self, client, create_sample_donation):
+        """Confirmação de doação invalida as respostas de doações"""
+        backend = get_cache_backend()
+        backend.set('estatisticas', 'antigo', ttl=60, tags=['donations'])
+        
+        response = client.post(f'/api/donations/{create_sample_donation.id}/confirm',
+                               data=json.dumps({'status': 'completed'}),
+                               content_type='application/json')
+        
+        assert response.status_code == 200
+        assert backend.get('estatisticas') is None
+
+class TestCachedEndpoints:
+    """Endpoints públicos servidos do cache"""
+    
+    @pytest.mark.parametrize('url', [
+        '/api/config',
+        '/api/raffles',
+        '/api/raffles/{raffle_id}',
+        '/api/donations/stats',
+        '/api/donations/history'
+    ])
+    def test_second_request_hits_cache(self, client, create_sample_raffle, query_counter, url):
+        """Segunda requisição não consulta o banco"""
+        url = url.format(raffle_id=create_sample_raffle.id)
+        first = client.get(url)
+        query_counter.clear()
+        
+        second = client.get(url)
+        
+        assert second.status_code == 200
+        assert second.data == first.data
+        assert query_counter == []
+    
+    def test_ticket_confirmation_refreshes_raffle(self, client, create_sample_raffle, sample_ticket_data):
+        """Confirmação de pagamento atualiza a lista e os detalhes da rifa"""
+        raffle_id = create_sample_raffle.id
+        client.post(f'/api/raffles/{raffle_id}/tickets',
+                    data=json.dumps(sample_ticket_data), content_type='application/json')
+        client.get('/api/raffles')
+        client.get(f'/api/raffles/{raffle_id}')
+        
+        client.post(f'/api/raffles/{raffle_id}/tickets/confirm',
+                    data=json.dumps({'ticket_numbers': [1, 5], 'status': 'completed'}),
+                    content_type='application/json')
+        
+        raffles = json.loads(client.get('/api/raffles').data)['raffles']
+        assert raffles[0]['sold_numbers'] == 2
+        raffle = json.loads(client.get(f'/api/raffles/{raffle_id}').data)['raffle']
+        assert raffle['sold_numbers'] == [1, 5]
+    
+    def test_donation_confirmation_refreshes_stats(self, client, create_sample_donation):
+        """Confirmação de doação atualiza as estatísticas públicas"""
+        stats = json.loads(client.get('/api/donations/stats').data)
+        assert stats['total_amount'] == 0
+        
+        client.post(f'/api/donations/{create_sample_donation.id}/confirm',
+                    data=json.dumps({'status': 'completed'}), content_type='application/json')
+        
+        stats = json.loads(client.get('/api/donations/stats').data)
+        assert stats['total_amount'] == 50.0
+    
+    @pytest.mark.parametrize('url, method, result', [
+        ('/api/payments/credit-card', 'create_credit_card_payment',
+         {'success': True, 'payment_id': 'CARD1', 'status': 'completed', 'amount': 30.0}),
+        ('/api/payments/recurring', 'create_recurring_payment',
+         {'success': True, 'subscription_id': 'SUB1', 'status': 'completed', 'amount': 30.0})
+    ])
+    def test_card_payment_refreshes_stats(self, client, monkeypatch, url, method, result):
+        """Doação paga com cartão atualiza as estatísticas públicas"""
+        monkeypatch.setattr(payment_service, method, lambda **kwargs: result)
+        assert json.loads(client.get('/api/donations/stats').data)['total_amount'] == 0
+        
+        response = client.post(url, data=json.dumps({
+            'amount': 30.0, 'description': 'Doação', 'card_token': 'tok', 'payer_email': 'ana@example.com',
+            'payer_first_name': 'Ana', 'type': 'donation'
+        }), content_type='application/json')
+        
+        assert response.status_code == 200
+        stats = json.loads(client.get('/api/donations/stats').data)
+        assert stats['total_amount'] == 30.0
+    
+    def test_hit_ratio(self, client):
+        """Taxa de acertos geral e por endpoint em get_cache_stats"""
+        reset_cache_stats()
+        for _ in range(4):
+            client.get('/api/config')
+        
+        stats = get_cache_stats()
+        
+        assert stats['hits'] == 3
+        assert stats['misses'] == 1
+        assert stats['hit_ratio'] == 0.75
+        assert stats['endpoints']['get_public_config'] == {'hits': 3, 'misses': 1, 'hit_ratio': 0.75}
+
+class TestConditionalRequests:
+    """Respostas 304 com ETag para rifas e configuração"""
+    
+    @pytest.mark.parametrize('url', [
+        '/api/config',
+        '/api/raffles/{raffle_id}',
+        '/api/raffles/{raffle_id}/numbers'
+    ])
+    def test_if_none_match_returns_304(self, client, create_sample_raffle, url):
+        """Cliente com a versão atual recebe 304 sem corpo"""
+        url = url.format(raffle_id=create_sample_raffle.id)
+        first = client.get(url)
+        etag = first.headers['ETag']
+        
+        second = client.get(url, headers={'If-None-Match': etag})
+        
+        assert second.status_code == 304
+        assert second.data == b''
+        assert second.headers['ETag'] == etag
+    
+    def test_numbers_304_skips_tickets(self, client, create_sample_raffle, query_counter):
+        """304 dos números não consulta os tickets"""
+        url = f'/api/raffles/{create_sample_raffle.id}/numbers'
+        etag = client.get(url).headers['ETag']
+        query_counter.clear()
+        
+        response = client.get(url, headers={'If-None-Match': etag})
+        
+        assert response.status_code == 304
+        assert not [statement for statement in query_counter if 'raffle_tickets' in statement]
+    
+    def test_etag_changes_with_tickets(self, client, create_sample_raffle, sample_ticket_data):
+        """Reserva e confirmação de números geram uma nova versão"""
+        raffle_id = create_sample_raffle.id
+        url = f'/api/raffles/{raffle_id}/numbers'
+        etags = [client.get(url).headers['ETag']]
+        
+        client.post(f'/api/raffles/{raffle_id}/tickets',
+                    data=json.dumps(sample_ticket_data), content_type='application/json')
+        etags.append(client.get(url).headers['ETag'])
+        client.post(f'/api/raffles/{raffle_id}/tickets/confirm',
+                    data=json.dumps({'ticket_numbers': [1, 5], 'status': 'completed'}),
+                    content_type='application/json')
+        etags.append(client.get(url).headers['ETag'])
+        
+        assert len(set(etags)) == 3
+        response = client.get(url, headers={'If-None-Match': etags[0]})
+        assert response.status_code == 200
+        assert json.loads(response.data)['sold_numbers'] == [1, 5]
+    
+    def test_etag_matches_body_after_other_process_write(self, client, create_sample_raffle):
+        """ETag e 'version' do corpo vêm do mesmo estado, mesmo com escrita de outro processo"""
+        raffle_id = create_sample_raffle.id
+        url = f'/api/raffles/{raffle_id}/numbers'
+        old_etag = client.get(url).headers['ETag']
+        # Outro processo: grava a reserva sem avisar o índice local
+        reservation_service.claim(raffle_id, [7], {'buyer_name': 'Ana', 'buyer_email': 'ana@example.com'})
+        db.session.commit()
+        
+        response = client.get(url, headers={'If-None-Match': old_etag})
+        
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['reserved_numbers'] == [7]
+        assert data['version'] == create_sample_raffle.ticket_version
+        assert f'raffle-{raffle_id}-{data["version"]}-' in response.headers['ETag']
+        assert client.get(url, headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+    
+    def test_etag_changes_when_reservation_expires(self, client, create_sample_raffle, sample_ticket_data):
+        """Reserva vencida (ainda não liberada pelo sweeper) invalida a versão dos números"""
+        raffle_id = create_sample_raffle.id
+        url = f'/api/raffles/{raffle_id}/numbers'
+        client.post(f'/api/raffles/{raffle_id}/tickets',
+                    data=json.dumps(sample_ticket_data), content_type='application/json')
+        etag = client.get(url).headers['ETag']
+        
+        # Prazo vencido sem mudar ticket_version, como acontece com o tempo
+        availability_index.mark(raffle_id, [1, 5, 10], 'pending', datetime.utcnow() - timedelta(seconds=1))
+        response = client.get(url, headers={'If-None-Match': etag})
+        
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['reserved_numbers'] == []
+        assert 1 in data['available_numbers']
+
+def report_statements(statements):
+    """Consultas do relatório (as de autenticação se repetem a cada requisição)"""
+    return [statement for statement in statements if 'admins' not in statement]
+
+class TestSingleFlight:
+    """Proteção contra recomputação simultânea dos relatórios"""
+    
+    def test_concurrent_misses_run_one_query_batch(self, client, auth_headers):
+        """Requisições simultâneas sem cache executam as consultas uma única vez"""
+        url = '/api/reports/financial?year=2024'
+        statements = []
+        
+        def slow_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+            time.sleep(0.02)  # Relatório lento: as demais chegam durante o cálculo
+        
+        # Consultas de uma requisição isolada
+        event.listen(db.engine, 'before_cursor_execute', slow_execute)
+        try:
+            client.get(url, headers=auth_headers)
+            single_report_statements = len(report_statements(statements))
+            db.session.remove()
+            get_cache_backend().clear()
+            statements.clear()
+            
+            threads_count = 8
+            barrier = threading.Barrier(threads_count)
+            responses = []
+            
+            def request_report():
+                with app.test_client() as thread_client:
+                    barrier.wait()
+                    response = thread_client.get(url, headers=auth_headers)
+                    responses.append((response.status_code, response.data))
+            
+            threads = [threading.Thread(target=request_report) for _ in range(threads_count)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', slow_execute)
+        
+        assert single_report_statements > 0
+        assert len(report_statements(statements)) == single_report_statements
+        assert len(responses) == threads_count
+        assert {status for status, _ in responses} == {200}
+        assert len({body for _, body in responses}) == 1
+    
+    def test_stale_response_while_revalidating(self, client, auth_headers, query_counter, monkeypatch):
+        """Resposta vencida é servida enquanto outra requisição recomputa"""
+        url = '/api/reports/raffles'
+        first = client.get(url, headers=auth_headers)
+        
+        # Após o timeout (120 s), dentro da janela stale_ttl
+        later = time.time() + 300
+        monkeypatch.setattr(cache_middleware, 'time', type('FakeTime', (), {'time': staticmethod(lambda: later)}))
+        cache_key = f'raffles_report:GET:{url}?'
+        is_leader, refresh = cache_middleware._claim_refresh(cache_key)
+        assert is_leader
+        query_counter.clear()
+        
+        try:
+            stale = client.get(url, headers=auth_headers)
+        finally:
+            cache_middleware._release_refresh(cache_key, refresh)
+        
+        assert stale.data == first.data
+        assert not [statement for statement in query_counter if 'raffles' in statement]
+        
+        # Sem recomputação em andamento, a requisição recomputa
+        query_counter.clear()
+        client.get(url, headers=auth_headers)
+        assert [statement for statement in query_counter if 'raffles' in statement]
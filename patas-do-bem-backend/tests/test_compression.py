@@ -0,0 +1,162 @@
+import pytest
+import gzip
+import json
+from src.main import app
+from src.models.user import db
+from src.models.raffle import Raffle
+from src.middleware import compression
+from src.middleware.compression import precompress_static, compress_response, compress_stream
+
+@pytest.fixture
+def large_raffle(client):
+    """Rifa com números suficientes para passar do tamanho mínimo de compressão"""
+    raffle = Raffle(title='Rifa Grande', ticket_price=5, total_numbers=2000, created_by=1)
+    db.session.add(raffle)
+    db.session.commit()
+    return raffle
+
+@pytest.fixture
+def static_folder(tmp_path):
+    """Pasta estática temporária com um asset do build"""
+    assets = tmp_path / 'assets'
+    assets.mkdir()
+    (assets / 'index-abc123.js').write_text('console.log("patas do bem");\n' * 200)
+    (tmp_path / 'index.html').write_text('<html></html>')
+    original = app.static_folder
+    app.static_folder = str(tmp_path)
+    yield tmp_path
+    app.static_folder = original
+
+class TestResponseCompression:
+    """Middleware de compressão das respostas dinâmicas"""
+
+    def test_gzip_when_accepted(self, client, large_raffle):
+        url = f'/api/raffles/{large_raffle.id}/numbers'
+        plain = client.get(url)
+
+        response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response.headers['Vary']
+        assert int(response.headers['Content-Length']) < len(plain.data)
+        assert gzip.decompress(response.data) == plain.data
+
+    def test_not_compressed_without_accept_encoding(self, client, large_raffle):
+        response = client.get(f'/api/raffles/{large_raffle.id}/numbers')
+
+        assert 'Content-Encoding' not in response.headers
+        assert 'Accept-Encoding' in response.headers['Vary']
+        assert json.loads(response.data)['total_numbers'] == 2000
+
+    def test_small_response_not_compressed(self, client):
+        response = client.get('/api/raffles', headers={'Accept-Encoding': 'gzip'})
+
+        assert 'Content-Encoding' not in response.headers
+
+    def test_strong_etag_becomes_weak(self, client):
+        plain = client.get('/api/config')
+        response = client.get('/api/config', headers={'Accept-Encoding': 'gzip'})
+
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert response.headers['ETag'] == 'W/' + plain.headers['ETag']
+
+        revalidated = client.get('/api/config', headers={
+            'Accept-Encoding': 'gzip', 'If-None-Match': response.headers['ETag']
+        })
+        assert revalidated.status_code == 304
+
+    def test_brotli_preferred(self, client, large_raffle):
+        brotli = pytest.importorskip('brotli')
+        url = f'/api/raffles/{large_raffle.id}/numbers'
+
+        response = client.get(url, headers={'Accept-Encoding': 'gzip, br'})
+
+        assert response.headers['Content-Encoding'] == 'br'
+        assert brotli.decompress(response.data) == client.get(url).data
+
+class TestStreamingCompression:
+    """Compressão parte a parte de respostas geradas"""
+
+    def test_compress_stream_yields_incrementally(self):
+        closed = []
+
+        def rows():
+            try:
+                for index in range(5000):
+                    yield f'{index},doador{index}@example.com,50.00\n'
+            finally:
+                closed.append(True)
+
+        chunks = list(compress_stream(rows(), 'gzip'))
+
+        expected = ''.join(f'{index},doador{index}@example.com,50.00\n' for index in range(5000))
+        assert len(chunks) > 1
+        assert gzip.decompress(b''.join(chunks)).decode() == expected
+        assert closed == [True]
+
+    def test_streamed_response_compressed(self):
+        with app.test_request_context(headers={'Accept-Encoding': 'gzip'}):
+            response = app.response_class((f'linha {index}\n' for index in range(1000)), mimetype='text/csv')
+
+            response = compress_response()(response)
+
+            assert response.headers['Content-Encoding'] == 'gzip'
+            assert 'Content-Length' not in response.headers
+            body = gzip.decompress(b''.join(response.response)).decode()
+            assert body == ''.join(f'linha {index}\n' for index in range(1000))
+
+    def test_event_stream_not_compressed(self):
+        with app.test_request_context(headers={'Accept-Encoding': 'gzip'}):
+            response = app.response_class(iter(['event: ping\ndata: {}\n\n']), mimetype='text/event-stream')
+
+            response = compress_response()(response)
+
+            assert 'Content-Encoding' not in response.headers
+
+class TestCompactJson:
+    """JSON compacto gerado direto pelo provider do Flask"""
+
+    def test_responses_are_compact_utf8(self, client):
+        response = client.get('/api/config')
+        data = json.loads(response.data)
+
+        compact = json.dumps(data, separators=(',', ':'), ensure_ascii=False, sort_keys=True)
+        assert response.data.decode('utf-8').strip() == compact
+
+class TestPrecompressedAssets:
+    """Assets do frontend pré-comprimidos e com cache imutável"""
+
+    def test_precompress_creates_siblings_once(self, static_folder):
+        assets = static_folder / 'assets'
+
+        assert precompress_static(str(assets)) == len(compression.available_encodings())
+        assert (assets / 'index-abc123.js.gz').exists()
+        assert precompress_static(str(assets)) == 0
+
+    def test_serves_precompressed_asset(self, client, static_folder):
+        precompress_static(str(static_folder / 'assets'))
+
+        response = client.get('/assets/index-abc123.js', headers={'Accept-Encoding': 'gzip'})
+
+        assert response.status_code == 200
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert response.mimetype in ('text/javascript', 'application/javascript')
+        assert gzip.decompress(response.get_data()) == (static_folder / 'assets' / 'index-abc123.js').read_bytes()
+        assert 'immutable' in response.headers['Cache-Control']
+        assert 'max-age=31536000' in response.headers['Cache-Control']
+        response.close()
+
+    def test_serves_original_without_accept_encoding(self, client, static_folder):
+        precompress_static(str(static_folder / 'assets'))
+
+        response = client.get('/assets/index-abc123.js')
+
+        assert 'Content-Encoding' not in response.headers
+        assert response.get_data() == (static_folder / 'assets' / 'index-abc123.js').read_bytes()
+        response.close()
+
+    def test_index_not_cached(self, client, static_folder):
+        response = client.get('/')
+
+        assert 'immutable' not in response.headers.get('Cache-Control', '')
+        response.close()
@@ -0,0 +1,65 @@
+import pytest
+import os
+from sqlalchemy import create_engine
+from src.services.database_config import (
+    BASE_DIR, DEFAULT_DATABASE_URL, get_database_url, get_engine_options,
+    get_sqlite_profile, configure_sqlite
+)
+
+class TestDatabaseConfig:
+    """Testes da configuração do banco a partir do ambiente"""
+    
+    def test_default_url(self, monkeypatch):
+        """Sem DATABASE_URL usa o SQLite de desenvolvimento"""
+        monkeypatch.delenv('DATABASE_URL', raising=False)
+        
+        assert get_database_url() == DEFAULT_DATABASE_URL
+    
+    def test_relative_sqlite_path(self, monkeypatch):
+        """Caminho SQLite relativo é resolvido a partir do backend"""
+        monkeypatch.setenv('DATABASE_URL', 'sqlite:///src/database/app.db')
+        
+        assert get_database_url() == f"sqlite:///{os.path.join(BASE_DIR, 'src', 'database', 'app.db')}"
+    
+    def test_postgres_scheme(self, monkeypatch):
+        """Prefixo postgres:// é aceito"""
+        monkeypatch.setenv('DATABASE_URL', 'postgres://patas:secret@db:5432/patas')
+        
+        assert get_database_url() == 'postgresql://patas:secret@db:5432/patas'
+    
+    def test_sqlite_has_no_pool_options(self):
+        """SQLite mantém o pool padrão do SQLAlchemy"""
+        assert get_engine_options('sqlite:///app.db') == {}
+    
+    def test_pool_options(self, monkeypatch):
+        """Opções do pool vêm das variáveis DB_POOL_*"""
+        monkeypatch.setenv('DB_POOL_SIZE', '5')
+        monkeypatch.setenv('DB_MAX_OVERFLOW', '0')
+        monkeypatch.setenv('DB_POOL_PRE_PING', 'false')
+        
+        options = get_engine_options('postgresql://patas@localhost/patas')
+        
+        assert options['pool_size'] == 5
+        assert options['max_overflow'] == 0
+        assert options['pool_recycle'] == 1800
+        assert options['pool_pre_ping'] is False
+    
+    def test_invalid_sqlite_profile(self, monkeypatch):
+        """Perfil SQLite desconhecido é recusado"""
+        monkeypatch.setenv('SQLITE_PROFILE', 'turbo')
+        
+        with pytest.raises(ValueError):
+            get_sqlite_profile()
+    
+    def test_wal_profile_pragmas(self, tmp_path):
+        """Perfil wal é aplicado a todas as conexões do engine"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'wal.db'}")
+        configure_sqlite(engine, 'wal')
+        
+        with engine.connect() as connection:
+            assert connection.exec_driver_sql('PRAGMA journal_mode').scalar() == 'wal'
+            assert connection.exec_driver_sql('PRAGMA synchronous').scalar() == 1  # NORMAL
+            assert connection.exec_driver_sql('PRAGMA busy_timeout').scalar() == 5000
+            assert connection.exec_driver_sql('PRAGMA cache_size').scalar() == -64000
+        
+        engine.dispose()
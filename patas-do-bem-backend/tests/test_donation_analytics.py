@@ -0,0 +1,76 @@
+import pytest
+import json
+from array import array
+from datetime import datetime
+from src.models.user import db
+from src.models.donation import Donation, DonationDailyTotal
+from src.routes.reports import rollup_breakdowns
+from src.services import donation_analytics
+from src.services.donation_analytics import load_donation_columns, donation_breakdowns, group_totals
+
+@pytest.fixture
+def donation_rows(client):
+    """Doações de tipos, status e meses diferentes"""
+    donations = [
+        (datetime(2024, 1, 10, 9), 50, 'one_time', 'completed'),
+        (datetime(2024, 1, 31, 23, 59), 25, 'recurring', 'completed'),
+        (datetime(2024, 2, 1, 8), 100, 'recurring', 'completed'),
+        (datetime(2024, 2, 2), 999, 'one_time', 'pending'),
+        (datetime(2024, 3, 15, 18, 30), 12.5, 'one_time', 'completed')
+    ]
+    for created_at, amount, donation_type, status in donations:
+        db.session.add(Donation(donor_name='Doador', donor_email='ana@example.com', amount=amount,
+                                donation_type=donation_type, payment_method='pix',
+                                payment_status=status, created_at=created_at))
+    db.session.commit()
+
+class TestDonationAnalytics:
+    """Agrupamentos de doações sobre colunas em arrays"""
+
+    def test_matches_daily_totals(self, client, donation_rows):
+        columns = load_donation_columns(Donation.payment_status == 'completed')
+
+        assert len(columns) == 4
+        assert donation_breakdowns(columns) == rollup_breakdowns(DonationDailyTotal.payment_status == 'completed')
+
+    def test_breakdowns(self, client, donation_rows):
+        report = donation_breakdowns(load_donation_columns())
+
+        assert report['summary']['total_count'] == 5
+        assert report['summary']['total_amount'] == 1186.5
+        assert list(report['monthly_breakdown']) == ['2024-01', '2024-02', '2024-03']
+        assert report['monthly_breakdown']['2024-02'] == {'count': 2, 'amount': 1099.0}
+        assert report['type_breakdown']['recurring'] == {'count': 2, 'amount': 125.0}
+
+    def test_empty(self, client):
+        report = donation_breakdowns(load_donation_columns())
+
+        assert report['summary'] == {'total_count': 0, 'total_amount': 0, 'average_donation': 0}
+        assert report['monthly_breakdown'] == report['type_breakdown'] == {}
+
+    def test_group_totals_without_numpy(self, monkeypatch):
+        monkeypatch.setattr(donation_analytics, 'numpy', None)
+
+        totals = group_totals(array('l', [3, 1, 3, 3]), array('d', [1.0, 2.0, 3.0, 4.5]))
+
+        assert totals == {1: (1, 2.0), 3: (3, 8.5)}
+
+    def test_group_totals_with_numpy(self):
+        pytest.importorskip('numpy')
+
+        totals = group_totals(array('l', [3, 1, 3, 3]), array('d', [1.0, 2.0, 3.0, 4.5]))
+
+        assert totals == {1: (1, 2.0), 3: (3, 8.5)}
+
+    def test_report_with_time_bounds(self, client, auth_headers, donation_rows):
+        """Limites com hora: filtro exato sobre as doações"""
+        response = client.get('/api/reports/donations?start_date=2024-01-31T12:00:00'
+                              '&end_date=2024-02-01T08:00:00', headers=auth_headers)
+        data = json.loads(response.data)
+
+        assert data['summary']['total_count'] == 2
+        assert data['monthly_breakdown'] == {'2024-01': {'count': 1, 'amount': 25.0},
+                                             '2024-02': {'count': 1, 'amount': 100.0}}
+        rows = client.get('/api/reports/donations/rows?start_date=2024-01-31T12:00:00'
+                          '&end_date=2024-02-01T08:00:00', headers=auth_headers)
+        assert len(json.loads(rows.data)['donations']) == 2
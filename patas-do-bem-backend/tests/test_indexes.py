@@ -0,0 +1,101 @@
+import pytest
+import os
+import re
+from datetime import datetime
+from sqlalchemy import event
+from src.models.user import db
+from src.models.donation import Donation
+from src.models.contact import ContactMessage
+from src.models.raffle import RaffleTicket
+from src.services.keyset_pagination import encode_cursor
+
+# Tabelas que não devem ser lidas por varredura completa
+INDEXED_TABLES = ('donations', 'raffle_tickets', 'contact_messages', 'raffles')
+
+FULL_SCAN = re.compile(r'^SCAN (%s)$' % '|'.join(INDEXED_TABLES))
+
+# Cursor de uma página seguinte (posição posterior a todos os registros)
+CURSOR = encode_cursor(datetime(2100, 1, 1), 1)
+
+# EXPLAIN QUERY PLAN é específico do SQLite
+pytestmark = pytest.mark.skipif(
+    not os.environ['DATABASE_URL'].startswith('sqlite'),
+    reason='Planos de consulta verificados apenas no SQLite'
+)
+
+@pytest.fixture
+def captured_selects(client):
+    """Captura as consultas SELECT (com parâmetros) executadas pelo teste"""
+    statements = []
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+    
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    yield statements
+    event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+def full_scans(statements):
+    """Retorna os passos de plano que varrem tabelas inteiras"""
+    scans = []
+    with db.engine.connect() as connection:
+        for statement, parameters in statements:
+            plan = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).fetchall()
+            for row in plan:
+                detail = row[-1]
+                if FULL_SCAN.match(detail):
+                    scans.append((detail, statement))
+    return scans
+
+@pytest.fixture
+def sample_rows(client, create_sample_raffle):
+    """Alguns registros em cada tabela consultada"""
+    raffle = create_sample_raffle
+    db.session.add(Donation(donor_name='Ana', donor_email='ana@example.com', amount=10,
+                            donation_type='recurring', payment_method='pix',
+                            payment_status='completed', payment_id='PAY1'))
+    db.session.add(ContactMessage(name='Ana', email='ana@example.com', message='Oi'))
+    db.session.add(RaffleTicket(raffle_id=raffle.id, ticket_number=1, payment_status='completed'))
+    db.session.commit()
+    return raffle
+
+class TestQueryIndexes:
+    """As consultas principais das rotas usam índices"""
+    
+    @pytest.mark.parametrize('url', [
+        '/api/raffles',
+        '/api/raffles/{raffle_id}',
+        '/api/raffles/{raffle_id}/numbers',
+        '/api/donations?status=completed',
+        '/api/donations?status=completed&type=recurring',
+        '/api/donations/stats',
+        '/api/donations/history',
+        '/api/contact/messages?status=new',
+        '/api/reports/donations',
+        '/api/reports/donations/rows',
+        '/api/donations',
+        f'/api/donations?cursor={CURSOR}',
+        f'/api/donations/history?cursor={CURSOR}',
+        '/api/contact/messages',
+        f'/api/contact/messages?cursor={CURSOR}',
+    ])
+    def test_route_queries_use_indexes(self, client, sample_rows, auth_headers, captured_selects, url):
+        """Nenhuma consulta da rota varre a tabela inteira"""
+        response = client.get(url.format(raffle_id=sample_rows.id), headers=auth_headers)
+        assert response.status_code == 200
+        assert captured_selects
+        
+        assert full_scans(captured_selects) == []
+    
+    def test_payment_id_lookup_uses_index(self, client, sample_rows, captured_selects):
+        """Busca de doação pelo ID do gateway (webhooks) usa índice"""
+        Donation.query.filter_by(payment_id='PAY1').first()
+        
+        assert full_scans(captured_selects) == []
+    
+    def test_full_scan_is_detected(self, client, sample_rows, captured_selects):
+        """Sanidade: consulta sem filtro indexado é detectada"""
+        Donation.query.filter(Donation.donor_name == 'Ana').all()
+        
+        assert full_scans(captured_selects)
@@ -0,0 +1,76 @@
+import pytest
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from src.main import app
+from src.middleware import json_provider
+from src.middleware.json_provider import FastJSONProvider
+
+@pytest.fixture(params=['orjson', 'stdlib'])
+def provider(request, monkeypatch):
+    """Provider com orjson (se instalado) e com a biblioteca padrão"""
+    if request.param == 'orjson':
+        pytest.importorskip('orjson')
+    else:
+        monkeypatch.setattr(json_provider, 'orjson', None)
+    provider = FastJSONProvider(app)
+    provider.compact = True
+    provider.ensure_ascii = False
+    return provider
+
+class TestFastJSONProvider:
+    """Serialização de Decimal, datetime e date"""
+
+    def test_native_types(self, provider):
+        data = {
+            'amount': Decimal('50.25'),
+            'created_at': datetime(2024, 3, 5, 14, 30, 0, 123456),
+            'draw_date': date(2024, 12, 31),
+            'title': 'Doação única',
+            'months': {3: 1}
+        }
+
+        assert json.loads(provider.dumps(data)) == {
+            'amount': 50.25,
+            'created_at': '2024-03-05T14:30:00.123456',
+            'draw_date': '2024-12-31',
+            'title': 'Doação única',
+            'months': {'3': 1}
+        }
+
+    def test_same_output_as_stdlib(self, provider):
+        data = {'b': [1, 2.5, None, True], 'a': {'nome': 'Ação'}, 'c': datetime(2024, 1, 1)}
+
+        expected = json.dumps(data, default=str, separators=(',', ':'), ensure_ascii=False, sort_keys=True)
+        assert provider.dumps(data) == expected.replace(' ', 'T')
+
+    def test_response(self, provider):
+        with app.app_context():
+            response = provider.response({'amount': Decimal('10.00')})
+
+        assert response.mimetype == 'application/json'
+        assert response.get_data() == b'{"amount":10.0}\n'
+
+    def test_loads(self, provider):
+        assert provider.loads(b'{"amount": 10.5}') == {'amount': 10.5}
+
+class TestModelSerialization:
+    """to_dict devolve os valores das colunas e o provider os converte"""
+
+    def test_donation_response(self, client, create_sample_donation):
+        donation = create_sample_donation
+        assert isinstance(donation.to_dict()['amount'], Decimal)
+
+        response = client.post(f'/api/donations/{donation.id}/confirm',
+                               data=json.dumps({'status': 'completed'}), content_type='application/json')
+
+        data = json.loads(response.data)['donation']
+        assert data['amount'] == 50.0
+        assert data['created_at'] == donation.created_at.isoformat()
+
+    def test_raffle_response(self, client, create_sample_raffle):
+        raffle = json.loads(client.get(f'/api/raffles/{create_sample_raffle.id}').data)['raffle']
+
+        assert raffle['ticket_price'] == 10.0
+        assert raffle['draw_date'] == '2024-12-31'
+        assert raffle['created_at'] == create_sample_raffle.created_at.isoformat()
@@ -0,0 +1,126 @@
+import pytest
+import json
+from datetime import datetime, timedelta
+from src.models.user import db
+from src.models.donation import Donation
+from src.models.contact import ContactMessage
+from src.services.keyset_pagination import encode_cursor, decode_cursor, page_limit, MAX_LIMIT
+
+START = datetime(2024, 1, 1, 12)
+
+def add_donations(count, same_time=False, status='completed', offset=0):
+    for i in range(offset, offset + count):
+        db.session.add(Donation(donor_name=f'Doador {i}', donor_email=f'doador{i}@example.com', amount=10,
+                                donation_type='one_time', payment_method='pix', payment_status=status,
+                                created_at=START if same_time else START + timedelta(minutes=i)))
+    db.session.commit()
+
+def fetch_all(client, url, key, **kwargs):
+    """Percorrer todas as páginas seguindo next_cursor"""
+    pages = []
+    cursor = None
+    while True:
+        separator = '&' if '?' in url else '?'
+        page_url = f'{url}{separator}cursor={cursor}' if cursor else url
+        data = json.loads(client.get(page_url, **kwargs).data)
+        pages.append(data[key])
+        cursor = data['next_cursor']
+        if cursor is None:
+            return pages
+
+class TestCursor:
+    """Codificação do cursor (created_at, id)"""
+
+    def test_round_trip(self):
+        position = (datetime(2024, 5, 1, 10, 30, 15, 123456), 42)
+
+        assert decode_cursor(encode_cursor(*position)) == position
+        assert decode_cursor(encode_cursor(None, 7)) == (None, 7)
+
+    @pytest.mark.parametrize('cursor', ['abc', '!!!', encode_cursor(START, 1)[:-3]])
+    def test_invalid_cursor(self, cursor):
+        with pytest.raises(ValueError):
+            decode_cursor(cursor)
+
+    def test_page_limit(self):
+        assert page_limit(None) == 20
+        assert page_limit(0) == 1
+        assert page_limit(10 ** 6) == MAX_LIMIT
+
+class TestKeysetPagination:
+    """Listagens paginadas por cursor"""
+
+    def test_list_donations_pages(self, client):
+        add_donations(25)
+
+        pages = fetch_all(client, '/api/donations?limit=10', 'donations')
+
+        assert [len(page) for page in pages] == [10, 10, 5]
+        ids = [donation['id'] for page in pages for donation in page]
+        assert ids == list(range(25, 0, -1))
+
+    def test_same_created_at(self, client):
+        """Empates em created_at são desfeitos pelo id"""
+        add_donations(7, same_time=True)
+
+        pages = fetch_all(client, '/api/donations?limit=3', 'donations')
+
+        ids = [donation['id'] for page in pages for donation in page]
+        assert ids == list(range(7, 0, -1))
+
+    def test_new_rows_do_not_shift_pages(self, client):
+        add_donations(6)
+        first = json.loads(client.get('/api/donations?limit=3').data)
+
+        add_donations(2, offset=60)  # Mais recentes que a primeira página
+        second = json.loads(client.get(f"/api/donations?limit=3&cursor={first['next_cursor']}").data)
+
+        assert [donation['id'] for donation in second['donations']] == [3, 2, 1]
+        assert second['next_cursor'] is None
+
+    def test_rows_without_created_at(self, client):
+        """Registros sem data vêm depois dos datados, sem erro no cursor"""
+        add_donations(12)
+        Donation.query.filter(Donation.id.in_([3, 6, 9, 12])).update(
+            {'created_at': None}, synchronize_session=False
+        )
+        db.session.commit()
+
+        pages = fetch_all(client, '/api/donations?limit=5', 'donations')
+
+        assert [len(page) for page in pages] == [5, 5, 2]
+        ids = [donation['id'] for page in pages for donation in page]
+        assert ids == [11, 10, 8, 7, 5, 4, 2, 1, 12, 9, 6, 3]
+
+    def test_invalid_cursor_is_bad_request(self, client):
+        response = client.get('/api/donations?cursor=invalido')
+
+        assert response.status_code == 400
+
+    def test_donation_history(self, client):
+        add_donations(4)
+        add_donations(2, status='pending')
+
+        pages = fetch_all(client, '/api/donations/history?limit=3', 'donations')
+
+        assert [len(page) for page in pages] == [3, 1]
+
+    def test_contact_messages(self, client):
+        for i in range(5):
+            db.session.add(ContactMessage(name='Ana', email='ana@example.com', message=f'Mensagem {i}',
+                                          created_at=START + timedelta(minutes=i)))
+        db.session.commit()
+
+        pages = fetch_all(client, '/api/contact/messages?limit=2', 'messages')
+
+        messages = [message['message'] for page in pages for message in page]
+        assert messages == [f'Mensagem {i}' for i in range(4, -1, -1)]
+
+    def test_report_rows(self, client, auth_headers):
+        add_donations(5)
+        add_donations(3, status='failed')
+
+        pages = fetch_all(client, '/api/reports/donations/rows?limit=2', 'donations', headers=auth_headers)
+
+        assert [len(page) for page in pages] == [2, 2, 1]
+        assert all(donation['payment_status'] == 'completed' for page in pages for donation in page)
@@ -0,0 +1,121 @@
+import pytest
+import os
+import tempfile
+from sqlalchemy import create_engine, inspect, text
+from src.main import app
+from src.models.user import db
+from src.migrations import load_migrations, current_version, pending_migrations, run_migrations
+
+@pytest.fixture
+def engine():
+    """Engine de um banco SQLite vazio, fora da aplicação"""
+    db_fd, path = tempfile.mkstemp(suffix='.db')
+    engine = create_engine(f'sqlite:///{path}')
+    yield engine
+    engine.dispose()
+    os.close(db_fd)
+    os.unlink(path)
+
+def create_legacy_schema(engine):
+    """Tabelas de rifas como eram antes dos contadores e da expiração das reservas"""
+    with engine.begin() as connection:
+        connection.execute(text("""
+            CREATE TABLE raffles (
+                id INTEGER PRIMARY KEY, title VARCHAR(200) NOT NULL, description TEXT,
+                image_url VARCHAR(500), ticket_price NUMERIC(10, 2) NOT NULL,
+                total_numbers INTEGER NOT NULL, draw_date DATE, status VARCHAR(20),
+                winner_number INTEGER, winner_name VARCHAR(100), winner_email VARCHAR(100),
+                drawn_at DATETIME, created_by INTEGER, created_at DATETIME, updated_at DATETIME
+            )
+        """))
+        connection.execute(text("""
+            CREATE TABLE raffle_tickets (
+                id INTEGER PRIMARY KEY, raffle_id INTEGER NOT NULL, ticket_number INTEGER NOT NULL,
+                buyer_name VARCHAR(100), buyer_email VARCHAR(100), buyer_phone VARCHAR(20),
+                payment_status VARCHAR(20), payment_id VARCHAR(100), purchased_at DATETIME,
+                CONSTRAINT unique_raffle_ticket UNIQUE (raffle_id, ticket_number)
+            )
+        """))
+        connection.execute(text(
+            "INSERT INTO raffles (id, title, ticket_price, total_numbers, status) "
+            "VALUES (1, 'Rifa antiga', 10.00, 100, 'active')"
+        ))
+        connection.execute(text(
+            "INSERT INTO raffle_tickets (raffle_id, ticket_number, payment_status) "
+            "VALUES (1, 1, 'completed'), (1, 2, 'completed'), (1, 3, 'pending'), (1, 4, 'failed')"
+        ))
+
+class TestMigrations:
+    """Testes do runner de migrações versionadas"""
+    
+    def test_versions_are_sequential(self):
+        """Versões das migrações são únicas e crescentes a partir de 1"""
+        versions = [migration.VERSION for migration in load_migrations()]
+        assert versions == list(range(1, len(versions) + 1))
+    
+    def test_fresh_database(self, engine):
+        """Banco vazio recebe o schema completo dos modelos"""
+        assert current_version(engine) == 0
+        
+        applied = run_migrations(engine)
+        
+        assert applied == [migration.VERSION for migration in load_migrations()]
+        assert current_version(engine) == applied[-1]
+        assert pending_migrations(engine) == []
+        
+        inspector = inspect(engine)
+        for table in db.metadata.sorted_tables:
+            columns = {column['name'] for column in inspector.get_columns(table.name)}
+            assert columns == set(table.columns.keys())
+            indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+            assert {index.name for index in table.indexes} <= indexes
+    
+    def test_rerun_is_noop(self, engine):
+        """Migrações já aplicadas não são executadas de novo"""
+        run_migrations(engine)
+        
+        assert run_migrations(engine) == []
+    
+    def test_upgrade_command(self):
+        """`flask db-upgrade` no banco já migrado não aplica nada"""
+        result = app.test_cli_runner().invoke(args=['db-upgrade'])
+        
+        assert result.exit_code == 0
+        assert 'já está atualizado' in result.output
+    
+    def test_legacy_database(self, engine):
+        """Banco criado antes das migrações ganha colunas, contadores e índices"""
+        create_legacy_schema(engine)
+        
+        run_migrations(engine)
+        
+        inspector = inspect(engine)
+        raffle_columns = {column['name'] for column in inspector.get_columns('raffles')}
+        assert {'sold_count', 'reserved_count', 'revenue'} <= raffle_columns
+        ticket_columns = {column['name'] for column in inspector.get_columns('raffle_tickets')}
+        assert 'reserved_until' in ticket_columns
+        ticket_indexes = {index['name'] for index in inspector.get_indexes('raffle_tickets')}
+        assert 'ix_raffle_tickets_raffle_status' in ticket_indexes
+        
+        with engine.connect() as connection:
+            sold, reserved, revenue = connection.execute(text(
+                "SELECT sold_count, reserved_count, revenue FROM raffles WHERE id = 1"
+            )).one()
+        assert (sold, reserved, float(revenue)) == (2, 1, 20.0)
+    
+    def test_revenue_rollups_backfilled(self, engine):
+        """Totais diários criados com o histórico de tickets vendidos"""
+        create_legacy_schema(engine)
+        with engine.begin() as connection:
+            connection.execute(text(
+                "UPDATE raffle_tickets SET purchased_at = '2024-05-01 10:30:00.000000' "
+                "WHERE payment_status = 'completed'"
+            ))
+        
+        run_migrations(engine)
+        
+        with engine.connect() as connection:
+            rows = connection.execute(text(
+                "SELECT day, tickets_sold, revenue FROM raffle_ticket_daily_totals"
+            )).all()
+        assert [(day, sold, float(revenue)) for day, sold, revenue in rows] == [('2024-05-01', 2, 20.0)]
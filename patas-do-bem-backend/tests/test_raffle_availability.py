@@ -0,0 +1,163 @@
+import random
+from datetime import datetime, timedelta
+from src.models.user import db
+from src.services.raffle_availability import RaffleAvailability, availability_index, FREE, RESERVED, SOLD
+from src.services.raffle_changes import prune_ticket_changes
+from src.services.reservation_service import reservation_service
+
+BUYER = {'buyer_name': 'Maria Santos', 'buyer_email': 'maria@example.com', 'buyer_phone': None}
+
+class TestRaffleAvailability:
+    """Testes para o índice de disponibilidade de números"""
+    
+    def test_initial_state(self):
+        """Teste de rifa sem nenhum número vendido"""
+        availability = RaffleAvailability(10)
+        
+        assert availability.numbers(FREE) == list(range(1, 11))
+        assert availability.ranges(FREE) == [[1, 10]]
+        assert availability.ranges(SOLD) == []
+        assert availability.counts == {FREE: 10, RESERVED: 0, SOLD: 0}
+    
+    def test_mark_updates_counts(self):
+        """Teste de contagens ao alterar o estado dos números"""
+        availability = RaffleAvailability(10)
+        
+        availability.mark(3, RESERVED)
+        availability.mark(4, RESERVED)
+        availability.mark(4, SOLD)
+        availability.mark(4, SOLD)  # Repetido não altera contagens
+        
+        assert availability.counts == {FREE: 8, RESERVED: 1, SOLD: 1}
+        assert availability.state(3) == RESERVED
+        assert availability.state(4) == SOLD
+    
+    def test_mark_ignores_out_of_range(self):
+        """Teste de números fora do intervalo da rifa"""
+        availability = RaffleAvailability(10)
+        
+        availability.mark(0, SOLD)
+        availability.mark(11, SOLD)
+        
+        assert availability.counts[SOLD] == 0
+    
+    def test_ranges_multiple_states(self):
+        """Teste de intervalos combinando mais de um estado"""
+        availability = RaffleAvailability(10)
+        for number in (1, 2, 6):
+            availability.mark(number, SOLD)
+        availability.mark(3, RESERVED)
+        
+        assert availability.ranges(SOLD) == [[1, 2], [6, 6]]
+        assert availability.ranges(FREE) == [[4, 5], [7, 10]]
+        assert availability.ranges(FREE, RESERVED) == [[3, 5], [7, 10]]
+        assert availability.numbers(FREE, RESERVED) == [3, 4, 5, 7, 8, 9, 10]
+    
+    def test_large_raffle(self):
+        """Teste de rifa com 100 mil números"""
+        availability = RaffleAvailability(100000)
+        for number in range(1, 100001, 2):
+            availability.mark(number, SOLD)
+        
+        assert availability.counts[SOLD] == 50000
+        assert len(availability.ranges(FREE)) == 50000
+        assert availability.numbers(SOLD)[:3] == [1, 3, 5]
+    
+    def test_expire_reservations(self):
+        """Teste de liberação preguiçosa das reservas vencidas"""
+        availability = RaffleAvailability(10)
+        now = datetime(2024, 1, 1, 12, 0)
+        availability.mark(1, RESERVED, now - timedelta(minutes=1))
+        availability.mark(2, RESERVED, now + timedelta(minutes=1))
+        availability.mark(3, RESERVED, now - timedelta(minutes=1))
+        availability.mark(3, SOLD)  # Pago antes de vencer
+        
+        assert availability.expire(now) == 1
+        
+        assert availability.state(1) == FREE
+        assert availability.state(2) == RESERVED
+        assert availability.state(3) == SOLD
+        assert availability.counts == {FREE: 8, RESERVED: 1, SOLD: 1}
+    
+    def test_next_expiration(self):
+        """Teste do prazo da próxima reserva, ignorando as já pagas ou liberadas"""
+        availability = RaffleAvailability(10)
+        now = datetime(2024, 1, 1, 12, 0)
+        availability.mark(1, RESERVED, now + timedelta(minutes=1))
+        availability.mark(2, RESERVED, now + timedelta(minutes=5))
+        availability.mark(3, RESERVED, now + timedelta(minutes=10))
+        
+        assert availability.next_expiration() == now + timedelta(minutes=1)
+        
+        availability.mark(1, SOLD)
+        availability.expire(now + timedelta(minutes=6))
+        
+        assert availability.next_expiration() == now + timedelta(minutes=10)
+        
+        availability.mark(3, FREE)
+        
+        assert availability.next_expiration() is None
+    
+    def test_sample_free(self):
+        """Teste de sorteio de números livres"""
+        availability = RaffleAvailability(1000)
+        for number in range(1, 501):
+            availability.mark(number, SOLD)
+        
+        numbers = availability.sample_free(100, random.Random(42), exclude=[501, 502])
+        
+        assert len(numbers) == 100
+        assert len(set(numbers)) == 100
+        assert all(availability.state(number) == FREE for number in numbers)
+        assert 501 not in numbers and 502 not in numbers
+    
+    def test_sample_free_nearly_full(self):
+        """Sorteio em rifa quase cheia usa a lista de livres"""
+        availability = RaffleAvailability(1000)
+        for number in range(1, 1001):
+            if number not in (10, 500, 999):
+                availability.mark(number, SOLD)
+        
+        numbers = availability.sample_free(5, random.Random(1))
+        
+        assert sorted(numbers) == [10, 500, 999]
+
+class TestAvailabilityIndex:
+    """Índice em memória com escritas de outros processos"""
+    
+    def test_catch_up_from_change_log(self, client, create_sample_raffle):
+        """Reserva feita por outro processo é aplicada pelo log, sem reconstruir"""
+        raffle = create_sample_raffle
+        availability = availability_index.get(raffle)
+        # Outro processo: grava a reserva sem avisar o índice local
+        reservation_service.claim(raffle.id, [7], BUYER)
+        db.session.commit()
+        
+        assert availability_index.get(raffle) is availability
+        assert availability.state(7) == RESERVED
+        assert availability.version == raffle.ticket_version
+        assert availability.next_expiration() is not None
+    
+    def test_rebuild_when_log_pruned(self, client, create_sample_raffle):
+        """Versão do índice fora do log: reconstrução a partir dos tickets"""
+        raffle = create_sample_raffle
+        availability = availability_index.get(raffle)
+        reservation_service.claim(raffle.id, [7], BUYER)
+        db.session.commit()
+        prune_ticket_changes(keep_versions=0)
+        
+        rebuilt = availability_index.get(raffle)
+        
+        assert rebuilt is not availability
+        assert rebuilt.state(7) == RESERVED
+        assert rebuilt.version == raffle.ticket_version
+    
+    def test_local_mark_advances_version(self, client, create_sample_raffle):
+        """Mudança feita neste processo avança a versão do índice"""
+        raffle = create_sample_raffle
+        availability = availability_index.get(raffle)
+        
+        reservation_service.reserve(raffle.id, [3], BUYER)
+        
+        assert availability.state(3) == RESERVED
+        assert availability.version == raffle.ticket_version
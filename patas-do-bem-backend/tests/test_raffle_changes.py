@@ -0,0 +1,116 @@
+import pytest
+import json
+from src.models.user import db
+from src.models.raffle import Raffle, RaffleTicketChange
+from src.services.raffle_changes import prune_ticket_changes
+from src.services.raffle_stats import apply_ticket_transitions
+
+def get_numbers(client, raffle_id, **params):
+    query = '&'.join(f'{name}={value}' for name, value in params.items())
+    return json.loads(client.get(f'/api/raffles/{raffle_id}/numbers?{query}').data)
+
+def buy(client, raffle_id, numbers):
+    client.post(f'/api/raffles/{raffle_id}/tickets', data=json.dumps({
+        'buyer_name': 'Maria Santos',
+        'buyer_email': 'maria@example.com',
+        'selected_numbers': numbers,
+        'payment_method': 'pix'
+    }), content_type='application/json')
+
+def confirm(client, raffle_id, numbers, status='completed'):
+    client.post(f'/api/raffles/{raffle_id}/tickets/confirm',
+                data=json.dumps({'ticket_numbers': numbers, 'status': status}),
+                content_type='application/json')
+
+class TestDeltaSync:
+    """Sincronização incremental dos números com ?since=<versão>"""
+
+    def test_snapshot_has_version(self, client, create_sample_raffle):
+        data = get_numbers(client, create_sample_raffle.id)
+
+        assert data['version'] == 0
+        assert 'mode' not in data
+
+    def test_delta_returns_only_changes(self, client, create_sample_raffle):
+        raffle_id = create_sample_raffle.id
+        version = get_numbers(client, raffle_id)['version']
+
+        buy(client, raffle_id, [3, 4])
+        delta = get_numbers(client, raffle_id, since=version)
+
+        assert delta['mode'] == 'delta'
+        assert delta['reserved_numbers'] == [3, 4]
+        assert delta['available_numbers'] == []
+        assert delta['sold_numbers'] == []
+
+        confirm(client, raffle_id, [3])
+        confirm(client, raffle_id, [4], status='failed')
+        delta = get_numbers(client, raffle_id, since=delta['version'])
+
+        assert delta['sold_numbers'] == [3]
+        assert delta['available_numbers'] == [4]
+        assert delta['reserved_numbers'] == []
+
+    def test_delta_keeps_last_state(self, client, create_sample_raffle):
+        raffle_id = create_sample_raffle.id
+
+        buy(client, raffle_id, [7])
+        confirm(client, raffle_id, [7])
+        delta = get_numbers(client, raffle_id, since=0)
+
+        assert delta['version'] == 2
+        assert delta['sold_numbers'] == [7]
+        assert delta['reserved_numbers'] == []
+
+    def test_current_cursor_is_empty_delta(self, client, create_sample_raffle):
+        raffle_id = create_sample_raffle.id
+        buy(client, raffle_id, [1])
+
+        delta = get_numbers(client, raffle_id, since=1)
+
+        assert delta['mode'] == 'delta'
+        assert delta['reserved_numbers'] == delta['sold_numbers'] == delta['available_numbers'] == []
+
+    @pytest.mark.parametrize('since', [-1, 99])
+    def test_invalid_cursor_gets_snapshot(self, client, create_sample_raffle, since):
+        raffle_id = create_sample_raffle.id
+        buy(client, raffle_id, [1])
+
+        data = get_numbers(client, raffle_id, since=since)
+
+        assert data['mode'] == 'snapshot'
+        assert data['version'] == 1
+        assert data['reserved_numbers'] == [1]
+        assert len(data['available_numbers']) == 99
+
+    def test_pruned_cursor_gets_snapshot(self, client, create_sample_raffle):
+        raffle_id = create_sample_raffle.id
+        for number in range(1, 4):
+            buy(client, raffle_id, [number])
+
+        removed = prune_ticket_changes(keep_versions=1)
+
+        assert removed == 2
+        assert get_numbers(client, raffle_id, since=1)['mode'] == 'snapshot'
+        delta = get_numbers(client, raffle_id, since=2)
+        assert delta['mode'] == 'delta'
+        assert delta['reserved_numbers'] == [3]
+
+    def test_changes_without_numbers_reset_log(self, client, create_sample_raffle):
+        raffle_id = create_sample_raffle.id
+        buy(client, raffle_id, [1])
+
+        apply_ticket_transitions(raffle_id, [('pending', 'completed')])
+        db.session.commit()
+
+        assert get_numbers(client, raffle_id, since=1)['mode'] == 'snapshot'
+        assert get_numbers(client, raffle_id, since=2)['mode'] == 'delta'
+
+    def test_rolled_back_reservation_not_logged(self, client, create_sample_raffle):
+        raffle_id = create_sample_raffle.id
+        buy(client, raffle_id, [1])
+
+        buy(client, raffle_id, [1, 2])
+
+        assert RaffleTicketChange.query.filter_by(raffle_id=raffle_id).count() == 1
+        assert db.session.get(Raffle, raffle_id).ticket_version == 1
@@ -0,0 +1,99 @@
+import json
+from datetime import datetime, timedelta
+from src.models.user import db
+from src.models.raffle import RaffleTicket
+from src.services.raffle_events import RaffleEventBroadcaster, raffle_events
+from src.services.reservation_service import reservation_service
+
+def read_event(stream):
+    """Próximo evento do stream SSE como (tipo, dados)"""
+    chunk = next(stream)
+    if isinstance(chunk, bytes):
+        chunk = chunk.decode()
+    lines = dict(line.split(': ', 1) for line in chunk.strip().split('\n'))
+    return lines['event'], json.loads(lines['data'])
+
+class TestRaffleEventBroadcaster:
+    """Fan-out dos eventos por rifa"""
+
+    def test_publish_reaches_only_raffle_subscribers(self):
+        broadcaster = RaffleEventBroadcaster()
+        first = broadcaster.subscribe(1)
+        other = broadcaster.subscribe(2)
+
+        broadcaster.publish(1, [5, 3], 'pending')
+        broadcaster.publish(1, [3], 'completed')
+        broadcaster.publish(1, [5], 'expired')
+
+        assert first.get(0) == {'type': 'reserved', 'numbers': [3, 5]}
+        assert first.get(0) == {'type': 'sold', 'numbers': [3]}
+        assert first.get(0) == {'type': 'released', 'numbers': [5]}
+        assert other.get(0) is None
+
+    def test_unsubscribe(self):
+        broadcaster = RaffleEventBroadcaster()
+        subscription = broadcaster.subscribe(1)
+        assert broadcaster.subscriber_count(1) == 1
+
+        broadcaster.unsubscribe(subscription)
+        broadcaster.unsubscribe(subscription)
+
+        assert broadcaster.subscriber_count() == 0
+
+    def test_subscriber_limit(self):
+        broadcaster = RaffleEventBroadcaster(max_subscribers=1)
+        assert broadcaster.subscribe(1) is not None
+        assert broadcaster.subscribe(2) is None
+
+    def test_slow_subscriber_overflows(self):
+        broadcaster = RaffleEventBroadcaster(max_pending=2)
+        subscription = broadcaster.subscribe(1)
+
+        for number in range(1, 4):
+            broadcaster.publish(1, [number], 'pending')
+
+        assert subscription.overflowed
+
+class TestRaffleEventStream:
+    """Endpoint /api/raffles/<id>/events"""
+
+    def test_snapshot_then_changes(self, client, create_sample_raffle, sample_ticket_data):
+        raffle_id = create_sample_raffle.id
+        response = client.get(f'/api/raffles/{raffle_id}/events')
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+        stream = iter(response.response)
+
+        event, data = read_event(stream)
+        assert event == 'snapshot'
+        assert data['available_ranges'] == [[1, 100]]
+
+        client.post(f'/api/raffles/{raffle_id}/tickets',
+                    data=json.dumps(sample_ticket_data), content_type='application/json')
+        client.post(f'/api/raffles/{raffle_id}/tickets/confirm',
+                    data=json.dumps({'ticket_numbers': [1], 'status': 'completed'}),
+                    content_type='application/json')
+
+        assert read_event(stream) == ('reserved', {'numbers': [1, 5, 10]})
+        assert read_event(stream) == ('sold', {'numbers': [1]})
+
+        response.close()
+        assert raffle_events.subscriber_count(raffle_id) == 0
+
+    def test_expired_reservations_are_released(self, client, create_sample_raffle):
+        raffle_id = create_sample_raffle.id
+        db.session.add(RaffleTicket(raffle_id=raffle_id, ticket_number=7, payment_status='pending',
+                                    reserved_until=datetime.utcnow() - timedelta(minutes=1)))
+        db.session.commit()
+        response = client.get(f'/api/raffles/{raffle_id}/events')
+        stream = iter(response.response)
+        read_event(stream)
+
+        reservation_service.release_expired()
+
+        assert read_event(stream) == ('released', {'numbers': [7]})
+        response.close()
+
+    def test_unknown_raffle(self, client):
+        response = client.get('/api/raffles/999/events')
+        assert response.status_code == 404
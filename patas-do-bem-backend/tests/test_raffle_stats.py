@@ -0,0 +1,171 @@
+import pytest
+import json
+from datetime import datetime, date
+from src.models.user import db
+from src.models.raffle import Raffle, RaffleTicket
+from src.main import app
+from src.services.raffle_stats import get_raffle_stats, apply_ticket_transitions, reconcile_raffle_counters
+from src.middleware.cache import invalidate_cache_tags
+
+def create_raffles(count, tickets_per_raffle=3, status='active'):
+    """Cria rifas com tickets vendidos e pendentes"""
+    raffles = []
+    for i in range(count):
+        raffle = Raffle(
+            title=f'Rifa {i}',
+            ticket_price=10.0,
+            total_numbers=100,
+            draw_date=date(2024, 12, 31),
+            status=status,
+            drawn_at=datetime(2024, (i % 12) + 1, 15) if status == 'completed' else None,
+            created_by=1
+        )
+        db.session.add(raffle)
+        db.session.flush()
+        
+        ticket_statuses = ['completed' if number % 2 else 'pending' for number in range(1, tickets_per_raffle + 1)]
+        for number, ticket_status in enumerate(ticket_statuses, start=1):
+            db.session.add(RaffleTicket(
+                raffle_id=raffle.id,
+                ticket_number=number,
+                buyer_name='Comprador',
+                buyer_email='comprador@example.com',
+                payment_status=ticket_status
+            ))
+        apply_ticket_transitions(raffle.id, [(None, ticket_status) for ticket_status in ticket_statuses])
+        raffles.append(raffle)
+    
+    db.session.commit()
+    # Escrita direta no banco: invalidar como fazem as rotas
+    invalidate_cache_tags('raffles')
+    return raffles
+
+class TestRaffleStats:
+    """Testes para a camada de estatísticas de rifas"""
+    
+    def test_stats_single_query(self, client, query_counter):
+        """Teste de estatísticas de várias rifas com uma consulta"""
+        raffle_ids = [raffle.id for raffle in create_raffles(3)]
+        query_counter.clear()
+        
+        stats = get_raffle_stats(raffle_ids)
+        
+        assert len(query_counter) == 1
+        for raffle_id in raffle_ids:
+            assert stats[raffle_id] == {'sold': 2, 'pending': 1, 'revenue': 20.0}
+    
+    def test_stats_raffle_without_tickets(self, client):
+        """Teste de rifa sem tickets"""
+        raffle = create_raffles(1, tickets_per_raffle=0)[0]
+        
+        stats = get_raffle_stats([raffle.id])
+        
+        assert stats[raffle.id] == {'sold': 0, 'pending': 0, 'revenue': 0.0}
+    
+    def test_stats_empty_input(self, client, query_counter):
+        """Teste sem rifas não executa consultas"""
+        assert get_raffle_stats([]) == {}
+        assert len(query_counter) == 0
+    
+    @pytest.mark.parametrize('endpoint', ['/api/raffles', '/api/reports/raffles'])
+    def test_query_count_constant(self, client, query_counter, auth_headers, endpoint):
+        """Número de consultas não cresce com o número de rifas"""
+        create_raffles(2)
+        query_counter.clear()
+        response = client.get(endpoint, headers=auth_headers)
+        assert response.status_code == 200
+        few_raffles_queries = len(query_counter)
+        
+        create_raffles(20)
+        query_counter.clear()
+        response = client.get(endpoint, headers=auth_headers)
+        assert response.status_code == 200
+        
+        assert len(json.loads(response.data)['raffles']) == 22
+        assert len(query_counter) == few_raffles_queries
+    
+    def test_financial_report_raffle_revenue(self, client, query_counter, auth_headers):
+        """Teste de receita de rifas no relatório financeiro"""
+        create_raffles(2, status='completed')
+        query_counter.clear()
+        response = client.get('/api/reports/financial?year=2024', headers=auth_headers)
+        few_raffles_queries = len(query_counter)
+        
+        create_raffles(10, status='completed')
+        query_counter.clear()
+        response = client.get('/api/reports/financial?year=2024', headers=auth_headers)
+        
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['summary']['raffles_revenue'] == 12 * 20.0
+        assert data['monthly_data']['raffles']['2024-01'] == 2 * 20.0
+        assert len(query_counter) == few_raffles_queries
+
+    def test_counters_follow_purchase_and_confirmation(self, client, create_sample_raffle, sample_ticket_data):
+        """Teste dos contadores da rifa ao comprar e confirmar números"""
+        raffle = create_sample_raffle
+        
+        client.post(f'/api/raffles/{raffle.id}/tickets',
+                   data=json.dumps(sample_ticket_data),
+                   content_type='application/json')
+        db.session.refresh(raffle)
+        assert raffle.reserved_count == 3
+        assert raffle.sold_count == 0
+        
+        client.post(f'/api/raffles/{raffle.id}/tickets/confirm',
+                   data=json.dumps({'ticket_numbers': [1, 5], 'status': 'completed'}),
+                   content_type='application/json')
+        db.session.refresh(raffle)
+        assert raffle.reserved_count == 1
+        assert raffle.sold_count == 2
+        assert float(raffle.revenue) == 20.0
+        
+        data = json.loads(client.get('/api/raffles').data)
+        assert data['raffles'][0]['sold_numbers'] == 2
+        assert data['raffles'][0]['available_numbers'] == raffle.total_numbers - 2
+    
+    def test_counters_do_not_touch_updated_at(self, client, create_sample_raffle, sample_ticket_data):
+        """Vendas não alteram a data de atualização da rifa"""
+        raffle = create_sample_raffle
+        updated_at = raffle.updated_at
+        
+        client.post(f'/api/raffles/{raffle.id}/tickets',
+                   data=json.dumps(sample_ticket_data),
+                   content_type='application/json')
+        db.session.refresh(raffle)
+        
+        assert raffle.updated_at == updated_at
+    
+    def test_reconcile_counters(self, client, create_sample_raffle):
+        """Teste de reconciliação dos contadores com os tickets"""
+        raffle = create_sample_raffle
+        db.session.add(RaffleTicket(raffle_id=raffle.id, ticket_number=7, payment_status='completed'))
+        db.session.commit()
+        
+        drift = reconcile_raffle_counters()
+        assert len(drift) == 1
+        assert drift[0]['raffle_id'] == raffle.id
+        assert drift[0]['current']['sold'] == 0
+        assert drift[0]['expected']['sold'] == 1
+        
+        reconcile_raffle_counters(fix=True)
+        db.session.refresh(raffle)
+        assert raffle.sold_count == 1
+        assert float(raffle.revenue) == 10.0
+        assert reconcile_raffle_counters() == []
+    
+    def test_reconcile_command(self, client, create_sample_raffle):
+        """Teste do comando de reconciliação"""
+        raffle = create_sample_raffle
+        db.session.add(RaffleTicket(raffle_id=raffle.id, ticket_number=7, payment_status='pending'))
+        db.session.commit()
+        
+        runner = app.test_cli_runner()
+        result = runner.invoke(args=['reconcile-raffles'])
+        assert 'reservados 0 -> 1' in result.output
+        
+        result = runner.invoke(args=['reconcile-raffles', '--fix'])
+        assert 'corrigida' in result.output
+        
+        result = runner.invoke(args=['reconcile-raffles'])
+        assert 'consistentes' in result.output
@@ -308,4 +308,49 @@ class TestRafflesAPI:
         assert response.status_code == 200
         data = json.loads(response.data)
         assert 'message' in data
-        assert 'não foi sorteada' in data['message'].lower()
\ No newline at end of file
+        assert 'não foi sorteada' in data['message'].lower()
+    
+    def test_get_raffle_numbers_after_purchase(self, client, create_sample_raffle, sample_ticket_data):
+        """Teste de atualização dos números após compra e confirmação"""
+        raffle = create_sample_raffle
+        
+        # Construir o índice antes da compra
+        client.get(f'/api/raffles/{raffle.id}/numbers')
+        
+        client.post(f'/api/raffles/{raffle.id}/tickets',
+                   data=json.dumps(sample_ticket_data),
+                   content_type='application/json')
+        
+        data = json.loads(client.get(f'/api/raffles/{raffle.id}/numbers').data)
+        assert data['reserved_numbers'] == [1, 5, 10]
+        assert data['sold_numbers'] == []
+        assert len(data['available_numbers']) == raffle.total_numbers - 3
+        
+        client.post(f'/api/raffles/{raffle.id}/tickets/confirm',
+                   data=json.dumps({'ticket_numbers': [1, 5], 'status': 'completed'}),
+                   content_type='application/json')
+        
+        data = json.loads(client.get(f'/api/raffles/{raffle.id}/numbers').data)
+        assert data['sold_numbers'] == [1, 5]
+        assert data['reserved_numbers'] == [10]
+        
+        raffle_data = json.loads(client.get(f'/api/raffles/{raffle.id}').data)['raffle']
+        assert raffle_data['sold_numbers'] == [1, 5]
+        assert 10 in raffle_data['available_numbers']
+    
+    def test_get_raffle_numbers_ranges_format(self, client, create_sample_raffle, sample_ticket_data):
+        """Teste do formato em intervalos dos números da rifa"""
+        raffle = create_sample_raffle
+        
+        client.post(f'/api/raffles/{raffle.id}/tickets',
+                   data=json.dumps(sample_ticket_data),
+                   content_type='application/json')
+        
+        response = client.get(f'/api/raffles/{raffle.id}/numbers?format=ranges')
+        
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['reserved_ranges'] == [[1, 1], [5, 5], [10, 10]]
+        assert data['available_ranges'] == [[2, 4], [6, 9], [11, 100]]
+        assert data['sold_ranges'] == []
+        assert 'available_numbers' not in data
@@ -0,0 +1,248 @@
+import pytest
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timedelta
+from src.models.user import db
+from src.models.donation import Donation, DonationDailyTotal
+from src.models.raffle import Raffle, RaffleTicketDailyTotal
+from src.models.contact import ContactMessage
+from src.routes import reports
+from src.services.revenue_rollup import rebuild_revenue_rollups
+
+def report_statements(statements):
+    """Consultas do relatório (as de autenticação se repetem a cada requisição)"""
+    return [statement for statement in statements if 'admins' not in statement]
+
+@pytest.fixture
+def financial_rows(client):
+    """Doações e rifas sorteadas em meses diferentes de 2024 (e fora do ano)"""
+    donations = [
+        (datetime(2024, 1, 10), 50, 'completed', 'ana@example.com'),
+        (datetime(2024, 1, 31, 23, 59), 25, 'completed', 'bia@example.com'),
+        (datetime(2024, 3, 1), 100, 'completed', 'ana@example.com'),
+        (datetime(2024, 3, 2), 999, 'pending', 'caio@example.com'),
+        (datetime(2024, 12, 31, 12), 10, 'completed', 'bia@example.com'),
+        (datetime(2025, 1, 1), 70, 'completed', 'ana@example.com')
+    ]
+    for created_at, amount, status, email in donations:
+        db.session.add(Donation(donor_name='Doador', donor_email=email, amount=amount,
+                                donation_type='one_time', payment_method='pix',
+                                payment_status=status, created_at=created_at))
+
+    raffles = [
+        (datetime(2024, 3, 15), 'completed', 300),
+        (datetime(2024, 3, 20), 'completed', 200),
+        (datetime(2024, 7, 1), 'completed', 80),
+        (datetime(2024, 7, 2), 'cancelled', 500)
+    ]
+    for drawn_at, status, revenue in raffles:
+        db.session.add(Raffle(title='Rifa', ticket_price=10, total_numbers=100, created_by=1,
+                              status=status, drawn_at=drawn_at, revenue=revenue))
+    db.session.commit()
+
+def rollup_rows():
+    """Linhas não zeradas das duas tabelas de totais diários"""
+    donations = sorted(
+        (row.day, row.donation_type, row.payment_method, row.payment_status, row.donation_count, float(row.amount))
+        for row in DonationDailyTotal.query.all() if row.donation_count
+    )
+    tickets = sorted(
+        (row.day, row.tickets_sold, float(row.revenue))
+        for row in RaffleTicketDailyTotal.query.all() if row.tickets_sold
+    )
+    return donations, tickets
+
+def rebuilt_rows():
+    """Totais recalculados do zero (sem alterar o banco)"""
+    rebuild_revenue_rollups(db.session)
+    rows = rollup_rows()
+    db.session.rollback()
+    return rows
+
+class TestFinancialReport:
+    """Relatório financeiro com uma consulta agrupada por fonte de receita"""
+
+    def test_monthly_totals(self, client, auth_headers, financial_rows):
+        response = client.get('/api/reports/financial?year=2024', headers=auth_headers)
+        data = json.loads(response.data)
+
+        assert response.status_code == 200
+        donations = data['monthly_data']['donations']
+        raffles = data['monthly_data']['raffles']
+        assert len(donations) == len(raffles) == 12
+        assert donations['2024-01'] == 75.0
+        assert donations['2024-03'] == 100.0
+        assert donations['2024-12'] == 10.0
+        assert donations['2024-02'] == 0
+        assert raffles['2024-03'] == 500.0
+        assert raffles['2024-07'] == 80.0
+        assert data['summary']['total_revenue'] == 765.0
+        assert data['top_donors'][0]['total_amount'] == 150.0
+
+    def test_statement_count(self, client, auth_headers, financial_rows, query_counter):
+        """Doações por mês, rifas por mês e top doadores: 3 consultas"""
+        response = client.get('/api/reports/financial?year=2024', headers=auth_headers)
+
+        assert response.status_code == 200
+        assert len(report_statements(query_counter)) == 3
+
+class TestRevenueRollups:
+    """Totais diários mantidos a cada alteração de pagamento"""
+
+    def test_donation_changes(self, client, financial_rows):
+        donation = Donation.query.filter_by(payment_status='pending').one()
+        assert rollup_rows() == rebuilt_rows()
+
+        donation.payment_status = 'completed'
+        db.session.commit()
+        assert (datetime(2024, 3, 2).date(), 'one_time', 'pix', 'completed', 1, 999.0) in rollup_rows()[0]
+        assert rollup_rows() == rebuilt_rows()
+
+        donation.amount = 99
+        donation.created_at = datetime(2024, 4, 1)
+        db.session.commit()
+        assert rollup_rows() == rebuilt_rows()
+
+        db.session.delete(donation)
+        db.session.commit()
+        assert rollup_rows() == rebuilt_rows()
+
+    def test_confirm_route(self, client, create_sample_donation):
+        donation_id = create_sample_donation.id
+        client.post(f'/api/donations/{donation_id}/confirm', data=json.dumps({'status': 'failed'}),
+                    content_type='application/json')
+
+        donations, _ = rollup_rows()
+        assert [row[3:] for row in donations] == [('failed', 1, 50.0)]
+        assert rollup_rows() == rebuilt_rows()
+
+    def test_ticket_sales(self, client, create_sample_raffle):
+        raffle_id = create_sample_raffle.id
+        client.post(f'/api/raffles/{raffle_id}/tickets', data=json.dumps({
+            'buyer_name': 'Maria Santos',
+            'buyer_email': 'maria@example.com',
+            'selected_numbers': [1, 2, 3],
+            'payment_method': 'pix'
+        }), content_type='application/json')
+        assert rollup_rows()[1] == []
+
+        for numbers, status in (([1, 2], 'completed'), ([2], 'failed')):
+            client.post(f'/api/raffles/{raffle_id}/tickets/confirm',
+                        data=json.dumps({'ticket_numbers': numbers, 'status': status}),
+                        content_type='application/json')
+
+        assert rollup_rows()[1] == [(datetime.utcnow().date(), 1, 10.0)]
+        assert rollup_rows() == rebuilt_rows()
+
+class TestReportsFromRollups:
+    """Relatórios de doações lidos dos totais diários"""
+
+    def test_dashboard(self, client, auth_headers, query_counter):
+        today = datetime.utcnow()
+        for days_ago, amount, donation_type in ((0, 10, 'one_time'), (2, 20, 'recurring'), (40, 30, 'recurring')):
+            db.session.add(Donation(donor_name='Doador', donor_email='ana@example.com', amount=amount,
+                                    donation_type=donation_type, payment_method='pix',
+                                    payment_status='completed', created_at=today - timedelta(days=days_ago)))
+        db.session.commit()
+        query_counter.clear()
+
+        data = json.loads(client.get('/api/reports/dashboard', headers=auth_headers).data)
+
+        assert data['donations'] == {'total_count': 2, 'total_amount': 30.0,
+                                     'recurring_count': 2, 'recurring_monthly': 50.0}
+        chart = data['charts']['daily_donations']
+        assert [day['amount'] for day in chart] == [0, 0, 0, 0, 20.0, 0, 10.0]
+        assert chart[-1]['date'] == today.strftime('%Y-%m-%d')
+        # Totais, rifas ativas, vendidos, mensagens, gráfico e recentes
+        assert len(report_statements(query_counter)) == 6
+
+    def test_donations_report_day_filters(self, client, auth_headers, financial_rows):
+        response = client.get('/api/reports/donations?start_date=2024-01-10&end_date=2024-03-01',
+                              headers=auth_headers)
+        data = json.loads(response.data)
+
+        assert data['summary'] == {'total_count': 3, 'total_amount': 175.0, 'average_donation': 175.0 / 3}
+        assert data['monthly_breakdown'] == {'2024-01': {'count': 2, 'amount': 75.0},
+                                             '2024-03': {'count': 1, 'amount': 100.0}}
+        assert 'donations' not in data
+
+    def test_monthly_summary(self, client, auth_headers, financial_rows):
+        response = client.get('/api/reports/monthly-summary?year=2024&month=1', headers=auth_headers)
+        data = json.loads(response.data)
+
+        assert data['total_donations'] == 2
+        assert data['total_amount'] == 75.0
+        assert data['new_donors'] == 2
+
+def csv_rows(data):
+    return list(csv.reader(io.StringIO(data.decode('utf-8'))))
+
+class TestCsvExport:
+    """Exportações CSV em stream"""
+
+    def test_donations(self, client, auth_headers, financial_rows):
+        response = client.get('/api/reports/export/donations?start_date=2024-01-01&end_date=2024-12-31',
+                              headers=auth_headers)
+
+        assert response.status_code == 200
+        assert response.is_streamed
+        assert response.mimetype == 'text/csv'
+        assert response.headers['Content-Disposition'].startswith('attachment; filename="doacoes_')
+        rows = csv_rows(response.data)
+        assert rows[0][0] == 'Data'
+        assert [row[3] for row in rows[1:]] == ['R$ 10.00', 'R$ 100.00', 'R$ 25.00', 'R$ 50.00']
+
+    def test_sent_in_chunks(self, client, auth_headers, financial_rows, monkeypatch):
+        monkeypatch.setattr(reports, 'EXPORT_CHUNK_SIZE', 10)
+
+        response = client.get('/api/reports/export/donations', headers=auth_headers, buffered=False)
+        chunks = list(response.response)
+        response.close()
+
+        assert len(chunks) > 2
+        assert len(csv_rows(b''.join(chunks))) == 6
+
+    def test_gzip(self, client, auth_headers, financial_rows):
+        plain = client.get('/api/reports/export/donations', headers=auth_headers).data
+        response = client.get('/api/reports/export/donations?gzip=true', headers=auth_headers)
+
+        assert response.mimetype == 'application/gzip'
+        assert 'Content-Encoding' not in response.headers
+        assert response.headers['Content-Disposition'].endswith('.csv.gz"')
+        assert gzip.decompress(response.data) == plain
+
+    def test_raffle_tickets(self, client, auth_headers, create_sample_raffle):
+        raffle_id = create_sample_raffle.id
+        client.post(f'/api/raffles/{raffle_id}/tickets', data=json.dumps({
+            'buyer_name': 'Maria Santos',
+            'buyer_email': 'maria@example.com',
+            'selected_numbers': [8, 3, 5],
+            'payment_method': 'pix'
+        }), content_type='application/json')
+        client.post(f'/api/raffles/{raffle_id}/tickets/confirm',
+                    data=json.dumps({'ticket_numbers': [8, 3], 'status': 'completed'}),
+                    content_type='application/json')
+
+        sold = csv_rows(client.get(f'/api/reports/export/raffles/{raffle_id}/tickets', headers=auth_headers).data)
+        every = csv_rows(client.get(f'/api/reports/export/raffles/{raffle_id}/tickets?status=all',
+                                    headers=auth_headers).data)
+
+        assert [row[0] for row in sold[1:]] == ['3', '8']
+        assert [row[4] for row in every[1:]] == ['completed', 'pending', 'completed']
+
+    def test_missing_raffle(self, client, auth_headers):
+        response = client.get('/api/reports/export/raffles/999/tickets', headers=auth_headers)
+
+        assert response.status_code == 404
+
+    def test_contact_messages(self, client, auth_headers):
+        for i, status in enumerate(['new', 'read', 'new']):
+            db.session.add(ContactMessage(name='Ana', email='ana@example.com', message=f'Olá, "{i}"\nlinha 2',
+                                          status=status, created_at=datetime(2024, 1, 1 + i)))
+        db.session.commit()
+
+        rows = csv_rows(client.get('/api/reports/export/contact-messages?status=new', headers=auth_headers).data)
+
+        assert [row[5] for row in rows[1:]] == ['Olá, "2"\nlinha 2', 'Olá, "0"\nlinha 2']
@@ -0,0 +1,327 @@
+import pytest
+import json
+import threading
+from datetime import datetime, timedelta
+from src.main import app
+from src.models.user import db
+from src.models.raffle import Raffle, RaffleTicket
+from src.services.raffle_availability import availability_index
+from src.services.raffle_stats import reconcile_raffle_counters
+from src.services.reservation_service import reservation_service
+
+BUYER = {'buyer_name': 'Maria Santos', 'buyer_email': 'maria@example.com', 'buyer_phone': None}
+
+def expire_holds(raffle_id, numbers=None):
+    """Vence as reservas pendentes de uma rifa"""
+    query = RaffleTicket.query.filter_by(raffle_id=raffle_id, payment_status='pending')
+    if numbers is not None:
+        query = query.filter(RaffleTicket.ticket_number.in_(numbers))
+    query.update({'reserved_until': datetime.utcnow() - timedelta(minutes=1)}, synchronize_session=False)
+    db.session.commit()
+
+class TestReservationService:
+    """Testes para o serviço de reserva atômica de números"""
+    
+    def test_reserve_free_numbers(self, client, create_sample_raffle):
+        """Teste de reserva de números livres"""
+        raffle = create_sample_raffle
+        
+        result = reservation_service.reserve(raffle.id, [3, 1, 2], BUYER)
+        
+        assert result['won'] == [1, 2, 3]
+        assert result['lost'] == []
+        assert len(result['ticket_ids']) == 3
+        assert RaffleTicket.query.filter_by(raffle_id=raffle.id, payment_status='pending').count() == 3
+        db.session.refresh(raffle)
+        assert raffle.reserved_count == 3
+    
+    def test_reserve_conflict_all_or_nothing(self, client, create_sample_raffle):
+        """Conflito em um número não reserva nenhum dos outros"""
+        raffle = create_sample_raffle
+        reservation_service.reserve(raffle.id, [2], BUYER)
+        
+        result = reservation_service.reserve(raffle.id, [1, 2, 3], BUYER)
+        
+        assert result['won'] == []
+        assert result['lost'] == [2]
+        assert RaffleTicket.query.filter_by(raffle_id=raffle.id).count() == 1
+        db.session.refresh(raffle)
+        assert raffle.reserved_count == 1
+    
+    def test_reserve_partial(self, client, create_sample_raffle):
+        """Reserva parcial mantém os números livres"""
+        raffle = create_sample_raffle
+        reservation_service.reserve(raffle.id, [2], BUYER)
+        
+        result = reservation_service.reserve(raffle.id, [1, 2, 3], BUYER, allow_partial=True)
+        
+        assert result['won'] == [1, 3]
+        assert result['lost'] == [2]
+        db.session.refresh(raffle)
+        assert raffle.reserved_count == 3
+    
+    def test_reserve_reuses_released_ticket(self, client, create_sample_raffle):
+        """Números de tickets com pagamento falho podem ser reservados de novo"""
+        raffle = create_sample_raffle
+        db.session.add(RaffleTicket(raffle_id=raffle.id, ticket_number=4, payment_status='failed',
+                                    payment_id='OLD', buyer_name='Antigo'))
+        db.session.commit()
+        
+        result = reservation_service.reserve(raffle.id, [4], BUYER)
+        
+        assert result['won'] == [4]
+        ticket = RaffleTicket.query.filter_by(raffle_id=raffle.id, ticket_number=4).one()
+        assert ticket.payment_status == 'pending'
+        assert ticket.buyer_name == 'Maria Santos'
+        assert ticket.payment_id is None
+    
+    def test_buy_tickets_conflict_response(self, client, create_sample_raffle, sample_ticket_data):
+        """Compra com número já reservado informa os números indisponíveis"""
+        raffle = create_sample_raffle
+        client.post(f'/api/raffles/{raffle.id}/tickets',
+                   data=json.dumps(sample_ticket_data),
+                   content_type='application/json')
+        
+        sample_ticket_data['selected_numbers'] = [5, 6]
+        response = client.post(f'/api/raffles/{raffle.id}/tickets',
+                              data=json.dumps(sample_ticket_data),
+                              content_type='application/json')
+        
+        assert response.status_code == 400
+        assert json.loads(response.data)['unavailable_numbers'] == [5]
+        
+        sample_ticket_data['allow_partial'] = True
+        response = client.post(f'/api/raffles/{raffle.id}/tickets',
+                              data=json.dumps(sample_ticket_data),
+                              content_type='application/json')
+        
+        assert response.status_code == 201
+        data = json.loads(response.data)
+        assert data['ticket_numbers'] == [6]
+        assert data['unavailable_numbers'] == [5]
+        assert data['total_amount'] == float(raffle.ticket_price)
+    
+    @pytest.mark.slow
+    def test_concurrent_reservations(self, client, create_sample_raffle):
+        """Compradores concorrentes nunca recebem o mesmo número"""
+        raffle_id = create_sample_raffle.id
+        results = []
+        errors = []
+        
+        def buyer(offset):
+            try:
+                with app.app_context():
+                    for attempt in range(10):
+                        numbers = [(offset + attempt + i) % 100 + 1 for i in range(3)]
+                        result = reservation_service.reserve(raffle_id, numbers, BUYER, allow_partial=True)
+                        results.append(result['won'])
+            except Exception as e:
+                errors.append(e)
+        
+        threads = [threading.Thread(target=buyer, args=(i * 5,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert errors == []
+        won_numbers = [number for won in results for number in won]
+        assert len(won_numbers) == len(set(won_numbers))
+        
+        db.session.expire_all()
+        assert RaffleTicket.query.filter_by(raffle_id=raffle_id).count() == len(won_numbers)
+        assert db.session.get(Raffle, raffle_id).reserved_count == len(won_numbers)
+    
+    def test_reserve_sets_expiration(self, client, create_sample_raffle):
+        """Reserva recebe prazo de expiração"""
+        raffle = create_sample_raffle
+        
+        result = reservation_service.reserve(raffle.id, [1], BUYER)
+        
+        ticket = RaffleTicket.query.filter_by(raffle_id=raffle.id, ticket_number=1).one()
+        assert ticket.reserved_until == result['reserved_until']
+        assert ticket.reserved_until > datetime.utcnow()
+    
+    def test_expired_hold_can_be_claimed(self, client, create_sample_raffle):
+        """Reserva vencida e ainda não liberada pode ser reservada por outro comprador"""
+        raffle = create_sample_raffle
+        reservation_service.reserve(raffle.id, [1, 2], BUYER)
+        expire_holds(raffle.id)
+        
+        result = reservation_service.reserve(raffle.id, [1], {'buyer_name': 'Outro', 'buyer_email': 'outro@example.com'})
+        
+        assert result['won'] == [1]
+        ticket = RaffleTicket.query.filter_by(raffle_id=raffle.id, ticket_number=1).one()
+        assert ticket.buyer_name == 'Outro'
+        db.session.refresh(raffle)
+        # Número 2 continua contado até o sweeper passar
+        assert raffle.reserved_count == 2
+        assert reconcile_raffle_counters() == []
+    
+    def test_release_expired_in_batches(self, client, create_sample_raffle):
+        """Sweeper libera as reservas vencidas em lotes"""
+        raffle = create_sample_raffle
+        reservation_service.reserve(raffle.id, [1, 2, 3, 4, 5], BUYER)
+        reservation_service.reserve(raffle.id, [6], BUYER)
+        expire_holds(raffle.id, numbers=[1, 2, 3, 4, 5])
+        
+        released = reservation_service.release_expired(batch_size=2)
+        
+        assert released == 5
+        statuses = dict(db.session.query(RaffleTicket.ticket_number, RaffleTicket.payment_status).filter(
+            RaffleTicket.raffle_id == raffle.id
+        ).all())
+        assert statuses == {1: 'expired', 2: 'expired', 3: 'expired', 4: 'expired', 5: 'expired', 6: 'pending'}
+        db.session.refresh(raffle)
+        assert raffle.reserved_count == 1
+        assert reservation_service.release_expired() == 0
+    
+    def test_numbers_ignore_expired_holds(self, client, create_sample_raffle):
+        """Leitura de disponibilidade ignora reservas vencidas antes do sweeper"""
+        raffle = create_sample_raffle
+        reservation_service.reserve(raffle.id, [1, 2], BUYER)
+        expire_holds(raffle.id, numbers=[1])
+        availability_index.clear()
+        
+        data = json.loads(client.get(f'/api/raffles/{raffle.id}/numbers').data)
+        
+        assert data['reserved_numbers'] == [2]
+        assert 1 in data['available_numbers']
+    
+    def test_release_command(self, client, create_sample_raffle):
+        """Teste do comando de liberação de reservas"""
+        raffle = create_sample_raffle
+        reservation_service.reserve(raffle.id, [1], BUYER)
+        expire_holds(raffle.id)
+        
+        result = app.test_cli_runner().invoke(args=['release-expired-reservations'])
+        
+        assert '1 reserva(s)' in result.output
+    
+    def test_confirm_rejects_expired_hold(self, client, create_sample_raffle):
+        """Pagamento que chega depois do prazo da reserva não vende o número"""
+        raffle = create_sample_raffle
+        reservation_service.reserve(raffle.id, [1, 2], BUYER)
+        expire_holds(raffle.id, numbers=[1])
+        
+        response = client.post(f'/api/raffles/{raffle.id}/tickets/confirm',
+                               data=json.dumps({'ticket_numbers': [1, 2], 'status': 'completed'}),
+                               content_type='application/json')
+        
+        assert response.status_code == 400
+        assert json.loads(response.data)['unavailable_numbers'] == [1]
+        assert RaffleTicket.query.filter_by(raffle_id=raffle.id, payment_status='completed').count() == 0
+    
+    def test_confirm_rejects_reclaimed_number(self, client, create_sample_raffle):
+        """Pagamento atrasado não vende o número reservado por outro comprador"""
+        raffle = create_sample_raffle
+        reservation_service.reserve(raffle.id, [1], BUYER)
+        expire_holds(raffle.id)
+        reservation_service.reserve(raffle.id, [1], {'buyer_name': 'Outro', 'buyer_email': 'outro@example.com'})
+        
+        response = client.post(f'/api/raffles/{raffle.id}/tickets/confirm', data=json.dumps({
+            'ticket_numbers': [1], 'status': 'completed', 'buyer_email': BUYER['buyer_email']
+        }), content_type='application/json')
+        
+        assert response.status_code == 400
+        ticket = RaffleTicket.query.filter_by(raffle_id=raffle.id, ticket_number=1).one()
+        assert ticket.payment_status == 'pending'
+        assert ticket.buyer_email == 'outro@example.com'
+    
+    def test_confirm_repeated_payment(self, client, create_sample_raffle):
+        """Confirmação repetida com o mesmo payment_id é aceita; outro pagamento não"""
+        raffle = create_sample_raffle
+        reservation_service.reserve(raffle.id, [1], BUYER)
+        url = f'/api/raffles/{raffle.id}/tickets/confirm'
+        confirm = {'ticket_numbers': [1], 'status': 'completed', 'payment_id': 'PAY1'}
+        
+        first = client.post(url, data=json.dumps(confirm), content_type='application/json')
+        repeated = client.post(url, data=json.dumps(confirm), content_type='application/json')
+        other = client.post(url, data=json.dumps({**confirm, 'payment_id': 'PAY2'}),
+                            content_type='application/json')
+        
+        assert first.status_code == 200
+        assert repeated.status_code == 200
+        assert other.status_code == 400
+        db.session.refresh(raffle)
+        assert raffle.sold_count == 1
+        assert reconcile_raffle_counters() == []
+    
+    def test_buy_random_numbers(self, client, create_sample_raffle, sample_ticket_data):
+        """Compra com números sorteados pelo servidor"""
+        raffle = create_sample_raffle
+        client.post(f'/api/raffles/{raffle.id}/tickets',
+                   data=json.dumps(sample_ticket_data),
+                   content_type='application/json')
+        
+        del sample_ticket_data['selected_numbers']
+        sample_ticket_data['quantity'] = 20
+        response = client.post(f'/api/raffles/{raffle.id}/tickets',
+                              data=json.dumps(sample_ticket_data),
+                              content_type='application/json')
+        
+        assert response.status_code == 201
+        data = json.loads(response.data)
+        assert len(data['ticket_numbers']) == 20
+        assert not set(data['ticket_numbers']) & {1, 5, 10}
+        assert data['total_amount'] == 20 * float(raffle.ticket_price)
+        db.session.refresh(raffle)
+        assert raffle.reserved_count == 23
+    
+    def test_buy_random_numbers_not_enough(self, client, create_sample_raffle, sample_ticket_data):
+        """Compra sorteada maior que os números livres não reserva nada"""
+        raffle = create_sample_raffle
+        reservation_service.reserve(raffle.id, list(range(1, 96)), BUYER)
+        
+        del sample_ticket_data['selected_numbers']
+        sample_ticket_data['quantity'] = 10
+        response = client.post(f'/api/raffles/{raffle.id}/tickets',
+                              data=json.dumps(sample_ticket_data),
+                              content_type='application/json')
+        assert response.status_code == 400
+        assert RaffleTicket.query.filter_by(raffle_id=raffle.id).count() == 95
+        
+        sample_ticket_data['allow_partial'] = True
+        response = client.post(f'/api/raffles/{raffle.id}/tickets',
+                              data=json.dumps(sample_ticket_data),
+                              content_type='application/json')
+        assert response.status_code == 201
+        assert json.loads(response.data)['ticket_numbers'] == [96, 97, 98, 99, 100]
+    
+    def test_reserve_random_with_stale_index(self, client, create_sample_raffle):
+        """Números levados por outro processo são repostos em nova rodada"""
+        raffle = create_sample_raffle
+        availability_index.get(raffle)
+        # Reserva feita "por outro processo": o índice local não é avisado
+        reservation_service.claim(raffle.id, list(range(1, 91)), BUYER)
+        db.session.commit()
+        
+        result = reservation_service.reserve_random(raffle, 10, BUYER)
+        
+        assert result['won'] == list(range(91, 101))
+        assert result['missing'] == 0
+    
+    @pytest.mark.parametrize('quantity', [0, True, '3', 2.5])
+    def test_buy_random_invalid_quantity(self, client, create_sample_raffle, sample_ticket_data, quantity):
+        """Quantidade inválida é rejeitada"""
+        raffle = create_sample_raffle
+        del sample_ticket_data['selected_numbers']
+        sample_ticket_data['quantity'] = quantity
+        
+        response = client.post(f'/api/raffles/{raffle.id}/tickets',
+                              data=json.dumps(sample_ticket_data),
+                              content_type='application/json')
+        
+        assert response.status_code == 400
+    
+    def test_buy_with_quantity_and_numbers(self, client, create_sample_raffle, sample_ticket_data):
+        """Números escolhidos e quantidade na mesma compra são rejeitados"""
+        raffle = create_sample_raffle
+        sample_ticket_data['quantity'] = 2
+        
+        response = client.post(f'/api/raffles/{raffle.id}/tickets',
+                              data=json.dumps(sample_ticket_data),
+                              content_type='application/json')
+        
+        assert response.status_code == 400
+        assert RaffleTicket.query.filter_by(raffle_id=raffle.id).count() == 0
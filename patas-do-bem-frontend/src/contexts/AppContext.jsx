@@ -9,6 +9,8 @@ const initialState = {
     list: [],
     stats: null,
     history: [],
+    nextCursor: null,
+    historyNextCursor: null,
     loading: false,
     error: null,
   },
@@ -27,6 +29,7 @@ const initialState = {
   contact: {
     messages: [],
     unreadCount: 0,
+    nextCursor: null,
     loading: false,
     error: null,
   },
@@ -115,7 +118,8 @@ function appReducer(state, action) {
         ...state,
         donations: {
           ...state.donations,
-          list: action.payload,
+          list: action.append ? [...state.donations.list, ...action.payload] : action.payload,
+          nextCursor: action.nextCursor || null,
           loading: false,
           error: null,
         },
@@ -135,7 +139,8 @@ function appReducer(state, action) {
         ...state,
         donations: {
           ...state.donations,
-          history: action.payload,
+          history: action.append ? [...state.donations.history, ...action.payload] : action.payload,
+          historyNextCursor: action.nextCursor || null,
         },
       }
 
@@ -274,8 +279,11 @@ function appReducer(state, action) {
         ...state,
         contact: {
           ...state.contact,
-          messages: action.payload.messages || [],
-          unreadCount: action.payload.unreadCount || 0,
+          messages: action.append
+            ? [...state.contact.messages, ...(action.payload.messages || [])]
+            : action.payload.messages || [],
+          unreadCount: action.payload.unread_count || 0,
+          nextCursor: action.payload.next_cursor || null,
           loading: false,
           error: null,
         },
@@ -345,11 +353,17 @@ export function AppProvider({ children }) {
   }
 
   // Donation actions
+  // Listagens paginadas por cursor: passe { cursor: nextCursor } para acrescentar a próxima página
   const loadDonations = async (params = {}) => {
     try {
       dispatch({ type: 'SET_DONATIONS_LOADING', payload: true })
       const data = await apiService.getDonations(params)
-      dispatch({ type: 'SET_DONATIONS', payload: data.donations || [] })
+      dispatch({
+        type: 'SET_DONATIONS',
+        payload: data.donations || [],
+        nextCursor: data.next_cursor,
+        append: Boolean(params.cursor),
+      })
       return data
     } catch (error) {
       dispatch({ type: 'SET_DONATIONS_ERROR', payload: error.message })
@@ -371,7 +385,12 @@ export function AppProvider({ children }) {
   const loadDonationHistory = async (params = {}) => {
     try {
       const data = await apiService.getDonationHistory(params)
-      dispatch({ type: 'SET_DONATION_HISTORY', payload: data.donations || [] })
+      dispatch({
+        type: 'SET_DONATION_HISTORY',
+        payload: data.donations || [],
+        nextCursor: data.next_cursor,
+        append: Boolean(params.cursor),
+      })
       return data
     } catch (error) {
       console.error('Error loading donation history:', error)
@@ -482,11 +501,11 @@ export function AppProvider({ children }) {
     }
   }
 
-  const loadContactMessages = async (page = 1, limit = 20, status = 'all') => {
+  const loadContactMessages = async (cursor = null, limit = 20, status = 'all') => {
     try {
       dispatch({ type: 'SET_CONTACT_LOADING', payload: true })
-      const data = await apiService.getContactMessages(page, limit, status)
-      dispatch({ type: 'SET_CONTACT_MESSAGES', payload: data })
+      const data = await apiService.getContactMessages(cursor, limit, status)
+      dispatch({ type: 'SET_CONTACT_MESSAGES', payload: data, append: Boolean(cursor) })
       return data
     } catch (error) {
       dispatch({ type: 'SET_CONTACT_ERROR', payload: error.message })
@@ -11,6 +11,7 @@ import { Alert, AlertDescription } from '@/components/ui/alert'
 import { Separator } from '@/components/ui/separator'
 import { Skeleton } from '@/components/ui/skeleton'
 import { useApp } from '@/contexts/AppContext'
+import { API_BASE_URL } from '@/services/api'
 
 export function RifaDetalhes() {
   const { id } = useParams()
@@ -33,6 +34,43 @@ export function RifaDetalhes() {
     fetchRaffleDetails()
   }, [id])
 
+  // Mudanças dos números em tempo real (SSE): outros compradores reservando,
+  // pagamentos confirmados e reservas expiradas
+  useEffect(() => {
+    const events = new EventSource(`${API_BASE_URL}/api/raffles/${id}/events`)
+
+    const expand = (ranges) => ranges.flatMap(([start, end]) =>
+      Array.from({ length: end - start + 1 }, (_, i) => start + i)
+    )
+
+    events.addEventListener('snapshot', (e) => {
+      const data = JSON.parse(e.data)
+      setAvailableNumbers(expand(data.available_ranges))
+      setSoldNumbers(expand(data.sold_ranges))
+      setReservedNumbers(expand(data.reserved_ranges))
+    })
+
+    const applyChange = (target) => (e) => {
+      const changed = new Set(JSON.parse(e.data).numbers)
+      const update = (state) => (prev) => {
+        const rest = prev.filter(n => !changed.has(n))
+        return state === target ? [...rest, ...changed].sort((a, b) => a - b) : rest
+      }
+      setAvailableNumbers(update('available'))
+      setReservedNumbers(update('reserved'))
+      setSoldNumbers(update('sold'))
+      if (target !== 'available') {
+        setSelectedNumbers(prev => prev.filter(n => !changed.has(n)))
+      }
+    }
+
+    events.addEventListener('reserved', applyChange('reserved'))
+    events.addEventListener('sold', applyChange('sold'))
+    events.addEventListener('released', applyChange('available'))
+
+    return () => events.close()
+  }, [id])
+
   const fetchRaffleDetails = async () => {
     try {
       setLoading(true)
@@ -1,4 +1,4 @@
-const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://localhost:5000'
+export const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://localhost:5000'
 
 class ApiService {
   constructor() {
@@ -181,8 +181,10 @@ class ApiService {
     })
   }
 
-  async getContactMessages(page = 1, limit = 20, status = 'all') {
-    const params = new URLSearchParams({ page, limit, status })
+  // Paginação por cursor: a próxima página usa o next_cursor da anterior
+  async getContactMessages(cursor = null, limit = 20, status = 'all') {
+    const params = new URLSearchParams({ limit, status })
+    if (cursor) params.set('cursor', cursor)
     return this.request(`/api/contact/messages?${params}`)
   }
 